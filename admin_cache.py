@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+
+from workers import BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = ('administrator', 'creator')
+
+
+class _AdminEntry:
+    __slots__ = ('admin_ids', 'fetched_at')
+
+    def __init__(self, admin_ids, fetched_at):
+        self.admin_ids = admin_ids
+        self.fetched_at = fetched_at
+
+
+class AdminCache:
+    """
+    Per-chat admin id sets, refreshed in the background (replaces the single global admin_ids set).
+
+    Lookups never call Telegram: once an entry is older than `refresh_ahead * ttl` a refresh is queued
+    on a one-thread executor (deduplicated per chat) while the current set keeps being served. A chat
+    with no entry yet is "cold": is_admin() returns None and the caller decides how to verify.
+
+    chat_member events only matter when the old or new status is administrator/creator; those are
+    patched into the cached set at once and remembered until the next fetch completes, so a fetch
+    that was already running is merged with them instead of thrown away. A chat warmed at startup
+    keeps retrying every `retry_after` seconds until its first fetch succeeds.
+
+    fetch(chat_id) -> iterable of admin user ids.
+    """
+
+    def __init__(self, fetch, ttl=600.0, refresh_ahead=0.8, retry_after=30.0, max_queue=100):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.retry_after = retry_after
+        self._entries = {}
+        self._failed_at = {}
+        self._generation = {}  # chat_id -> jumlah event admin/invalidate yang diterima
+        self._patches = {}  # chat_id -> {user_id: (generation, is_admin)} yang belum tercakup fetch
+        self._invalidated = {}  # chat_id -> generation invalidate terakhir
+        self._warming = set()
+        self._retry_timers = {}
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._executor = BoundedExecutor(max_workers=1, max_queue=max_queue, name="admin-refresh")
+        self._hits = 0
+        self._cold = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+        self._invalidations = 0
+
+    def warm(self, chat_id):
+        """Fetch the chat's admins in the background, retrying every `retry_after` s until it succeeds."""
+        with self._lock:
+            self._warming.add(chat_id)
+        self._schedule_refresh(chat_id)
+
+    def get(self, chat_id):
+        """Cached admin ids for the chat (possibly stale), or None when the chat is cold."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is None:
+                self._cold += 1
+            else:
+                self._hits += 1
+            needs_refresh = entry is None or now - entry.fetched_at >= self.ttl * self.refresh_ahead
+            if needs_refresh and now - self._failed_at.get(chat_id, float('-inf')) < self.retry_after:
+                needs_refresh = False  # jangan membanjiri API saat refresh terakhir gagal
+        if needs_refresh:
+            self._schedule_refresh(chat_id)
+        return entry.admin_ids if entry else None
+
+    def is_admin(self, chat_id, user_id):
+        """True/False from the cache, None when the chat is cold."""
+        admin_ids = self.get(chat_id)
+        return None if admin_ids is None else user_id in admin_ids
+
+    def apply_member_update(self, chat_id, user_id, old_status, new_status):
+        """
+        Apply a chat_member status change immediately and re-fetch the full list in the background.
+        Changes that do not involve an admin status (joins, leaves, restrictions) are ignored.
+        """
+        if old_status not in ADMIN_STATUSES and new_status not in ADMIN_STATUSES:
+            return
+        is_admin = new_status in ADMIN_STATUSES
+        with self._lock:
+            generation = self._generation.get(chat_id, 0) + 1
+            self._generation[chat_id] = generation
+            self._patches.setdefault(chat_id, {})[user_id] = (generation, is_admin)
+            entry = self._entries.get(chat_id)
+            if entry is not None:
+                entry.admin_ids = (entry.admin_ids | {user_id}) if is_admin else (entry.admin_ids - {user_id})
+            self._invalidations += 1
+            self._failed_at.pop(chat_id, None)
+        self._schedule_refresh(chat_id)
+
+    def invalidate(self, chat_id):
+        """Re-fetch the chat's admins (e.g. the bot's own membership changed); the stale set is served meanwhile."""
+        with self._lock:
+            generation = self._generation.get(chat_id, 0) + 1
+            self._generation[chat_id] = generation
+            self._invalidated[chat_id] = generation
+            entry = self._entries.get(chat_id)
+            if entry is not None:
+                # Tandai kedaluwarsa: bila refresh gagal, lookup berikutnya mencoba lagi setelah retry_after
+                entry.fetched_at = min(entry.fetched_at, time.monotonic() - self.ttl)
+            self._failed_at.pop(chat_id, None)
+            self._invalidations += 1
+        self._schedule_refresh(chat_id)
+
+    def _schedule_refresh(self, chat_id):
+        self._executor.submit(self._refresh, chat_id, key=chat_id)
+
+    def _refresh(self, chat_id):
+        while True:
+            with self._lock:
+                started = self._generation.get(chat_id, 0)
+            try:
+                fetched = frozenset(self._fetch(chat_id))
+            except Exception as e:
+                with self._lock:
+                    self._failed_at[chat_id] = time.monotonic()
+                    self._refresh_failures += 1
+                    retry = chat_id in self._warming and not self._stopped
+                logger.error(f"Could not update admin list for {chat_id}: {e}")
+                if retry:
+                    self._schedule_retry(chat_id)
+                return
+            with self._lock:
+                # Event yang datang selama fetch berjalan ditumpuk di atas hasilnya, bukan membuang hasil fetch
+                admin_ids = set(fetched)
+                for user_id, (generation, is_admin) in self._patches.pop(chat_id, {}).items():
+                    if generation > started:
+                        if is_admin:
+                            admin_ids.add(user_id)
+                        else:
+                            admin_ids.discard(user_id)
+                self._entries[chat_id] = _AdminEntry(frozenset(admin_ids), time.monotonic())
+                self._failed_at.pop(chat_id, None)
+                self._warming.discard(chat_id)
+                self._refreshes += 1
+                # Invalidate selama fetch (mis. bot baru dipromosikan): satu fetch lagi untuk semuanya
+                again = self._invalidated.get(chat_id, 0) > started
+            if not again:
+                return
+
+    def _schedule_retry(self, chat_id):
+        timer = threading.Timer(self.retry_after, self._schedule_refresh, args=(chat_id,))
+        timer.daemon = True
+        with self._lock:
+            self._retry_timers[chat_id] = timer
+        timer.start()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            timers = list(self._retry_timers.values())
+            self._retry_timers.clear()
+        for timer in timers:
+            timer.cancel()
+        self._executor.stop()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "chats": len(self._entries),
+                "hits": self._hits,
+                "cold_lookups": self._cold,
+                "refreshes": self._refreshes,
+                "refresh_failures": self._refresh_failures,
+                "invalidations": self._invalidations,
+                "oldest_entry_age_s": round(max((now - e.fetched_at for e in self._entries.values()), default=0.0), 1),
+            }
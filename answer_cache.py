@@ -0,0 +1,87 @@
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Hanya sapaan dan kata pengisi yang tidak mengubah maksud pertanyaan. Kata ganti, kata bantu
+# (is/was/did/...) dan kata tanya sengaja tidak dimasukkan: "did you sell?" vs "do I sell?" dan
+# "was it rugged?" vs "is it rugged?" adalah pertanyaan yang berbeda dan tidak boleh berbagi jawaban.
+STOPWORDS = frozenset({
+    'pls', 'plz', 'please', 'fren', 'frens', 'bro', 'guys', 'hey', 'hi', 'hello', 'yo', 'gm', 'ser',
+})
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(text, drop_stopwords=True):
+    """Cache key for a question: lowercased, punctuation stripped, whitespace collapsed, greetings/filler optionally dropped."""
+    words = _WHITESPACE.split(_PUNCTUATION.sub(" ", (text or "").lower()).strip())
+    if drop_stopwords:
+        kept = [w for w in words if w not in STOPWORDS]
+        # Pertanyaan yang seluruhnya stopword tetap dipakai apa adanya
+        words = kept or words
+    return " ".join(w for w in words if w)
+
+
+class AnswerCache:
+    """Thread-safe TTL + LRU cache bounded by entry count and approximate memory size."""
+
+    def __init__(self, ttl=3600.0, max_entries=500, max_bytes=1_000_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value, size = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._bytes -= size
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        if not key or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (time.monotonic() + self.ttl, value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expired": self._expired,
+            }
@@ -0,0 +1,217 @@
+"""
+Benchmark: BotLogic hot paths against local stand-ins (no Telegram, Groq or Postgres needed).
+
+    python -m benchmarks.bench_bot_logic [--members 1000,10000,100000] [--output results.json]
+                                         [--baseline old.json --max-regression 1.25] [--database-url URL]
+
+Results are written as JSON (stdout or --output). With --baseline, each p50 is compared with the
+baseline run and the command exits non-zero when one is slower than --max-regression times; only
+compare runs from the same machine. Run from the repository root.
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fakes import ADMIN_USER_ID, build_bot_logic, make_message, seed_members
+
+# Pesan campuran untuk routing handle_all_text: obrolan biasa, intent, pertanyaan AI, spam
+GROUP_TRAFFIC = [
+    ("chatter_gm", "gm frens, chart looking based today 🐸"),
+    ("chatter_lfg", "LFG!!! ribbit ribbit"),
+    ("contract", "what is the contract address?"),
+    ("how_to_buy", "how to buy npepe?"),
+    ("identity", "are you a bot?"),
+    ("question", "when moon?"),
+    ("spam_keyword", "FREE AIRDROP for everyone, DM me"),
+    ("spam_link", "buy now at https://scam-airdrop.xyz/claim"),
+]
+LINK_ENTITY = [{"type": "url", "offset": 0, "length": 22}]
+
+
+def _percentile(sorted_samples, fraction):
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def measure(fn, iterations, warmup=None, repeats=3):
+    """
+    Times `iterations` calls of fn(i) per repeat and returns the percentiles (microseconds) of the
+    repeat with the lowest median; like timeit's min(), this filters out noise from background threads.
+    """
+    for i in range(warmup if warmup is not None else min(iterations, 100)):
+        fn(i)
+    clock = time.perf_counter_ns
+    best = None
+    for _ in range(repeats):
+        samples = []
+        for i in range(iterations):
+            started = clock()
+            fn(i)
+            samples.append(clock() - started)
+        samples.sort()
+        if best is None or _percentile(samples, 0.50) < _percentile(best, 0.50):
+            best = samples
+    total_s = sum(best) / 1e9
+    return {
+        "iterations": iterations,
+        "repeats": repeats,
+        "mean_us": round(statistics.fmean(best) / 1e3, 3),
+        "p50_us": round(_percentile(best, 0.50) / 1e3, 3),
+        "p95_us": round(_percentile(best, 0.95) / 1e3, 3),
+        "p99_us": round(_percentile(best, 0.99) / 1e3, 3),
+        "max_us": round(best[-1] / 1e3, 3),
+        "ops_per_s": round(iterations / total_s) if total_s else None,
+    }
+
+
+def bench_moderation(logic, iterations):
+    texts = [text for _, text in GROUP_TRAFFIC]
+    messages = [make_message(text) for text in texts]
+    linked = make_message("https://scam-airdrop.xyz is live", entities=LINK_ENTITY)
+    return {
+        "is_spam_or_ad": measure(lambda i: logic._is_spam_or_ad(messages[i % len(messages)]), iterations),
+        "is_link_present": measure(lambda i: logic._is_link_present(messages[i % len(messages)]), iterations),
+        "is_link_present_entity": measure(lambda i: logic._is_link_present(linked), iterations),
+    }
+
+
+def bench_routing(logic, iterations):
+    results = {}
+    for kind, text in GROUP_TRAFFIC:
+        # user_id berganti: pengecekan admin (cache) ikut diukur, bukan dilewati pemilik grup
+        message = make_message(text, user_id=5000 + len(results))
+        # Kirim dari benchmark sebelumnya tidak boleh berebut GIL dengan pengukuran berikutnya
+        drain(logic)
+        results[f"handle_all_text.{kind}"] = measure(lambda i: logic.handle_all_text(message), iterations)
+    private = make_message("how to buy npepe?", chat_id=777)
+    drain(logic)
+    results["handle_all_text.private_how_to_buy"] = measure(lambda i: logic.handle_all_text(private), iterations)
+    admin_spam = make_message("FREE AIRDROP for everyone", user_id=ADMIN_USER_ID)
+    drain(logic)
+    results["handle_all_text.admin_spam"] = measure(lambda i: logic.handle_all_text(admin_spam), iterations)
+    return results
+
+
+def bench_schedule_tick(logic, iterations):
+    # Semua jadwal sudah jalan untuk periode ini: tick normal yang tidak melakukan apa pun
+    now = logic._get_current_utc_time()
+    logic._schedule_log_cache = {
+        name: now.strftime('%Y-%m' if 'day_of_month' in spec else '%Y-W%U' if 'day_of_week' in spec else '%Y-%m-%d')
+        for name, spec in logic._get_schedules().items()
+    }
+    return {"check_and_run_schedules.idle_tick": measure(lambda i: logic.check_and_run_schedules(), iterations)}
+
+
+def bench_health_reminder(database_url, member_counts, iterations):
+    results = {}
+    for count in member_counts:
+        logic, fake_bot, _ = build_bot_logic(database_url)
+        try:
+            seed_members(logic, count)
+            rounds = max(5, min(iterations, 200_000 // max(count, 1)))
+            results[f"send_scheduled_health_reminder.{count}"] = dict(
+                measure(lambda i: logic.send_scheduled_health_reminder(), rounds, warmup=2, repeats=1),
+                members=count,
+            )
+        finally:
+            logic.shutdown()
+    return results
+
+
+def drain(logic, timeout=30.0):
+    """Waits until queued sends and AI answers are done, so side-effect counts are complete."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        outbound, ai = logic.outbound.stats(), logic.ai_executor.stats()
+        if not (outbound["queue_depth"] or outbound["in_flight"] or ai["queue_length"] or ai["active"]):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(member_counts=(1000, 10000, 100000), iterations=2000, database_url=None, groq_latency=0.3):
+    random.seed(1)
+    logic, fake_bot, fake_groq = build_bot_logic(database_url, groq_latency=groq_latency)
+    try:
+        results = {}
+        results.update(bench_moderation(logic, iterations))
+        results.update(bench_routing(logic, iterations))
+        results.update(bench_schedule_tick(logic, iterations))
+        drain(logic)
+        telegram_calls = fake_bot.call_counts()
+        groq_requests = fake_groq.requests
+    finally:
+        logic.shutdown()
+    results.update(bench_health_reminder(database_url, member_counts, iterations))
+    return {
+        "meta": {
+            "benchmark": "bot_logic",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "database": "postgres" if database_url else "none",
+            "groq_latency_s": groq_latency,
+        },
+        "results": results,
+        "side_effects": {"telegram_calls": telegram_calls, "groq_requests": groq_requests},
+    }
+
+
+def compare(report, baseline, max_regression):
+    """[(name, baseline_p50, p50, ratio)] for every benchmark slower than max_regression x baseline."""
+    regressions = []
+    for name, result in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("p50_us"):
+            continue
+        ratio = result["p50_us"] / old["p50_us"]
+        if ratio > max_regression:
+            regressions.append((name, old["p50_us"], result["p50_us"], round(ratio, 2)))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--members", default="1000,10000,100000", help="comma-separated member counts for the health reminder")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--database-url", default=None, help="local Postgres to use instead of running without persistence")
+    parser.add_argument("--groq-latency", type=float, default=0.3)
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="JSON report of a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=1.25)
+    args = parser.parse_args()
+
+    # Log BotLogic per pesan akan mendominasi waktu yang diukur
+    logging.disable(logging.CRITICAL)
+    report = run([int(n) for n in args.members.split(",") if n], args.iterations, args.database_url, args.groq_latency)
+    logging.disable(logging.NOTSET)
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for name, old, new, ratio in regressions:
+            print(f"regression: {name} p50 {old}us -> {new}us ({ratio}x)", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
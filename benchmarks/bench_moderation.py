@@ -0,0 +1,144 @@
+"""
+Microbenchmark: per-message moderation cost, original code vs ModerationEngine.
+
+"text" compares the original _is_spam_or_ad with ModerationEngine.check(). "message" compares what
+handle_all_text actually runs: the original _is_link_present-then-_is_spam_or_ad sequence against
+ModerationEngine.classify().
+
+    python -m benchmarks.bench_moderation [--iterations N]
+
+Stdlib only (does not need telebot/Postgres), run from the repository root.
+"""
+import argparse
+import re
+import timeit
+from types import SimpleNamespace
+
+from moderation import ModerationEngine
+
+FORBIDDEN_KEYWORDS = ['airdrop', 'giveaway', 'presale', 'private sale', 'whitelist', 'signal', 'pump group', 'trading signal', 'investment advice', 'other project']
+ALLOWED_DOMAINS = ['pump.fun', 't.me/NPEPEVERSE', 'x.com/NPEPE_Verse', 'base44.app']
+CONTRACT_ADDRESS = "BJ65ym9UYPkcfLSUuE9j4uXYuiG6TgA4pFn393Eppump"
+
+# Obrolan grup biasa (mayoritas trafik nyata) dan pesan yang seharusnya dihapus
+CLEAN_MESSAGES = [
+    "gm frens, how is everyone doing today?",
+    "when moon? chart looking based ngl",
+    "just bought more $NPEPE, diamond hands forever 💎🙌",
+    "what is the contract address?",
+    "LFG!!! ribbit ribbit 🐸🐸🐸",
+    "I've been holding since launch, not selling because this community is the best",
+    "anyone from the local meetup here? we should organize a raid on X later tonight",
+    f"CA is {CONTRACT_ADDRESS} buy on pump.fun",
+    "check https://pump.fun/" + CONTRACT_ADDRESS,
+    "join our t.me/NPEPEVERSE and follow https://x.com/NPEPE_Verse",
+]
+FLAGGED_MESSAGES = [
+    "FREE AIRDROP claim now at https://scam-airdrop.xyz/claim",
+    "Best trading signal group, DM me for presale whitelist",
+    "new gem 7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU sending hard",
+    "bridge here 0x71C7656EC7ab88b098defB751B7401B5f6d8976F",
+    "https://evil.com/?ref=pump.fun",
+]
+# Perbedaan verdict yang disengaja (bug di versi lama yang diperbaiki ModerationEngine)
+KNOWN_DIFFERENCES = {
+    "join our t.me/NPEPEVERSE and follow https://x.com/NPEPE_Verse": "legacy matched the bare 't.me' and deleted the official link",
+    "https://evil.com/?ref=pump.fun": "legacy allowed any URL merely containing an allowed domain",
+}
+MESSAGES = CLEAN_MESSAGES + FLAGGED_MESSAGES
+
+
+def legacy_is_spam_or_ad(text):
+    """Verbatim copy of the original BotLogic._is_spam_or_ad body, kept as the baseline."""
+    text_lower = text.lower()
+
+    for keyword in FORBIDDEN_KEYWORDS:
+        if keyword in text_lower:
+            return True, f"Forbidden Keyword: {keyword}"
+
+    if "http" in text_lower or "t.me" in text_lower:
+        urls = re.findall(r'(https?://[^\s]+)|([\w\.-]+(?:\.[\w\.-]+)+)', text)
+        urls_flat = [u[0] or u[1] for u in urls if u[0] or u[1]]
+        for url in urls_flat:
+            if not any(domain in url for domain in ALLOWED_DOMAINS):
+                return True, f"Unauthorized Link: {url}"
+
+    solana_pattern = r'\b[1-9A-HJ-NP-Za-km-z]{32,44}\b'
+    eth_pattern = r'\b0x[a-fA-F0-9]{40}\b'
+    if re.search(solana_pattern, text) and CONTRACT_ADDRESS not in text:
+        return True, "Potential Solana Contract Address"
+    if re.search(eth_pattern, text):
+        return True, "Potential EVM Contract Address"
+
+    return False, None
+
+
+def legacy_is_link_present(message):
+    """Verbatim copy of the original BotLogic._is_link_present body."""
+    if message.entities or message.caption_entities:
+        entities = message.entities if message.entities else message.caption_entities
+        for entity in entities:
+            if entity.type in ['url', 'text_link']:
+                return True, "URL or Text Link entity detected."
+
+    text_to_check = message.text or message.caption or ""
+    if re.search(r'https?:\/\/[^\s]+|www\.[^\s]+', text_to_check, re.IGNORECASE):
+        if legacy_is_spam_or_ad(text_to_check)[0]:
+            return True, "Raw link detected."
+
+    if message.forward_from_chat or message.forward_from:
+        if message.entities or message.caption_entities:
+            return True, "Forwarded message with potential link entities."
+
+    return False, None
+
+
+def legacy_moderate(message):
+    """The original handle_all_text moderation sequence: link check first, then the spam check."""
+    is_link, reason = legacy_is_link_present(message)
+    if is_link:
+        return True, reason
+    return legacy_is_spam_or_ad(message.text or message.caption or "")
+
+
+def as_message(text):
+    entities = None
+    if "http" in text:
+        entities = [SimpleNamespace(type="url")]
+    return SimpleNamespace(text=text, caption=None, entities=entities, caption_entities=None, forward_from_chat=None, forward_from=None)
+
+
+def per_message_ns(fn, messages, iterations):
+    total = min(timeit.repeat(lambda: [fn(m) for m in messages], number=iterations, repeat=5))
+    return round(total / (iterations * len(messages)) * 1e9)
+
+
+def run(iterations=500):
+    engine = ModerationEngine(FORBIDDEN_KEYWORDS, ALLOWED_DOMAINS, CONTRACT_ADDRESS)
+    results = {}
+    groups = (("clean", CLEAN_MESSAGES), ("flagged", FLAGGED_MESSAGES), ("all", MESSAGES))
+    for group, messages in groups:
+        legacy = per_message_ns(legacy_is_spam_or_ad, messages, iterations)
+        engine_ns = per_message_ns(engine.check, messages, iterations)
+        results[f"text/{group}"] = {"legacy_ns_per_message": legacy, "engine_ns_per_message": engine_ns, "speedup": round(legacy / engine_ns, 2)}
+    for group, messages in groups:
+        objects = [as_message(m) for m in messages]
+        legacy = per_message_ns(legacy_moderate, objects, iterations)
+        engine_ns = per_message_ns(engine.classify, objects, iterations)
+        results[f"message/{group}"] = {"legacy_ns_per_message": legacy, "engine_ns_per_message": engine_ns, "speedup": round(legacy / engine_ns, 2)}
+    results["unexpected_verdict_differences"] = [
+        m for m in MESSAGES if legacy_is_spam_or_ad(m)[0] != engine.check(m)[0] and m not in KNOWN_DIFFERENCES
+    ]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    results = run(args.iterations)
+    for group in [key for key in results if "/" in key]:
+        r = results[group]
+        print(f"{group:>16}: legacy {r['legacy_ns_per_message']:>6} ns/msg | engine {r['engine_ns_per_message']:>6} ns/msg | {r['speedup']}x")
+    for message in results["unexpected_verdict_differences"]:
+        print(f"unexpected verdict difference: {message!r}")
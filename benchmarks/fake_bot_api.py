@@ -0,0 +1,111 @@
+"""
+Local fake of the Telegram Bot API (ThreadingHTTPServer) for load tests.
+
+Point pyTelegramBotAPI at it with `apihelper.API_URL = server.api_url` before the bot makes its first
+call. Every method answers with a minimal valid result after `latency` seconds; `rate_limit_ratio`
+of the visible-message calls answer 429 with retry_after=1 to exercise the outbound dispatcher.
+"""
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+RATE_LIMITED_METHODS = frozenset({'sendMessage', 'editMessageText'})
+BOT_USER = {"id": 4242, "is_bot": True, "first_name": "NPEPE", "username": "npepe_bot"}
+
+
+class FakeBotApi:
+    def __init__(self, latency=0.02, rate_limit_ratio=0.0, admin_ids=(), host="127.0.0.1", port=0):
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.admin_ids = list(admin_ids)
+        self._message_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._rate_limited = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def api_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot{{0}}/{{1}}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-bot-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {"calls": dict(self._calls), "rate_limited": self._rate_limited}
+
+    def _result(self, method, params):
+        chat_id = int(params.get("chat_id", 0) or 0)
+        if method in ("sendMessage", "editMessageText"):
+            return {
+                "message_id": next(self._message_ids) if method == "sendMessage" else int(params.get("message_id", 0) or 0),
+                "date": int(time.time()), "text": params.get("text", ""), "from": BOT_USER,
+                "chat": {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private"},
+            }
+        if method == "getChatMember":
+            user_id = int(params.get("user_id", 0) or 0)
+            status = "administrator" if user_id in self.admin_ids else "member"
+            return {"status": status, "user": {"id": user_id, "is_bot": False, "first_name": "Fren"}}
+        if method == "getChatAdministrators":
+            return [{"status": "administrator", "user": {"id": user_id, "is_bot": False, "first_name": "Admin"}} for user_id in self.admin_ids]
+        if method == "getMe":
+            return BOT_USER
+        return True
+
+    def _respond(self, method, params):
+        with self._lock:
+            self._calls[method] = self._calls.get(method, 0) + 1
+            limited = method in RATE_LIMITED_METHODS and random.random() < self.rate_limit_ratio
+            if limited:
+                self._rate_limited += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if limited:
+            return 429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1", "parameters": {"retry_after": 1}}
+        return 200, {"ok": True, "result": self._result(method, params)}
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive seperti api.telegram.org
+
+            def _handle(self):
+                url = urlsplit(self.path)
+                method = url.path.rsplit("/", 1)[-1]
+                params = dict(parse_qsl(url.query))
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    body = self.rfile.read(length).decode("utf-8", "replace")
+                    if self.headers.get("Content-Type", "").startswith("application/json"):
+                        params.update(json.loads(body or "{}"))
+                    else:
+                        params.update(parse_qsl(body))
+                status, payload = api._respond(method, params)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,184 @@
+"""
+Local stand-ins for the external services BotLogic talks to, used by the benchmarks.
+
+    FakeTeleBot   records every Bot API call and answers instantly with realistic objects
+    FakeGroq      chat.completions.create with configurable latency (plain and stream=True)
+    build_bot_logic()  configures the environment and builds a BotLogic on top of both
+
+Without a database URL BotLogic runs with persistence disabled (in-memory member store, built-in
+responses); pass a local Postgres URL to include the DB helpers.
+"""
+import itertools
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from telebot import types
+
+GROUP_CHAT_ID = -1001000000001
+ADMIN_USER_ID = 1
+
+
+class FakeTeleBot:
+    """Records Bot API calls as (method, args, kwargs); handler decorators are accepted and ignored."""
+
+    def __init__(self, member_status="member", admin_ids=(ADMIN_USER_ID,)):
+        self.member_status = member_status
+        self.admin_ids = tuple(admin_ids)
+        self.calls = []
+        self._message_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _record(self, method, args, kwargs):
+        with self._lock:
+            self.calls.append((method, args, kwargs))
+
+    def call_counts(self):
+        with self._lock:
+            counts = {}
+            for method, _, _ in self.calls:
+                counts[method] = counts.get(method, 0) + 1
+            return counts
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    def _message(self, chat_id, text):
+        return types.Message.de_json({
+            "message_id": next(self._message_ids), "date": int(time.time()), "text": text,
+            "chat": {"id": int(chat_id), "type": "supergroup" if int(chat_id) < 0 else "private"},
+            "from": {"id": 42, "is_bot": True, "first_name": "NPEPE"},
+        })
+
+    def send_message(self, chat_id, text, **kwargs):
+        self._record("send_message", (chat_id, text), kwargs)
+        return self._message(chat_id, text)
+
+    def reply_to(self, message, text, **kwargs):
+        self._record("reply_to", (message.chat.id, text), kwargs)
+        return self._message(message.chat.id, text)
+
+    def edit_message_text(self, text, chat_id=None, message_id=None, **kwargs):
+        self._record("edit_message_text", (chat_id, message_id, text), kwargs)
+        return True
+
+    def delete_message(self, chat_id, message_id, **kwargs):
+        self._record("delete_message", (chat_id, message_id), kwargs)
+        return True
+
+    def answer_callback_query(self, callback_query_id, **kwargs):
+        self._record("answer_callback_query", (callback_query_id,), kwargs)
+        return True
+
+    def get_chat_member(self, chat_id, user_id):
+        self._record("get_chat_member", (chat_id, user_id), {})
+        status = "administrator" if user_id in self.admin_ids else self.member_status
+        return SimpleNamespace(status=status, user=SimpleNamespace(id=user_id))
+
+    def get_chat_administrators(self, chat_id):
+        self._record("get_chat_administrators", (chat_id,), {})
+        return [SimpleNamespace(status="administrator", user=SimpleNamespace(id=user_id)) for user_id in self.admin_ids]
+
+    def __getattr__(self, name):
+        # message_handler, callback_query_handler, ...: decorator yang tidak mendaftarkan apa pun
+        if name.endswith("_handler"):
+            return lambda *args, **kwargs: (lambda fn: fn)
+        raise AttributeError(name)
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, messages=None, model=None, stream=False, **kwargs):
+        owner = self._owner
+        with owner._lock:
+            owner.requests += 1
+        text = owner.reply
+        usage = SimpleNamespace(prompt_tokens=sum(len(m["content"].split()) for m in messages or ()), completion_tokens=len(text.split()))
+        if stream:
+            return self._stream(text, usage)
+        time.sleep(owner.latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+
+    def _stream(self, text, usage):
+        owner = self._owner
+        time.sleep(owner.first_token_latency)
+        words = text.split(" ")
+        delay = max(0.0, owner.latency - owner.first_token_latency) / max(1, len(words))
+        for word in words:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))], x_groq=None)
+            time.sleep(delay)
+        yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage))
+
+
+class FakeGroq:
+    """Groq client stand-in: every completion takes `latency` seconds (first streamed token after `first_token_latency`)."""
+
+    def __init__(self, latency=0.3, first_token_latency=0.05, reply="Ribbit fren! HODL tight, the frog says WAGMI. LFG! 🐸"):
+        self.latency = latency
+        self.first_token_latency = first_token_latency
+        self.reply = reply
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+
+def _set_env(database_url):
+    # Config dibaca dari environment saat dipanggil: set sebelum BotLogic dibuat
+    os.environ.update({
+        "BOT_TOKEN": os.environ.get("BOT_TOKEN", "123456:benchmark"),
+        "DATABASE_URL": database_url or "",
+        "GROQ_API_KEY": "",
+        "GROUP_CHAT_ID": str(GROUP_CHAT_ID),
+        "SCHEDULER_ENABLED": "false",
+        "MEMBER_FLUSH_INTERVAL": "3600",
+        "RESPONSE_REFRESH_INTERVAL": "3600",
+        # Dispatcher tidak boleh menjadi bottleneck: yang diukur adalah BotLogic, bukan limit Telegram
+        "OUTBOUND_GLOBAL_RATE": "1000000",
+        "OUTBOUND_GROUP_RATE_PER_MINUTE": "60000000",
+        "OUTBOUND_CHAT_RATE": "1000000",
+        "OUTBOUND_CHAT_BURST": "1000000",
+        "OUTBOUND_QUEUE_SIZE": "1000000",
+        "AI_QUEUE_SIZE": "100000",
+    })
+
+
+def build_bot_logic(database_url=None, groq_latency=0.3, bot=None):
+    """BotLogic wired to FakeTeleBot and FakeGroq. Returns (bot_logic, fake_bot, fake_groq)."""
+    _set_env(database_url)
+    from bot_logic import BotLogic
+
+    fake_bot = bot or FakeTeleBot()
+    logic = BotLogic(fake_bot)
+    fake_groq = FakeGroq(latency=groq_latency)
+    logic.groq_client = fake_groq
+    return logic, fake_bot, fake_groq
+
+
+def seed_members(logic, count, unknown_status_ratio=0.1):
+    """Adds `count` members to the member store (a share with unknown status, as after a fresh import)."""
+    unknown_every = int(1 / unknown_status_ratio) if unknown_status_ratio else 0
+    logic.member_store.update_many(
+        {
+            'user_id': 10_000_000 + i,
+            'username': f"fren{i}",
+            'status': None if unknown_every and i % unknown_every == 0 else 'member',
+        }
+        for i in range(count)
+    )
+    if logic.db_pool:
+        logic.member_store.flush()
+
+
+def make_message(text, chat_id=GROUP_CHAT_ID, user_id=777, **extra):
+    """telebot Message built from a Bot API payload, like the webhook does."""
+    payload = {
+        "message_id": 1, "date": int(time.time()), "text": text,
+        "chat": {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private"},
+        "from": {"id": user_id, "is_bot": False, "first_name": "Fren", "username": "fren"},
+    }
+    payload.update(extra)
+    return types.Message.de_json(payload)
@@ -0,0 +1,236 @@
+"""
+Load test: replay recorded or synthetic updates through the real webhook() route under waitress.
+
+    python -m benchmarks.replay_webhook --scenario mixed --count 5000 --rate 200 --concurrency 16
+    python -m benchmarks.replay_webhook --log updates.jsonl.gz --speed 10 --output replay.json
+
+The bot talks to a local fake Bot API server and a fake Groq client; Postgres is used only when
+--database-url (or DATABASE_URL) is given. Updates are sent open-loop at --rate per second (or at the
+recorded pace times --speed when replaying a log without --rate). By default the outbound dispatcher's
+Telegram rate limits are lifted so the bot's own capacity is measured; --telegram-limits real keeps
+them and reports the resulting outbound backlog instead of waiting for it. The JSON report covers HTTP
+throughput, latency percentiles (service time and time since the scheduled send), status and error
+counts, plus how long the bot needed to finish processing and what it sent to Telegram.
+Run from the repository root.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+from benchmarks.fake_bot_api import FakeBotApi
+from benchmarks.fakes import ADMIN_USER_ID, GROUP_CHAT_ID, FakeGroq
+from benchmarks.synthetic_updates import SCENARIOS, generate
+
+BOT_TOKEN = "123456:replay"
+SECRET_TOKEN = "replay-secret"
+# Port yang pasti menolak koneksi: persistence mati dengan cepat bila tidak ada Postgres lokal
+UNREACHABLE_DATABASE_URL = "postgresql://replay@127.0.0.1:9/replay?connect_timeout=1"
+
+
+def _percentiles(samples_ms):
+    if not samples_ms:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(samples_ms)
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))], 2)
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(ordered[-1], 2)}
+
+
+def load_updates(args):
+    """[(offset_seconds, update_dict)] with fresh, increasing update_ids."""
+    if args.log:
+        from update_recorder import read_update_log
+        records = list(itertools.islice(read_update_log(args.log), args.count or None))
+        first = records[0][0] if records else 0.0
+        timed = [((t - first) / args.speed, update) for t, update in records]
+    else:
+        timed = [(0.0, update) for update in generate(args.scenario, GROUP_CHAT_ID, args.count)]
+    if args.rate:
+        timed = [(i / args.rate, update) for i, (_, update) in enumerate(timed)]
+    for update_id, (_, update) in enumerate(timed, start=1):
+        update["update_id"] = update_id
+    return timed
+
+
+def start_app(args, api):
+    """Configures the environment, imports main (bot + Flask app) and serves it with waitress."""
+    os.environ.update({
+        "BOT_TOKEN": BOT_TOKEN,
+        "WEBHOOK_BASE_URL": "http://127.0.0.1",
+        "WEBHOOK_SECRET_TOKEN": SECRET_TOKEN,
+        "DATABASE_URL": args.database_url or UNREACHABLE_DATABASE_URL,
+        "GROUP_CHAT_ID": str(GROUP_CHAT_ID),
+        "GROQ_API_KEY": "",
+        "SCHEDULER_ENABLED": "false",
+        "UPDATE_RECORDER_ENABLED": "false",
+        "WEBHOOK_ASYNC": "false" if args.sync else "true",
+    })
+    if args.telegram_limits == "off":
+        os.environ.update({
+            "OUTBOUND_GLOBAL_RATE": "1000000",
+            "OUTBOUND_GROUP_RATE_PER_MINUTE": "60000000",
+            "OUTBOUND_CHAT_RATE": "1000000",
+            "OUTBOUND_CHAT_BURST": "1000000",
+        })
+    from telebot import apihelper
+    apihelper.API_URL = api.api_url
+    import main
+    from waitress.server import create_server
+
+    if not main.Bot_logic:
+        raise SystemExit("Bot failed to initialize; see the log above.")
+    main.Bot_logic.groq_client = FakeGroq(latency=args.groq_latency)
+    if not args.database_url and main.Bot_logic.db_pool:
+        # main.py mensyaratkan DATABASE_URL; tanpa Postgres lokal jalankan seperti persistence mati
+        main.Bot_logic.db_pool.closeall()
+        main.Bot_logic.db_pool = None
+    server = create_server(main.App, host="127.0.0.1", port=0, threads=args.threads)
+    threading.Thread(target=server.run, name="waitress", daemon=True).start()
+    return main, server, f"http://127.0.0.1:{server.effective_port}/{BOT_TOKEN}"
+
+
+def send_all(url, timed_updates, concurrency):
+    """Open-loop sender; returns per-request samples (service_ms, since_schedule_ms, status or error)."""
+    local = threading.local()
+    headers = {"Content-Type": "application/json", "X-Telegram-Bot-Api-Secret-Token": SECRET_TOKEN}
+    counter = itertools.count()
+    samples = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def worker():
+        session = getattr(local, "session", None) or requests.Session()
+        local.session = session
+        own = []
+        while True:
+            index = next(counter)
+            if index >= len(timed_updates):
+                break
+            offset, update = timed_updates[index]
+            scheduled = started + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sent = time.perf_counter()
+            try:
+                status = session.post(url, data=json.dumps(update), headers=headers, timeout=30).status_code
+            except requests.RequestException as e:
+                status = type(e).__name__
+            done = time.perf_counter()
+            own.append(((done - sent) * 1000, (done - max(scheduled, started)) * 1000, status))
+        with lock:
+            samples.extend(own)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="replay") as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    return samples, time.perf_counter() - started
+
+
+def wait_for_processing(main, timeout, include_outbound=True):
+    """
+    Seconds until queued updates (and, unless include_outbound is False, outbound sends and AI answers)
+    are all done; None on timeout.
+    """
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        pool = main.Update_pool.stats() if main.Update_pool else None
+        busy = pool and (pool["queue_depth"] or pool["processed"] < pool["submitted"])
+        if include_outbound and not busy:
+            # Jawaban AI menunggu placeholder terkirim, jadi keduanya ikut ditunggu bersama
+            outbound = main.Bot_logic.outbound.stats()
+            ai = main.Bot_logic.ai_executor.stats()
+            busy = outbound["queue_depth"] or outbound["in_flight"] or ai["queue_length"] or ai["active"]
+        if not busy:
+            return round(time.perf_counter() - started, 3)
+        time.sleep(0.05)
+    return None
+
+
+def run(args):
+    api = FakeBotApi(latency=args.api_latency, rate_limit_ratio=args.api_429_ratio, admin_ids=(ADMIN_USER_ID,)).start()
+    main, server, url = start_app(args, api)
+    try:
+        timed_updates = load_updates(args)
+        samples, elapsed = send_all(url, timed_updates, args.concurrency)
+        drain_s = wait_for_processing(main, args.drain_timeout, include_outbound=args.telegram_limits == "off")
+        statuses = {}
+        for _, _, status in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(count for status, count in statuses.items() if status != "200")
+        return {
+            "meta": {
+                "benchmark": "replay_webhook",
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "source": args.log or args.scenario,
+                "updates": len(timed_updates),
+                "target_rate": args.rate or None,
+                "concurrency": args.concurrency,
+                "waitress_threads": args.threads,
+                "webhook_mode": "sync" if args.sync else "async",
+                "telegram_limits": args.telegram_limits,
+                "api_latency_s": args.api_latency,
+                "api_429_ratio": args.api_429_ratio,
+                "groq_latency_s": args.groq_latency,
+                "database": "postgres" if args.database_url else "none",
+            },
+            "http": {
+                "duration_s": round(elapsed, 3),
+                "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else None,
+                "statuses": statuses,
+                "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+                "latency": _percentiles([service for service, _, _ in samples]),
+                "latency_since_schedule": _percentiles([since for _, since, _ in samples]),
+            },
+            "processing": {
+                "drain_s": drain_s,
+                "update_pool": main.Update_pool.stats() if main.Update_pool else None,
+                "outbound": main.Bot_logic.outbound.stats(),
+                "ai_executor": main.Bot_logic.ai_executor.stats(),
+            },
+            "bot_api": api.stats(),
+        }
+    finally:
+        server.close()
+        main.Bot_logic.shutdown()
+        api.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--log", help="recorded update log (UPDATE_RECORDER_PATH) to replay")
+    source.add_argument("--scenario", choices=SCENARIOS, default="mixed", help="synthetic traffic to generate")
+    parser.add_argument("--count", type=int, default=2000, help="number of updates (0 = whole log)")
+    parser.add_argument("--rate", type=float, default=0.0, help="updates per second (0 = as fast as possible, or recorded pace for --log)")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression for recorded pace")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent HTTP clients")
+    parser.add_argument("--threads", type=int, default=8, help="waitress worker threads")
+    parser.add_argument("--sync", action="store_true", help="process updates inside the request (WEBHOOK_ASYNC=false)")
+    parser.add_argument("--telegram-limits", choices=("off", "real"), default="off", help="keep the outbound dispatcher's Telegram rate limits")
+    parser.add_argument("--api-latency", type=float, default=0.02, help="fake Bot API latency in seconds")
+    parser.add_argument("--api-429-ratio", type=float, default=0.0, help="share of sendMessage/editMessageText answered with 429")
+    parser.add_argument("--groq-latency", type=float, default=0.3)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    # Log per update dari bot akan mendominasi; hanya error yang ditampilkan
+    logging.disable(logging.WARNING)
+    report = run(args)
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
@@ -0,0 +1,98 @@
+"""
+Synthetic Telegram updates (Bot API JSON) for load tests: normal chatter, raids, join waves and
+question floods in one supergroup. Every generator yields update dicts without update_id; the
+replay tool numbers them.
+"""
+import itertools
+import random
+import time
+
+from benchmarks.bench_moderation import CLEAN_MESSAGES, FLAGGED_MESSAGES
+
+QUESTIONS = [
+    "when moon?", "what is npepe?", "how do I stake?", "is the liquidity locked?",
+    "who is the dev?", "why is the chart red today?", "can I buy on phantom?", "what is the roadmap?",
+]
+SCENARIOS = ("chatter", "raid", "join_wave", "question_flood", "mixed")
+
+
+def _user(user_id):
+    return {"id": user_id, "is_bot": False, "first_name": f"Fren{user_id % 1000}", "username": f"fren_{user_id}"}
+
+
+def _message(chat_id, user_id, text, message_ids, **extra):
+    message = {
+        "message_id": next(message_ids), "date": int(time.time()), "text": text,
+        "chat": {"id": chat_id, "type": "supergroup", "title": "NPEPE"},
+        "from": _user(user_id),
+    }
+    message.update(extra)
+    return {"message": message}
+
+
+def chatter(chat_id, count, users=500, seed=1):
+    """Regular group conversation from a stable set of members."""
+    rng = random.Random(seed)
+    message_ids = itertools.count(1)
+    for _ in range(count):
+        yield _message(chat_id, 1000 + rng.randrange(users), rng.choice(CLEAN_MESSAGES), message_ids)
+
+
+def raid(chat_id, count, raiders=50, seed=2):
+    """Spam raid: a few fresh accounts posting links/keywords as fast as they can."""
+    rng = random.Random(seed)
+    message_ids = itertools.count(100_000)
+    for _ in range(count):
+        text = rng.choice(FLAGGED_MESSAGES)
+        extra = {}
+        if text.startswith("http") or " http" in text:
+            start = text.find("http")
+            extra["entities"] = [{"type": "url", "offset": start, "length": len(text[start:].split()[0])}]
+        yield _message(chat_id, 900_000 + rng.randrange(raiders), text, message_ids, **extra)
+
+
+def join_wave(chat_id, count, seed=3):
+    """Burst of joins: the service message plus the chat_member update Telegram sends for each."""
+    rng = random.Random(seed)
+    message_ids = itertools.count(200_000)
+    for i in range(count):
+        user = _user(2_000_000 + i)
+        yield {"message": {
+            "message_id": next(message_ids), "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "supergroup", "title": "NPEPE"},
+            "from": user, "new_chat_members": [user], "new_chat_member": user, "new_chat_participant": user,
+        }}
+        if rng.random() < 0.9:
+            yield {"chat_member": {
+                "chat": {"id": chat_id, "type": "supergroup", "title": "NPEPE"}, "from": user, "date": int(time.time()),
+                "old_chat_member": {"status": "left", "user": user},
+                "new_chat_member": {"status": "member", "user": user},
+            }}
+
+
+def question_flood(chat_id, count, users=200, seed=4):
+    """Many members asking the bot the same handful of questions (AI path and answer cache)."""
+    rng = random.Random(seed)
+    message_ids = itertools.count(300_000)
+    for _ in range(count):
+        yield _message(chat_id, 3000 + rng.randrange(users), rng.choice(QUESTIONS), message_ids)
+
+
+def mixed(chat_id, count, seed=5):
+    """Chatter with a raid, a join wave and a question flood interleaved."""
+    rng = random.Random(seed)
+    streams = [
+        (0.6, chatter(chat_id, count, seed=seed)),
+        (0.15, raid(chat_id, count, seed=seed + 1)),
+        (0.1, join_wave(chat_id, count, seed=seed + 2)),
+        (0.15, question_flood(chat_id, count, seed=seed + 3)),
+    ]
+    weights = [weight for weight, _ in streams]
+    for _ in range(count):
+        yield next(rng.choices(streams, weights)[0][1])
+
+
+def generate(scenario, chat_id, count):
+    """Exactly `count` updates of the given scenario."""
+    generators = {"chatter": chatter, "raid": raid, "join_wave": join_wave, "question_flood": question_flood, "mixed": mixed}
+    return itertools.islice(generators[scenario](chat_id, count), count)
@@ -5,14 +5,20 @@ import time
 import json
 import re
 from datetime import datetime, timezone, timedelta
+from calendar import monthrange
 import threading
+import atexit
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # --- Third-Party Libraries ---
 try:
     import psycopg2
+    from psycopg2.extras import execute_values
     logging.info("DIAGNOSTIC: 'psycopg2' library SUCCESSFULLY imported.")
 except ImportError as e:
     psycopg2 = None
+    execute_values = None
     logging.critical(f"DIAGNOSTIC: CRITICAL - FAILED to import 'psycopg2'. Persistence will be disabled. Error: {e}")
 try:
     import groq
@@ -23,6 +29,20 @@ except ImportError:
 import telebot
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import Config
+from db_pool import ConnectionPool
+from migrations import migrate
+from member_store import ACTIVE_MEMBER_STATUSES, INACTIVE_MEMBER_STATUSES, MemberStore
+from scheduler import TaskScheduler
+from greeting_queue import DelayedGreetingQueue, PendingGreeting
+from workers import BoundedExecutor, REJECTED
+from answer_cache import AnswerCache, normalize_question
+from http_clients import GroqHttpClient
+from response_corpus import ResponseCorpus
+from outbound import LOW, OutboundDispatcher
+from admin_cache import ADMIN_STATUSES, AdminCache
+from intents import IntentRouter
+from metrics import DB_HELPER_LATENCY, GROQ_FIRST_TOKEN, GROQ_LATENCY, HANDLER_LATENCY, MODERATION_VERDICTS, record_groq_usage, timed
+from moderation import ModerationEngine, REASON_FORWARDED_LINK, REASON_LINK_ENTITY, REASON_RAW_LINK
 
 # ==========================
 #   🔧   LOGGING CONFIGURATION
@@ -33,6 +53,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Kolom members yang bisa di-update sebagian lewat _upsert_members
+MEMBER_FIELDS = ('username', 'joined_date', 'last_interacted_date', 'last_thanked_month', 'status')
+# Jumlah baris per statement INSERT ... VALUES pada upsert batch
+UPSERT_PAGE_SIZE = 1000
+# Batas kandidat (x jumlah yang dibutuhkan) yang boleh dicek ke Telegram per pemilihan member acak
+MEMBER_VERIFY_FACTOR = 4
+# Placeholder wajib per kategori hasil pembaruan AI, dan nilai contoh untuk uji .format()
+RENEWAL_PLACEHOLDERS = {
+    "GREET_NEW_MEMBERS_DELAYED": ('name',),
+    "DAILY_GREETING": ('mention',),
+    "MEMBERSHIP_ANNIVERSARY": ('mention', 'months'),
+    "BIRTHDAY_GREETING": ('name',),
+    "HEALTH_REMINDER": ('tags',),
+}
+RENEWAL_SAMPLE_VALUES = {'name': 'Fren', 'mention': '@fren', 'months': 3, 'tags': '@a @b'}
+# Kunci pg_advisory_xact_lock (kelas) untuk penomoran versi response_corpus per kategori
+RESPONSE_CORPUS_LOCK_ID = 0x72657370  # "resp"
+# Alasan verdict yang berasal dari pemeriksaan link (dipakai _is_link_present)
+LINK_REASONS = (REASON_LINK_ENTITY, REASON_RAW_LINK, REASON_FORWARDED_LINK)
+
+def mention_name(user):
+    """first_name escaped for parse_mode="Markdown" links; this is what members.username stores."""
+    return (user.first_name or "fren").replace('_', '\\_').replace('*', '\\*').replace('[', '\\[').replace('`', '\\`')
+
+def anniversary_days(today):
+    """Join days celebrated today: on the last day of a month, also every later day (31 Jan -> 28 Feb)."""
+    if today.day == monthrange(today.year, today.month)[1]:
+        return list(range(today.day, 32))
+    return [today.day]
+
 # ==========================
 #   🤖   KELAS LOGIKA BOT
 # ==========================
@@ -44,156 +94,463 @@ class BotLogic:
         if not Config.DATABASE_URL() or not psycopg2:
             logger.critical("FATAL: DATABASE_URL not found or psycopg2 is unavailable. Persistence will not function.")
             
+        # Semua pengiriman ke Telegram lewat dispatcher (token bucket per chat + global, retry_after)
+        self.outbound = OutboundDispatcher(
+            self.bot, global_rate=Config.OUTBOUND_GLOBAL_RATE(), chat_rate=Config.OUTBOUND_CHAT_RATE(),
+            group_rate_per_minute=Config.OUTBOUND_GROUP_RATE_PER_MINUTE(), chat_burst=Config.OUTBOUND_CHAT_BURST(),
+            workers=Config.OUTBOUND_WORKERS(), max_queue=Config.OUTBOUND_QUEUE_SIZE(), max_retries=Config.OUTBOUND_MAX_RETRIES()
+        )
+        self.db_pool = self._initialize_db_pool()
+        self.groq_http = None
         self.groq_client = self._initialize_groq()
+        self.answer_cache = AnswerCache(ttl=Config.AI_CACHE_TTL(), max_entries=Config.AI_CACHE_MAX_ENTRIES(), max_bytes=Config.AI_CACHE_MAX_BYTES())
+        self.ai_executor = BoundedExecutor(max_workers=Config.AI_WORKERS(), max_queue=Config.AI_QUEUE_SIZE(), name="ai-answer")
         
-        # Inisialisasi state untuk fitur baru
-        self._ensure_db_table_exists() # schedule_log
-        self._ensure_db_member_table_exists() # members
+        # Skema database (schedule_log, members, pending_greetings) lewat migrasi berversi
+        self._run_migrations()
         
-        self.responses = self._load_initial_responses() # Memuat semua kategori respons baru
-        self.admin_ids = set()
-        self.admins_last_updated = 0
+        # Member store in-memory (write-behind), dimuat sekali saat startup
+        self.member_store = MemberStore(self._get_all_active_members, self._upsert_members, flush_interval=Config.MEMBER_FLUSH_INTERVAL())
+        self.member_store.load()
+        self.member_store.start()
+        
+        # Korpus respons berversi di DB (default bawaan = versi 0), dimuat sekali di sini; handler tidak pernah membaca DB
+        self.responses = ResponseCorpus(
+            self._load_initial_responses(), load_all=self._load_response_corpus,
+            load_latest=self._load_response_category, load_versions=self._load_response_versions,
+            save=self._save_response_category, refresh_interval=Config.RESPONSE_REFRESH_INTERVAL()
+        )
+        self.responses.load()
+        self.responses.start()
+        self.last_renewal = None
+        # Admin per chat, di-refresh di background; lookup tidak pernah memanggil Telegram
+        self.admin_cache = AdminCache(self._fetch_admin_ids, ttl=Config.ADMIN_CACHE_TTL(), refresh_ahead=Config.ADMIN_CACHE_REFRESH_AHEAD())
+        if Config.GROUP_CHAT_ID():
+            try:
+                self.admin_cache.warm(int(Config.GROUP_CHAT_ID()))
+            except ValueError:
+                logger.warning(f"GROUP_CHAT_ID is not a numeric chat id: {Config.GROUP_CHAT_ID()}")
+        self._schedule_log_cache = None # {task_name: last_run_date}, lihat _load_schedule_log
+        self._schedule_log_lock = threading.Lock()
+        self._schedule_tick_lock = threading.Lock()
         
         # Konstanta yang dipertahankan untuk moderasi
         self.FORBIDDEN_KEYWORDS = ['airdrop', 'giveaway', 'presale', 'private sale', 'whitelist', 'signal', 'pump group', 'trading signal', 'investment advice', 'other project']
         self.ALLOWED_DOMAINS = ['pump.fun', 't.me/NPEPEVERSE', 'x.com/NPEPE_Verse', 'base44.app']
+        self.moderation = ModerationEngine(self.FORBIDDEN_KEYWORDS, self.ALLOWED_DOMAINS, Config.CONTRACT_ADDRESS())
+        
+        # Satu antrian untuk semua sapaan tertunda (menggantikan satu threading.Timer per member)
+        self.greeting_queue = DelayedGreetingQueue(
+            self._send_delayed_greetings,
+            persist=self._save_pending_greetings, remove=self._delete_pending_greetings, load=self._load_pending_greetings,
+            delay=Config.GREETING_DELAY(), coalesce_window=Config.GREETING_COALESCE_WINDOW(), max_batch=Config.GREETING_BATCH_MAX_NAMES()
+        )
+        self.greeting_queue.start()
         
+        self.intents = self._build_intent_router()
         self._register_handlers()
+        
+        # Scheduler in-process: tugas terjadwal tidak lagi bergantung pada ping /health
+        self.scheduler = None
+        if Config.SCHEDULER_ENABLED():
+            self.scheduler = TaskScheduler(
+                self._get_schedules(), self._load_schedule_log, self._claim_schedule_run,
+                lambda name, marker: self._update_last_run_dates({name: marker}),
+                max_workers=Config.SCHEDULER_WORKERS()
+            )
+            self.scheduler.start()
+        
+        atexit.register(self.shutdown)
         logger.info("BotLogic successfully initialized.")
+
+    def shutdown(self):
+        """Stops background workers and persists pending state. Safe to call more than once."""
+        if getattr(self, '_shut_down', False): return
+        self._shut_down = True
+        logger.info("Shutting down BotLogic background services...")
+        if self.scheduler:
+            self.scheduler.stop(wait=False)
+        self.greeting_queue.stop()
+        self.ai_executor.stop()
+        self.admin_cache.stop()
+        self.outbound.stop()
+        self.responses.stop()
+        self.member_store.stop()
+        if self.groq_http:
+            self.groq_http.close()
+        if self.db_pool:
+            self.db_pool.closeall()
         
     # --- UTILITY DATABASE & PERSISTENSI ---
     
-    def _get_db_connection(self):
+    def _initialize_db_pool(self):
         db_url = Config.DATABASE_URL()
         if not db_url or not psycopg2:
             logger.warning("DATABASE_URL is not set or psycopg2 is not installed. Persistence disabled.")
             return None
         try:
-            return psycopg2.connect(db_url)
+            pool = ConnectionPool(
+                lambda: psycopg2.connect(db_url, keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3),
+                min_size=Config.DB_POOL_MIN_SIZE(),
+                max_size=Config.DB_POOL_MAX_SIZE(),
+                checkout_timeout=Config.DB_POOL_TIMEOUT(),
+                health_check_interval=Config.DB_POOL_HEALTH_CHECK_INTERVAL()
+            )
+            logger.info(f"DB connection pool ready (min={pool.min_size}, max={pool.max_size}).")
+            return pool
         except Exception as e:
-            logger.error(f"DB connection failed: {e}")
+            logger.error(f"Failed to create DB connection pool: {e}")
             return None
-            
-    def _ensure_db_table_exists(self): 
-        conn = self._get_db_connection()
-        if conn:
+
+    @contextmanager
+    def _db_connection(self, helper):
+        """
+        Meminjam koneksi dari pool (None jika persistence mati) dan selalu mengembalikannya.
+        `helper` menjadi label DB_HELPER_LATENCY: waktu koneksi dipinjam, termasuk checkout dari pool.
+        """
+        conn = None
+        started = time.perf_counter()
+        if self.db_pool:
+            try:
+                conn = self.db_pool.getconn()
+            except Exception as e:
+                logger.error(f"DB connection failed: {e}")
+        try:
+            yield conn
+        finally:
+            if conn is not None:
+                self.db_pool.putconn(conn)
+                DB_HELPER_LATENCY.observe(time.perf_counter() - started, helper)
+
+    def get_runtime_stats(self):
+        """Snapshot of internal counters, served by the /stats endpoint."""
+        return {
+            "db_pool": self.db_pool.stats() if self.db_pool else None,
+            "member_store": self.member_store.stats(),
+            "scheduler": self.scheduler.stats() if self.scheduler else None,
+            "greeting_queue": self.greeting_queue.stats(),
+            "ai_executor": self.ai_executor.stats(),
+            "answer_cache": self.answer_cache.stats(),
+            "intents": self.intents.stats(),
+            "admin_cache": self.admin_cache.stats(),
+            "outbound": self.outbound.stats(),
+            "groq_http": self.groq_http.stats() if self.groq_http else None,
+            "responses": self.responses.stats(),
+            "ai_renewal": self.last_renewal,
+        }
+
+    def _run_migrations(self):
+        with self._db_connection("_run_migrations") as conn:
+            if not conn: return
+            try:
+                before, after = migrate(conn)
+                if before == after:
+                    logger.info(f"Database schema is up to date (version {after}).")
+                else:
+                    logger.info(f"Database schema migrated from version {before} to {after}.")
+            except Exception as e:
+                logger.error(f"Database migration failed: {e}", exc_info=True)
+
+    def _save_pending_greetings(self, greetings):
+        with self._db_connection("_save_pending_greetings") as conn:
+            if not conn: return
             try:
                 with conn.cursor() as cursor:
-                    cursor.execute("CREATE TABLE IF NOT EXISTS schedule_log (task_name TEXT PRIMARY KEY, last_run_date TEXT)")
+                    rows = [(g.chat_id, g.user_id, g.first_name, datetime.fromtimestamp(g.due_at, timezone.utc)) for g in greetings]
+                    execute_values(cursor, """
+                        INSERT INTO pending_greetings (chat_id, user_id, first_name, due_at) VALUES %s
+                        ON CONFLICT (chat_id, user_id) DO UPDATE SET first_name = EXCLUDED.first_name, due_at = EXCLUDED.due_at
+                    """, rows)
                 conn.commit()
-                logger.info("Database table 'schedule_log' is ready.")
             except Exception as e:
-                logger.error(f"Failed to create schedule table: {e}")
-            finally:
-                conn.close()
-    
-    def _ensure_db_member_table_exists(self):
-        conn = self._get_db_connection()
-        if conn:
+                logger.error(f"Failed to save pending greetings: {e}")
+                try: conn.rollback()
+                except: pass
+
+    def _delete_pending_greetings(self, greetings):
+        with self._db_connection("_delete_pending_greetings") as conn:
+            if not conn: return
             try:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        CREATE TABLE IF NOT EXISTS members (
-                            user_id BIGINT PRIMARY KEY, 
-                            username TEXT, 
-                            joined_date TEXT, 
-                            last_interacted_date TEXT, 
-                            last_thanked_month INTEGER DEFAULT 0
-                        )
-                    """)
+                    execute_values(cursor, """
+                        DELETE FROM pending_greetings p USING (VALUES %s) AS d (chat_id, user_id)
+                        WHERE p.chat_id = d.chat_id AND p.user_id = d.user_id
+                    """, {(g.chat_id, g.user_id) for g in greetings})
                 conn.commit()
-                logger.info("Database table 'members' is ready.")
             except Exception as e:
-                logger.error(f"Failed to create members table: {e}")
-            finally:
-                conn.close()
+                logger.error(f"Failed to delete pending greetings: {e}")
+                try: conn.rollback()
+                except: pass
+
+    def _load_pending_greetings(self):
+        with self._db_connection("_load_pending_greetings") as conn:
+            if not conn: return []
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT chat_id, user_id, first_name, EXTRACT(EPOCH FROM due_at) FROM pending_greetings")
+                    return [PendingGreeting(float(due_at), chat_id, user_id, first_name) for chat_id, user_id, first_name, due_at in cursor.fetchall()]
+            except Exception as e:
+                logger.error(f"Failed to load pending greetings: {e}")
+                return []
 
     def _update_member_info(self, user_id, username=None, joined_date=None, last_interacted_date=None, last_thanked_month=None):
-        conn = self._get_db_connection()
-        if not conn: return
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT username, joined_date, last_interacted_date, last_thanked_month FROM members WHERE user_id = %s", (user_id,))
-                existing = cursor.fetchone()
-                
-                _username = username if username is not None else (existing[0] if existing else None)
-                _joined_date = joined_date if joined_date is not None else (existing[1] if existing else None)
-                _last_interacted_date = last_interacted_date if last_interacted_date is not None else (existing[2] if existing else None)
-                _last_thanked_month = last_thanked_month if last_thanked_month is not None else (existing[3] if existing else 0)
-
-                sql = """
-                    INSERT INTO members (user_id, username, joined_date, last_interacted_date, last_thanked_month)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (user_id) DO UPDATE SET 
-                        username = EXCLUDED.username,
-                        joined_date = EXCLUDED.joined_date,
-                        last_interacted_date = EXCLUDED.last_interacted_date,
-                        last_thanked_month = EXCLUDED.last_thanked_month
-                """
-                cursor.execute(sql, (user_id, _username, _joined_date, _last_interacted_date, _last_thanked_month))
-            conn.commit()
-        except Exception as e:
-            logger.error(f"Failed to update member DB for {user_id}: {e}")
-            try: conn.rollback()
-            except: pass
-        finally:
-            if conn: conn.close()
+        # Write-behind: perubahan masuk ke member store dan di-flush ke DB secara berkala
+        self.member_store.update(
+            user_id, username=username, joined_date=joined_date,
+            last_interacted_date=last_interacted_date, last_thanked_month=last_thanked_month
+        )
+
+    def _upsert_members(self, updates):
+        """
+        Applies a batch of partial member updates in a single round trip.
+        Each update is a dict with 'user_id' plus any subset of MEMBER_FIELDS; fields that are
+        missing or None keep their stored value (merged in SQL with COALESCE on EXCLUDED).
+        last_thanked_month only ever moves forward here (GREATEST), so a member-store record written
+        before the anniversary task claimed its months cannot undo the claim.
+        Returns True when the batch was committed (used by the member store flusher).
+        """
+        merged = {}
+        for update in updates:
+            row = merged.setdefault(update['user_id'], dict.fromkeys(MEMBER_FIELDS))
+            for field in MEMBER_FIELDS:
+                if update.get(field) is not None:
+                    row[field] = update[field]
+        if not merged: return True
+        
+        # Satu baris per user_id: ON CONFLICT tidak boleh menyentuh baris yang sama dua kali dalam satu statement
+        rows = [(user_id,) + tuple(row[field] for field in MEMBER_FIELDS) for user_id, row in merged.items()]
+        with self._db_connection("_upsert_members") as conn:
+            if not conn: return False
+            try:
+                with conn.cursor() as cursor:
+                    sql = """
+                        INSERT INTO members (user_id, username, joined_date, last_interacted_date, last_thanked_month, status)
+                        VALUES %s
+                        ON CONFLICT (user_id) DO UPDATE SET 
+                            username = COALESCE(EXCLUDED.username, members.username),
+                            joined_date = COALESCE(EXCLUDED.joined_date, members.joined_date),
+                            last_interacted_date = COALESCE(EXCLUDED.last_interacted_date, members.last_interacted_date),
+                            last_thanked_month = GREATEST(EXCLUDED.last_thanked_month, members.last_thanked_month),
+                            status = COALESCE(EXCLUDED.status, members.status)
+                    """
+                    execute_values(cursor, sql, rows, page_size=UPSERT_PAGE_SIZE)
+                conn.commit()
+                return True
+            except Exception as e:
+                logger.error(f"Failed to upsert {len(rows)} member(s) in DB: {e}")
+                try: conn.rollback()
+                except: pass
+                return False
 
     def _get_all_active_members(self):
-        conn = self._get_db_connection()
-        if not conn: return []
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT user_id, username, joined_date, last_interacted_date, last_thanked_month FROM members")
-                results = cursor.fetchall()
-            return results
-        except Exception as e:
-            logger.error(f"Failed to get all members: {e}")
-            return []
-        finally:
-            if conn: conn.close()
+        with self._db_connection("_get_all_active_members") as conn:
+            if not conn: return []
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT user_id, username, joined_date, last_interacted_date, COALESCE(last_thanked_month, 0), status FROM members")
+                    results = cursor.fetchall()
+                return results
+            except Exception as e:
+                logger.error(f"Failed to get all members: {e}")
+                return []
             
+    def _claim_rotation_members(self, count, claimed_at):
+        """
+        Claims the `count` least-recently-greeted members that are not known to have left, stamping
+        their last_interacted_date in the same statement. SKIP LOCKED keeps concurrent instances from
+        claiming the same rows. Returns [(user_id, username, status)], or None when the DB is unavailable.
+        """
+        with self._db_connection("_claim_rotation_members") as conn:
+            if not conn: return None
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE members SET last_interacted_date = %s
+                        WHERE user_id IN (
+                            SELECT user_id FROM members
+                            WHERE status IS NULL OR status <> ALL(%s)
+                            ORDER BY last_interacted_date ASC NULLS FIRST
+                            LIMIT %s
+                            FOR UPDATE SKIP LOCKED
+                        )
+                        RETURNING user_id, username, status
+                    """, (claimed_at, list(INACTIVE_MEMBER_STATUSES), count))
+                    rows = cursor.fetchall()
+                conn.commit()
+                return rows
+            except Exception as e:
+                logger.error(f"Failed to claim members for rotation: {e}")
+                try: conn.rollback()
+                except: pass
+                return None
+
+    def _claim_anniversaries(self, today):
+        """
+        Finds today's membership anniversaries via the join_day index and claims them (stamps
+        last_thanked_month) in the same statement, so another instance cannot thank them twice.
+        Returns [(user_id, username, months, previous_months)], or None when the DB is unavailable;
+        _release_anniversaries undoes the claim when the message is not delivered.
+        """
+        with self._db_connection("_claim_anniversaries") as conn:
+            if not conn: return None
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE members m SET last_thanked_month = due.months
+                        FROM (
+                            SELECT user_id, COALESCE(last_thanked_month, 0) AS previous,
+                                   ((%(year)s - EXTRACT(YEAR FROM joined_date AT TIME ZONE 'UTC')) * 12
+                                    + %(month)s - EXTRACT(MONTH FROM joined_date AT TIME ZONE 'UTC'))::int AS months
+                            FROM members
+                            WHERE join_day = ANY(%(days)s)
+                              AND (status IS NULL OR status <> ALL(%(inactive)s))
+                        ) due
+                        WHERE m.user_id = due.user_id AND due.months > 0 AND due.months > COALESCE(m.last_thanked_month, 0)
+                        RETURNING m.user_id, m.username, due.months, due.previous
+                    """, {'year': today.year, 'month': today.month, 'days': anniversary_days(today), 'inactive': list(INACTIVE_MEMBER_STATUSES)})
+                    rows = cursor.fetchall()
+                conn.commit()
+                return rows
+            except Exception as e:
+                logger.error(f"Failed to claim membership anniversaries: {e}")
+                try: conn.rollback()
+                except: pass
+                return None
+
+    def _release_anniversaries(self, claimed):
+        """Restores last_thanked_month for claimed anniversaries whose message failed to send."""
+        with self._db_connection("_release_anniversaries") as conn:
+            if not conn: return
+            try:
+                with conn.cursor() as cursor:
+                    execute_values(cursor, """
+                        UPDATE members m SET last_thanked_month = r.previous
+                        FROM (VALUES %s) AS r (user_id, months, previous)
+                        WHERE m.user_id = r.user_id AND m.last_thanked_month = r.months
+                    """, [(user_id, months, previous) for user_id, _, months, previous in claimed])
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Failed to release membership anniversaries: {e}")
+                try: conn.rollback()
+                except: pass
+
+    def _load_response_corpus(self):
+        with self._db_connection("_load_response_corpus") as conn:
+            if not conn: return {}
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT DISTINCT ON (category) category, version, lines FROM response_corpus ORDER BY category, version DESC")
+                    return {category: (version, lines) for category, version, lines in cursor.fetchall()}
+            except Exception as e:
+                logger.error(f"Failed to load response corpus: {e}")
+                return {}
+
+    def _load_response_category(self, category):
+        with self._db_connection("_load_response_category") as conn:
+            if not conn: return None
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT version, lines FROM response_corpus WHERE category = %s ORDER BY version DESC LIMIT 1", (category,))
+                    return cursor.fetchone()
+            except Exception as e:
+                logger.error(f"Failed to load responses for {category}: {e}")
+                return None
+
+    def _load_response_versions(self):
+        with self._db_connection("_load_response_versions") as conn:
+            if not conn: return {}
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT category, MAX(version) FROM response_corpus GROUP BY category")
+                    return dict(cursor.fetchall())
+            except Exception as e:
+                logger.error(f"Failed to load response versions: {e}")
+                return {}
+
+    def _save_response_category(self, category, lines, source):
+        """Inserts `lines` as the next version of the category and prunes old versions. Returns the new version."""
+        with self._db_connection("_save_response_category") as conn:
+            if not conn: return None
+            try:
+                with conn.cursor() as cursor:
+                    # Instance lain bisa mempublikasikan kategori yang sama bersamaan: versi berikutnya dihitung di bawah lock
+                    cursor.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", (RESPONSE_CORPUS_LOCK_ID, category))
+                    cursor.execute("""
+                        INSERT INTO response_corpus (category, version, lines, source)
+                        SELECT %s, COALESCE(MAX(version), 0) + 1, %s, %s FROM response_corpus WHERE category = %s
+                        RETURNING version
+                    """, (category, lines, source, category))
+                    version = cursor.fetchone()[0]
+                    cursor.execute("DELETE FROM response_corpus WHERE category = %s AND version <= %s", (category, version - Config.RESPONSE_KEEP_VERSIONS()))
+                conn.commit()
+                return version
+            except Exception as e:
+                logger.error(f"Failed to save responses for {category}: {e}")
+                try: conn.rollback()
+                except: pass
+                return None
+
     # --- FUNGSI SCHEDULING ---
             
+    def _load_schedule_log(self, refresh=False):
+        """
+        Returns {task_name: last_run_marker} for every schedule, reading the whole schedule_log table
+        in one query. The result is cached and kept current by _update_last_run_dates, so ticks
+        where nothing is due never touch the DB.
+        """
+        with self._schedule_log_lock:
+            if self._schedule_log_cache is not None and not refresh:
+                return dict(self._schedule_log_cache)
+        with self._db_connection("_load_schedule_log") as conn:
+            if not conn: return {}
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT task_name, last_run_date FROM schedule_log")
+                    markers = dict(cursor.fetchall())
+            except Exception as e:
+                logger.error(f"Failed to load schedule log: {e}")
+                return {}
+        with self._schedule_log_lock:
+            self._schedule_log_cache = markers
+        return dict(markers)
+
     def _get_last_run_date(self, task_name): 
-        conn = self._get_db_connection()
-        if not conn: return None
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT last_run_date FROM schedule_log WHERE task_name = %s", (task_name,))
-                result = cursor.fetchone()
-            return result[0] if result else None
-        except Exception as e:
-            logger.error(f"Failed to get last run date for {task_name}: {e}")
-            return None
-        finally:
-            if conn: conn.close()
+        return self._load_schedule_log().get(task_name)
             
     def _update_last_run_date(self, task_name, run_date): 
-        conn = self._get_db_connection()
-        if not conn: return
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute("INSERT INTO schedule_log (task_name, last_run_date) VALUES (%s, %s) ON CONFLICT (task_name) DO UPDATE SET last_run_date = EXCLUDED.last_run_date", (task_name, run_date))
-            conn.commit()
-        except Exception as e:
-            logger.error(f"Failed to update DB for {task_name}: {e}")
-            try: conn.rollback()
-            except: pass
-        finally:
-            if conn: conn.close()
+        self._update_last_run_dates({task_name: run_date})
+
+    def _update_last_run_dates(self, markers):
+        """Upserts several schedule markers in one statement and writes them through to the cache."""
+        if not markers: return
+        with self._db_connection("_update_last_run_dates") as conn:
+            if not conn: return
+            try:
+                with conn.cursor() as cursor:
+                    execute_values(
+                        cursor,
+                        "INSERT INTO schedule_log (task_name, last_run_date, last_run_at) VALUES %s ON CONFLICT (task_name) DO UPDATE SET last_run_date = EXCLUDED.last_run_date, last_run_at = EXCLUDED.last_run_at",
+                        [(name, marker, self._get_current_utc_time()) for name, marker in markers.items()]
+                    )
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Failed to update DB for {', '.join(markers)}: {e}")
+                try: conn.rollback()
+                except: pass
+                # Cache tidak lagi bisa dipercaya; baca ulang dari DB pada tick berikutnya
+                with self._schedule_log_lock:
+                    self._schedule_log_cache = None
+                return
+        with self._schedule_log_lock:
+            if self._schedule_log_cache is not None:
+                self._schedule_log_cache.update(markers)
             
     def _get_current_utc_time(self): 
         return datetime.now(timezone.utc)
-        
-    def check_and_run_schedules(self):
-        now_utc = self._get_current_utc_time()
-        today_utc_str = now_utc.strftime('%Y-%m-%d')
-        this_month_str = now_utc.strftime('%Y-%m')
-        this_week_str = now_utc.strftime('%Y-W%U')
-        
+
+    def _get_schedules(self):
         # --- JADWAL BARU SESUAI PERMINTAAN ---
-        schedules = {
+        return {
             # Pengingat Kesehatan (3x Sehari, Harian)
             'health_check_00':      {'hour': 0,  'task': self.send_scheduled_health_reminder, 'args': ()},
             'health_check_08':      {'hour': 8,  'task': self.send_scheduled_health_reminder, 'args': ()},
@@ -202,8 +559,8 @@ class BotLogic:
             # Sapaan Random Harian (1x Sehari)
             'daily_random_greeting':{'hour': 12, 'task': self.send_daily_random_greeting, 'args': ()},
             
-            # Cek Ulang Tahun Keanggotaan (Bulanan)
-            'monthly_anniversary_check': {'hour': 5,  'day_of_month': 1, 'task': self.check_monthly_anniversaries, 'args': ()},
+            # Cek Ulang Tahun Keanggotaan (Harian, dicocokkan per tanggal join)
+            'daily_anniversary_check': {'hour': 5, 'task': self.check_monthly_anniversaries, 'args': ()},
 
             # Pertanyaan Ulang Tahun (Mingguan, Hari Minggu = weekday 6)
             'weekly_birthday_ask':  {'hour': 10, 'day_of_week': 6, 'task': self.ask_for_birthdays, 'args': ()},
@@ -212,8 +569,15 @@ class BotLogic:
             'ai_renewal':           {'hour': 10, 'day_of_week': 5, 'task': self.renew_responses_with_ai, 'args': ()} 
         }
 
-        for name, schedule in schedules.items():
-            last_run_key = self._get_last_run_date(name)
+    def _get_due_schedules(self, now_utc, markers):
+        """Returns [(name, schedule, run_marker)] for every schedule that should run now."""
+        today_utc_str = now_utc.strftime('%Y-%m-%d')
+        this_month_str = now_utc.strftime('%Y-%m')
+        this_week_str = now_utc.strftime('%Y-W%U')
+
+        due = []
+        for name, schedule in self._get_schedules().items():
+            last_run_key = markers.get(name)
             should_run = False
             run_marker = today_utc_str # Default: Harian
 
@@ -233,12 +597,39 @@ class BotLogic:
                     should_run = True
             
             if should_run:
+                due.append((name, schedule, run_marker))
+        return due
+        
+    def _claim_schedule_run(self, task_name, run_marker):
+        """Re-reads schedule_log so a run already done (by this or another instance) is not repeated."""
+        return self._load_schedule_log(refresh=True).get(task_name) != run_marker
+
+    def check_and_run_schedules(self):
+        """Runs every due schedule synchronously. Kept for manual/one-off use; normally TaskScheduler drives the tasks."""
+        # Tick lain di proses ini masih berjalan (marker belum ditulis): jangan jalankan tugas dua kali
+        if not self._schedule_tick_lock.acquire(blocking=False):
+            return
+        try:
+            now_utc = self._get_current_utc_time()
+            due = self._get_due_schedules(now_utc, self._load_schedule_log())
+            if not due:
+                return
+
+            # Sesuatu terlihat jatuh tempo: validasi ulang dengan satu query, karena instance lain
+            # mungkin sudah menjalankannya sejak cache dimuat.
+            due = self._get_due_schedules(now_utc, self._load_schedule_log(refresh=True))
+
+            completed = {}
+            for name, schedule, run_marker in due:
                 try:
                     logger.info(f"Running scheduled task: {name} at {now_utc.isoformat()}")
                     schedule['task'](*schedule.get('args', ()))
-                    self._update_last_run_date(name, run_marker)
+                    completed[name] = run_marker
                 except Exception as e:
                     logger.error(f"Error running scheduled task {name}: {e}", exc_info=True)
+            self._update_last_run_dates(completed)
+        finally:
+            self._schedule_tick_lock.release()
     
     # --- FUNGSI AI & RESPONS ---
     
@@ -248,7 +639,13 @@ class BotLogic:
             logger.warning("Groq is unavailable or GROQ_API_KEY is missing. AI features disabled.")
             return None
         try:
-            client = groq.Groq(api_key=api_key, http_client=httpx.Client(timeout=15.0))
+            # Client httpx bersama: pool keep-alive, timeout connect/read terpisah, HTTP/2 opsional
+            self.groq_http = GroqHttpClient(
+                max_connections=Config.GROQ_MAX_CONNECTIONS(), max_keepalive=Config.GROQ_MAX_KEEPALIVE(),
+                keepalive_expiry=Config.GROQ_KEEPALIVE_EXPIRY(), connect_timeout=Config.GROQ_CONNECT_TIMEOUT(),
+                read_timeout=Config.GROQ_READ_TIMEOUT(), http2=Config.GROQ_HTTP2()
+            )
+            client = groq.Groq(api_key=api_key, http_client=self.groq_http.client)
             logger.info("Groq client successfully initialized.")
             return client
         except Exception as e:
@@ -619,6 +1016,9 @@ class BotLogic:
         self.bot.message_handler(content_types=['new_chat_members'])(self.greet_new_members)
         self.bot.message_handler(commands=['start', 'help'])(self.send_welcome)
         self.bot.callback_query_handler(func=lambda call: True)(self.handle_callback_query)
+        self.bot.chat_member_handler()(self.handle_chat_member_update)
+        self.bot.my_chat_member_handler()(self.handle_my_chat_member_update)
+        self.bot.message_handler(content_types=['left_chat_member'])(self.handle_left_chat_member)
         # Menambahkan 'photo' dan 'video' untuk memastikan entitas link juga terdeteksi di caption
         self.bot.message_handler(func=lambda message: True, content_types=['text', 'photo', 'video', 'sticker', 'document'])(self.handle_all_text)
     
@@ -632,97 +1032,105 @@ class BotLogic:
         )
         return keyboard
   
-    def _update_admin_ids(self, chat_id): 
-        now = time.time()
-        if now - self.admins_last_updated > 600:
-            try:
-                admins = self.bot.get_chat_administrators(chat_id)
-                self.admin_ids = {admin.user.id for admin in admins if admin and admin.user}
-                self.admins_last_updated = now
-            except Exception as e:
-                logger.error(f"Could not update admin list: {e}")
+    def _fetch_admin_ids(self, chat_id):
+        admins = self.bot.get_chat_administrators(chat_id)
+        return {admin.user.id for admin in admins if admin and admin.user}
+
+    def _is_chat_admin(self, chat_id, user_id):
+        """
+        Admin check from the per-chat cache. Only called for messages about to be deleted, so a cold
+        chat (list not fetched yet) falls back to a one-off get_chat_member for this user; if that
+        fails too the check fails closed, like the original empty admin list did.
+        """
+        is_admin = self.admin_cache.is_admin(chat_id, user_id)
+        if is_admin is not None:
+            return is_admin
+        try:
+            return self.bot.get_chat_member(chat_id, user_id).status in ADMIN_STATUSES
+        except Exception as e:
+            logger.error(f"Could not check admin status of {user_id} in {chat_id}: {e}")
+            return False
+
+    def handle_chat_member_update(self, update):
+        """chat_member: status member berubah (promote/demote/keluar) -> perbarui cache admin langsung."""
+        try:
+            user = update.new_chat_member.user
+            self.admin_cache.apply_member_update(update.chat.id, user.id, update.old_chat_member.status, update.new_chat_member.status)
+            self._record_member_status(update.chat.id, user.id, update.new_chat_member.status, username=mention_name(user))
+        except Exception as e:
+            logger.error(f"Failed to process chat_member update: {e}", exc_info=True)
+
+    def handle_left_chat_member(self, message):
+        try:
+            self._record_member_status(message.chat.id, message.left_chat_member.id, 'left')
+        except Exception as e:
+            logger.error(f"Error in handle_left_chat_member: {e}", exc_info=True)
+
+    def _record_member_status(self, chat_id, user_id, status, username=None):
+        """Simpan status keanggotaan dari event Telegram (hanya untuk grup utama, yang dipakai tugas terjadwal)."""
+        group_id = Config.GROUP_CHAT_ID()
+        if group_id and str(chat_id) != str(group_id):
+            return
+        # Member yang keluar sebelum pernah tercatat tidak perlu dibuatkan baris
+        if status not in ACTIVE_MEMBER_STATUSES and self.member_store.get(user_id) is None:
+            return
+        self.member_store.update(user_id, status=status, username=username)
+
+    def handle_my_chat_member_update(self, update):
+        """my_chat_member: status bot sendiri berubah -> daftar admin chat tersebut dimuat ulang."""
+        try:
+            self.admin_cache.invalidate(update.chat.id)
+        except Exception as e:
+            logger.error(f"Failed to process my_chat_member update: {e}", exc_info=True)
                 
     def _is_spam_or_ad(self, message): 
         text = (message.text or message.caption or "") if message else ""
-        text_lower = text.lower()
-        
-        for keyword in self.FORBIDDEN_KEYWORDS:
-            if keyword in text_lower:
-                return True, f"Forbidden Keyword: {keyword}"
-        
-        # Logika lama: Memeriksa tautan tidak sah yang bukan domain resmi
-        if "http" in text_lower or "t.me" in text_lower:
-            urls = re.findall(r'(https?://[^\s]+)|([\w\.-]+(?:\.[\w\.-]+)+)', text)
-            urls_flat = [u[0] or u[1] for u in urls if u[0] or u[1]]
-            for url in urls_flat:
-                if not any(domain in url for domain in self.ALLOWED_DOMAINS):
-                    return True, f"Unauthorized Link: {url}"
-        
-        solana_pattern = r'\b[1-9A-HJ-NP-Za-km-z]{32,44}\b'
-        eth_pattern = r'\b0x[a-fA-F0-9]{40}\b'
-        if re.search(solana_pattern, text) and Config.CONTRACT_ADDRESS() not in text:
-            return True, "Potential Solana Contract Address"
-        if re.search(eth_pattern, text):
-            return True, "Potential EVM Contract Address"
-            
-        return False, None
+        # Satu pass regex terkompilasi: keyword terlarang, link di luar allowlist, alamat kontrak
+        return self.moderation.check(text)
 
     def _is_link_present(self, message):
         """Memeriksa apakah pesan mengandung link (entities, text, atau caption)"""
-        
-        # Cek entities (URL, text_link) di pesan atau caption
-        if message.entities or message.caption_entities:
-            entities = message.entities if message.entities else message.caption_entities
-            for entity in entities:
-                if entity.type in ['url', 'text_link']:
-                    return True, "URL or Text Link entity detected."
-        
-        # Cek raw text (termasuk caption) untuk pola HTTP/HTTPS/WWW
-        text_to_check = message.text or message.caption or ""
-        if re.search(r'https?:\/\/[^\s]+|www\.[^\s]+', text_to_check, re.IGNORECASE):
-            # Lakukan pengecekan yang lebih ketat untuk memastikan itu bukan domain yang diperbolehkan
-            if self._is_spam_or_ad(message)[0]: # Jika _is_spam_or_ad menganggapnya tidak sah
-                return True, "Raw link detected."
-        
-        # Khusus untuk forward dari channel/grup lain yang sering menyisipkan link
-        if message.forward_from_chat or message.forward_from:
-             # Tidak selalu ada link, tapi jika ada entities yang menyertakan link promo, lebih baik dihapus.
-             if message.entities or message.caption_entities:
-                 return True, "Forwarded message with potential link entities."
-
+        verdict = self.moderation.classify(message)
+        for reason in verdict.reasons:
+            if reason in LINK_REASONS:
+                return True, reason
         return False, None
         
-    def _send_delayed_greeting(self, chat_id, member_id, first_name):
-        """Function run by Timer after 5 minutes."""
-        now_utc = self._get_current_utc_time().strftime('%Y-%m-%d %H:%M:%S')
+    def _send_delayed_greetings(self, chat_id, greetings):
+        """Run by the greeting queue: one welcome message for every member that joined in the same window."""
+        now_utc = self._get_current_utc_time()
+        
+        # Satu member bisa join-leave-join dalam jendela yang sama: sapa sekali saja
+        members = list({g.user_id: g.first_name for g in greetings}.items())
         
-        # Save member to DB
-        self._update_member_info(member_id, first_name, now_utc, last_interacted_date=now_utc)
+        # Save members to DB
+        self.member_store.update_many(
+            {'user_id': member_id, 'username': first_name, 'joined_date': now_utc, 'last_interacted_date': now_utc}
+            for member_id, first_name in members
+        )
         
         # Prepare message
-        welcome_text = random.choice(self.responses.get("GREET_NEW_MEMBERS_DELAYED", [])).format(name=f"[{first_name}](tg://user?id={member_id})")
+        mentions = [f"[{first_name}](tg://user?id={member_id})" for member_id, first_name in members]
+        names = mentions[0] if len(mentions) == 1 else f"{', '.join(mentions[:-1])} and {mentions[-1]}"
+        welcome_text = random.choice(self.responses.get("GREET_NEW_MEMBERS_DELAYED", [])).format(name=names)
         
-        try:
-            # Send message
-            self.bot.send_message(chat_id, welcome_text, parse_mode="Markdown")
-            logger.info(f"Delayed greeting sent to new member: {member_id}")
-        except Exception as e:
-            logger.error(f"Failed to send welcome message via Timer: {e}")
+        # Future dikembalikan ke antrian sapaan: gagal kirim -> dijadwalkan ulang, bukan dihapus
+        future = self.outbound.send_message(chat_id, welcome_text, parse_mode="Markdown", priority=LOW, coalesce=True)
+        logger.info(f"Delayed greeting queued for {len(members)} new member(s) in {chat_id}.")
+        return future
 
+    @timed(HANDLER_LATENCY, "greet_new_members")
     def greet_new_members(self, message):
         try:
+            new_members = []
             for member in message.new_chat_members:
-                logger.info(f"New member {member.id} detected. Scheduling delayed greeting in 5 minutes (300 seconds)...")
-                
-                # FIX: Use threading.Timer to prevent blocking Waitress
-                first_name = (member.first_name or "fren").replace('_', '\\_').replace('*', '\\*').replace('[', '\\[').replace('`', '\\`')
-                
-                timer = threading.Timer(
-                    300, # 5 minutes delay
-                    self._send_delayed_greeting, 
-                    args=[message.chat.id, member.id, first_name]
-                )
-                timer.start()
+                logger.info(f"New member {member.id} detected. Scheduling delayed greeting in {int(self.greeting_queue.delay)} seconds...")
+                first_name = mention_name(member)
+                new_members.append((member.id, first_name))
+                self._record_member_status(message.chat.id, member.id, 'member', username=first_name)
+            
+            # Antrian tunggal (tanpa thread per member); join yang berdekatan digabung jadi satu sapaan
+            self.greeting_queue.schedule(message.chat.id, new_members)
                 
         except Exception as e:
             logger.error(f"Error in greet_new_members: {e}", exc_info=True)
@@ -731,15 +1139,22 @@ class BotLogic:
         welcome_text = (" 🐸  *Welcome to the official NextPepe ($NPEPE) Bot!* 🔥 \n\n"
                         "I am the spirit of the NPEPEVERSE, here to guide you. Use the buttons below or ask me anything!")
         try:
-            self.bot.reply_to(message, welcome_text, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown")
+            self.outbound.reply_to(message, welcome_text, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown")
         except Exception as e:
             logger.error(f"Failed to send /start: {e}")
             
+    @timed(HANDLER_LATENCY, "handle_callback_query")
     def handle_callback_query(self, call): 
+        def on_error(future):
+            # Error Telegram baru muncul saat future dari dispatcher selesai
+            error = future.exception()
+            if error is not None:
+                self._handle_callback_error(call, error)
+
         try:
             if call.data == "hype":
                 hype_text = "LFG! HODL tight, fren!" 
-                self.bot.answer_callback_query(call.id, text=hype_text, show_alert=True)
+                self.outbound.answer_callback_query(call.id, text=hype_text, show_alert=True)
             elif call.data == "about":
                 about_text = (" 🚀  *$NPEPE* is the next evolution of meme power!\n"
                               "We are a community-driven force born on *Pump.fun*.\n\n"
@@ -747,34 +1162,36 @@ class BotLogic:
                 
                 # FIX: Check if message is already displaying this content to avoid 'message is not modified' error
                 if call.message.text != about_text:
-                    self.bot.answer_callback_query(call.id)
-                    self.bot.edit_message_text(chat_id=call.message.chat.id, message_id=call.message.message_id, text=about_text, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown")
+                    self.outbound.answer_callback_query(call.id)
+                    self.outbound.edit_message_text(about_text, call.message.chat.id, call.message.message_id, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown").add_done_callback(on_error)
                 else:
-                    self.bot.answer_callback_query(call.id, text="You are already viewing the About page!", show_alert=False)
+                    self.outbound.answer_callback_query(call.id, text="You are already viewing the About page!", show_alert=False)
 
             elif call.data == "ca":
                 ca_text = f" 🔗  *Contract Address:*\n`{Config.CONTRACT_ADDRESS()}`"
                 
                 # FIX: Check if message is already displaying this content to avoid 'message is not modified' error
                 if call.message.text != ca_text:
-                    self.bot.answer_callback_query(call.id)
-                    self.bot.edit_message_text(chat_id=call.message.chat.id, message_id=call.message.message_id, text=ca_text, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown")
+                    self.outbound.answer_callback_query(call.id)
+                    self.outbound.edit_message_text(ca_text, call.message.chat.id, call.message.message_id, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown").add_done_callback(on_error)
                 else:
-                    self.bot.answer_callback_query(call.id, text="You are already viewing the Contract Address!", show_alert=False)
+                    self.outbound.answer_callback_query(call.id, text="You are already viewing the Contract Address!", show_alert=False)
 
             else:
-                self.bot.answer_callback_query(call.id, text="Action not recognized.")
+                self.outbound.answer_callback_query(call.id, text="Action not recognized.")
         except Exception as e:
-            logger.error(f"Error in callback handler: {e}", exc_info=True)
-            try:
-                # Handle 'message is not modified' gracefully
-                if "message is not modified" in str(e):
-                    logger.warning("Attempted to edit an unmodified message. Ignoring API error.")
-                    return
-                    
-                self.bot.answer_callback_query(call.id, text="Sorry, something went wrong!", show_alert=True)
-            except:
-                pass
+            self._handle_callback_error(call, e)
+
+    def _handle_callback_error(self, call, error):
+        # Handle 'message is not modified' gracefully
+        if "message is not modified" in str(error):
+            logger.warning("Attempted to edit an unmodified message. Ignoring API error.")
+            return
+        logger.error(f"Error in callback handler: {error}", exc_info=error)
+        try:
+            self.outbound.answer_callback_query(call.id, text="Sorry, something went wrong!", show_alert=True)
+        except:
+            pass
             
     def _is_a_question(self, text): 
         if not text or not isinstance(text, str):
@@ -785,44 +1202,34 @@ class BotLogic:
         question_words = ['what', 'how', 'when', 'where', 'why', 'who', 'can', 'could', 'is', 'are', 'do', 'does', 'explain']
         return any(txt.startswith(w) for w in question_words)
 
+    @timed(HANDLER_LATENCY, "handle_all_text")
     def handle_all_text(self, message):
         try:
             if not message: return
             
+            verdict = None
             if message.chat.type in ['group', 'supergroup']:
-                chat_id = message.chat.id
-                user_id = message.from_user.id
-                self._update_admin_ids(chat_id)
-                
-                is_exempt = user_id in self.admin_ids
-                if Config.GROUP_OWNER_ID() and str(user_id) == str(Config.GROUP_OWNER_ID()):
-                    is_exempt = True
-                
-                if not is_exempt:
-                    # --- NEW LINK CHECK ---
-                    is_link, link_reason = self._is_link_present(message)
-                    if is_link:
-                        try:
-                            self.bot.delete_message(chat_id, message.message_id)
-                            logger.info(f"Deleted message {message.message_id} from {user_id} reason: {link_reason}")
-                            return # Stop processing after deletion
-                        except Exception as e:
-                            logger.error(f"Failed to delete link message: {e}")
-
-                    # --- EXISTING SPAM/AD CHECK ---
-                    is_spam, reason = self._is_spam_or_ad(message)
-                    if is_spam:
-                        try:
-                            self.bot.delete_message(chat_id, message.message_id)
-                            logger.info(f"Deleted message {message.message_id} from {user_id} reason: {reason}")
-                        except Exception as e:
-                            logger.error(f"Failed to delete spam message: {e}")
-                        return
+                # Satu tahap klasifikasi: entities, forward, dan teks diperiksa sekali
+                verdict = self.moderation.classify(message)
+                MODERATION_VERDICTS.inc(verdict.action, (verdict.reason or "none").split(":", 1)[0])
+                if verdict.should_delete:
+                    chat_id = message.chat.id
+                    user_id = message.from_user.id
+                    # Status admin hanya diperiksa bila pesan memang akan dihapus
+                    is_exempt = bool(Config.GROUP_OWNER_ID()) and str(user_id) == str(Config.GROUP_OWNER_ID())
+                    if not is_exempt:
+                        is_exempt = self._is_chat_admin(chat_id, user_id)
+                    
+                    if not is_exempt:
+                        # Prioritas tinggi di dispatcher: penghapusan tidak antre di belakang obrolan
+                        self.outbound.delete_message(chat_id, message.message_id)
+                        logger.info(f"Deleting message {message.message_id} from {user_id} reason: {verdict.reason}")
+                        return # Stop processing after deletion
       
-            text = (message.text or message.caption or "")
+            text = verdict.text if verdict else (message.text or message.caption or "")
             if not text: return
             
-            lower_text = text.lower().strip()
+            lower_text = verdict.lower_text if verdict else text.lower().strip()
             chat_id = message.chat.id
             
             # Owner Tag Check
@@ -830,117 +1237,226 @@ class BotLogic:
                 for entity in message.entities:
                     if getattr(entity, 'type', None) == 'text_mention' and getattr(entity, 'user', None):
                         if str(entity.user.id) == str(Config.GROUP_OWNER_ID()):
-                            self.bot.send_message(chat_id, random.choice(self.responses.get("BOT_IDENTITY", []))) 
+                            self.outbound.send_message(chat_id, random.choice(self.responses.get("BOT_IDENTITY", []))) 
                             return
             
-            # CA & Buy Check
-            if any(kw in lower_text for kw in ["ca", "contract", "address"]):
-                self.bot.send_message(chat_id, f"Here is the contract address, fren:\n\n`{Config.CONTRACT_ADDRESS()}`", parse_mode="Markdown")
-                return
-            if any(kw in lower_text for kw in ["how to buy", "where to buy", "buy npepe"]):
-                self.bot.send_message(chat_id, " 💰  You can buy *$NPEPE* on Pump.fun! The portal to the moon is one click away!  🚀 ", parse_mode="Markdown", reply_markup=self.main_menu_keyboard())
-                return
-            
-            # --- NEW BOT LOGIC ---
-            
-            # Bot Identity Response
-            if any(kw in lower_text for kw in ["what are you", "what is this bot", "are you a bot", "what kind of bot", "who made you"]):
-                logger.info("Bot identity question detected, responding immediately...")
-                self.bot.send_message(chat_id, random.choice(self.responses.get("BOT_IDENTITY", [])))
-                return
-            
-            # Birthday Response
-            if any(kw in lower_text for kw in ["my birthday", "my bday", "it's my birthday", "my birthday this week"]) and message.chat.type in ['group', 'supergroup']:
-                try:
-                    self.bot.reply_to(message, random.choice(self.responses.get("BIRTHDAY_GREETING", [])).format(name=message.from_user.first_name), parse_mode="Markdown")
-                    return
-                except Exception as e:
-                    logger.error(f"Failed to send birthday greeting: {e}")
-                    
-            # Collaboration Response (Retained)
-            if any(kw in lower_text for kw in ["collab", "partner", "promote", "help grow", "shill", "marketing"]):
-                self.bot.send_message(chat_id, random.choice(self.responses.get("COLLABORATION_RESPONSE", [])))
-                return
-            
-            # AI Response for Questions
-            if self.groq_client and self._is_a_question(text):
-                # FIX: Dispatch AI processing to a separate thread to prevent blocking Waitress
-                threading.Thread(target=self._process_ai_response, args=(chat_id, text)).start()
-                return
+            # Intent lain (CA, buy, identitas, ulang tahun, collab, pertanyaan AI) lewat router
+            self.intents.dispatch(message, text, lower_text)
             
         except Exception as e:
             logger.error(f"FATAL ERROR processing message: {e}", exc_info=True)
 
-    def _process_ai_response(self, chat_id, text):
+    # ==========================
+    #   🧭   INTENT ROUTING
+    # ==========================
+
+    def _build_intent_router(self):
+        """Tabel intent untuk handle_all_text; prioritas tertinggi dicoba lebih dulu."""
+        group_chats = ('group', 'supergroup')
+        router = IntentRouter()
+        router.add("contract_address", self._intent_contract_address, ["ca", "contract", "address"], priority=60)
+        router.add("how_to_buy", self._intent_how_to_buy, ["how to buy", "where to buy", "buy npepe"], priority=50)
+        router.add("bot_identity", self._intent_bot_identity, ["what are you", "what is this bot", "are you a bot", "what kind of bot", "who made you"], priority=40)
+        router.add("birthday", self._intent_birthday, ["my birthday", "my bday", "it's my birthday", "my birthday this week"], priority=30, chat_types=group_chats)
+        router.add("collaboration", self._intent_collaboration, ["collab", "partner", "promote", "help grow", "shill", "marketing"], priority=20)
+        router.add("question", self._intent_question, priority=10, predicate=lambda text: bool(self.groq_client) and self._is_a_question(text))
+        return router
+
+    def _intent_contract_address(self, message, text):
+        self.outbound.send_message(message.chat.id, f"Here is the contract address, fren:\n\n`{Config.CONTRACT_ADDRESS()}`", parse_mode="Markdown")
+
+    def _intent_how_to_buy(self, message, text):
+        self.outbound.send_message(message.chat.id, " 💰  You can buy *$NPEPE* on Pump.fun! The portal to the moon is one click away!  🚀 ", parse_mode="Markdown", reply_markup=self.main_menu_keyboard())
+
+    def _intent_bot_identity(self, message, text):
+        logger.info("Bot identity question detected, responding immediately...")
+        self.outbound.send_message(message.chat.id, random.choice(self.responses.get("BOT_IDENTITY", [])))
+
+    def _intent_birthday(self, message, text):
+        self.outbound.reply_to(message, random.choice(self.responses.get("BIRTHDAY_GREETING", [])).format(name=message.from_user.first_name), parse_mode="Markdown")
+
+    def _intent_collaboration(self, message, text):
+        self.outbound.send_message(message.chat.id, random.choice(self.responses.get("COLLABORATION_RESPONSE", [])))
+
+    def _intent_question(self, message, text):
+        chat_id = message.chat.id
+        question_key = normalize_question(text, drop_stopwords=Config.AI_CACHE_DROP_STOPWORDS())
+        cached_answer = self.answer_cache.get(question_key)
+        if cached_answer:
+            # Jawaban dari cache: langsung dikirim, tanpa placeholder "consulting the memes"
+            self.outbound.send_message(chat_id, cached_answer)
+            return
+        
+        # Pool worker terbatas: pertanyaan identik yang masih diproses di chat yang sama cukup dijawab sekali
+        status = self.ai_executor.submit(self._process_ai_response, chat_id, text, question_key, key=(chat_id, question_key))
+        if status == REJECTED:
+            logger.warning(f"AI queue saturated; answering {chat_id} with a fallback reply.")
+            self.outbound.send_message(chat_id, random.choice(self.responses.get("FINAL_FALLBACK", ["Sorry fren, can’t answer now."])))
+
+    def _process_ai_response(self, chat_id, text, question_key=None):
         """Dedicated function to handle the blocking AI request."""
-        thinking_message = None
+        # Placeholder tidak ditunggu: worker AI langsung memanggil Groq, jawaban diedit ke placeholder setelah terkirim
+        placeholder = self.outbound.send_message(chat_id, " 🐸  The NPEPE oracle is consulting the memes...")
         try:
-            thinking_message = self.bot.send_message(chat_id, " 🐸  The NPEPE oracle is consulting the memes...")
             system_prompt = (
                 "You are a crypto community bot for $NPEPE. Funny, enthusiastic, chaotic. "
                 "Use slang: ‘fren’, ‘WAGMI’, ‘HODL’, ‘based’, ‘LFG’, ‘ribbit’. Keep answers short."
             )
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": text}],
-                model="llama3-8b-8192", 
-                temperature=0.7, max_tokens=150
-            )
-            ai_response = chat_completion.choices[0].message.content
-            try:
-                self.bot.edit_message_text(ai_response, chat_id=chat_id, message_id=thinking_message.message_id)
-            except Exception:
-                self.bot.send_message(chat_id, ai_response)
+            messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": text}]
+            if Config.AI_STREAMING():
+                ai_response = self._stream_ai_response(chat_id, placeholder, messages)
+            else:
+                with GROQ_LATENCY.time("answer"):
+                    chat_completion = self.groq_client.chat.completions.create(
+                        messages=messages, model="llama3-8b-8192",
+                        temperature=0.7, max_tokens=150
+                    )
+                record_groq_usage("answer", chat_completion.usage)
+                ai_response = chat_completion.choices[0].message.content
+            if not ai_response:
+                raise ValueError("empty AI response")
+            if question_key:
+                self.answer_cache.put(question_key, ai_response)
         except Exception as e:
             logger.error(f"AI response error: {e}", exc_info=True)
-            fallback = random.choice(self.responses.get("FINAL_FALLBACK", ["Sorry fren, can’t answer now."]))
-            try:
-                if thinking_message: self.bot.edit_message_text(fallback, chat_id=chat_id, message_id=thinking_message.message_id)
-                else: self.bot.send_message(chat_id, fallback)
-            except Exception as ex:
-                logger.error(f"Failed to send fallback: {ex}")
+            ai_response = random.choice(self.responses.get("FINAL_FALLBACK", ["Sorry fren, can’t answer now."]))
+        self._replace_placeholder(chat_id, placeholder, ai_response)
+
+    def _replace_placeholder(self, chat_id, placeholder, text):
+        """
+        Edits the placeholder (a Future from the outbound dispatcher) with `text` once it has been sent,
+        without blocking the caller; if the placeholder or the edit fails, `text` is sent as a new message.
+        """
+        def on_edited(future):
+            error = future.exception()
+            if error is not None and "message is not modified" not in str(error):
+                self.outbound.send_message(chat_id, text)
+
+        def on_placeholder(future):
+            if future.exception() is not None:
+                self.outbound.send_message(chat_id, text)
+                return
+            self.outbound.edit_message_text(text, chat_id, future.result().message_id).add_done_callback(on_edited)
+
+        placeholder.add_done_callback(on_placeholder)
+
+    def _stream_ai_response(self, chat_id, placeholder, messages):
+        """
+        Streams the completion and edits the placeholder with the partial text as it grows (once the
+        placeholder future has been sent).
+
+        Edits are throttled: at most one is queued at a time, at least AI_STREAM_EDIT_INTERVAL seconds
+        apart (AI_STREAM_GROUP_EDIT_INTERVAL in groups, where Telegram allows ~20 messages per minute)
+        and only after AI_STREAM_MIN_CHARS new characters. The interval also counts from the start of
+        the stream, so a short answer that finishes within it costs no partial edit at all. Returns the
+        full text; the caller commits it.
+        """
+        interval = Config.AI_STREAM_EDIT_INTERVAL() if chat_id > 0 else Config.AI_STREAM_GROUP_EDIT_INTERVAL()
+        min_chars = Config.AI_STREAM_MIN_CHARS()
+        started = time.perf_counter()
+        stream = self.groq_client.chat.completions.create(
+            messages=messages, model="llama3-8b-8192",
+            temperature=0.7, max_tokens=150, stream=True
+        )
+        parts = []
+        length = shown = 0
+        # Edit parsial pertama baru setelah `interval`: jawaban pendek (max_tokens=150) tidak memakai token bucket grup
+        last_edit_at = time.monotonic()
+        pending_edit = None
+        for chunk in stream:
+            x_groq = getattr(chunk, 'x_groq', None)
+            if x_groq is not None:
+                # Chunk terakhir membawa usage
+                record_groq_usage("answer", x_groq.usage)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta: continue
+            if not parts:
+                GROQ_FIRST_TOKEN.observe(time.perf_counter() - started)
+            parts.append(delta)
+            length += len(delta)
+            now = time.monotonic()
+            if length - shown < min_chars or now - last_edit_at < interval: continue
+            if pending_edit is not None and not pending_edit.done(): continue
+            if not placeholder.done() or placeholder.exception() is not None: continue
+            # Kursor di akhir: teks final selalu berbeda dari edit parsial ("message is not modified")
+            pending_edit = self.outbound.edit_message_text("".join(parts).strip() + " ▌", chat_id, placeholder.result().message_id)
+            shown, last_edit_at = length, now
+        GROQ_LATENCY.observe(time.perf_counter() - started, "answer")
+        # Edit parsial yang masih antre tidak ditunggu: dispatcher mengirim per chat berurutan (FIFO, retry
+        # mempertahankan urutan), jadi edit final selalu datang setelahnya
+        return "".join(parts).strip()
 
     # --- FUNGSI TUGAS TERJADWAL ---
 
+    def _pick_active_members(self, group_id, candidates, count):
+        """
+        First `count` active members from `candidates` (member rows in preference order) as (user_id, username).
+        Statuses kept current by chat_member/left_chat_member events are trusted; only members whose
+        status is still unknown are checked with get_chat_member, and the result is stored.
+        """
+        picked = []
+        checks = 0
+        for user_id, username, _, _, _, status in candidates:
+            if len(picked) >= count: break
+            if status is None:
+                if checks >= count * MEMBER_VERIFY_FACTOR: continue
+                checks += 1
+                status = self._fetch_member_status(group_id, user_id)
+            if status in ACTIVE_MEMBER_STATUSES:
+                picked.append((user_id, username))
+            else:
+                logger.info(f"Member {user_id} is no longer active. Skipping.")
+        return picked
+
+    def _fetch_member_status(self, group_id, user_id):
+        try:
+            status = self.bot.get_chat_member(group_id, user_id).status
+        except telebot.apihelper.ApiTelegramException as e:
+            if "user not found" not in str(e) and "member not found" not in str(e):
+                logger.error(f"Error checking membership for {user_id}: {e}")
+                return None
+            status = 'left'
+        except Exception as e:
+            logger.error(f"Error checking membership for {user_id}: {e}")
+            return None
+        self.member_store.update(user_id, status=status)
+        return status
+
     def send_daily_random_greeting(self):
         """Task 1: Greets 3 random members daily (turn-based mode)."""
         group_id = Config.GROUP_CHAT_ID()
         if not group_id: return
         
-        # 1. Get all members from DB
-        all_members = self._get_all_active_members()
-        if not all_members:
+        if not len(self.member_store):
             logger.warning("No members in DB to greet.")
             return
 
-        # 2. Sort by last_interacted_date (for rotation/turn)
-        sorted_members = sorted(all_members, key=lambda x: datetime.strptime(x[3], '%Y-%m-%d %H:%M:%S') if x[3] else datetime.min)
-        
+        now_utc = self._get_current_utc_time()
         members_to_greet = []
-        now_ts_str = self._get_current_utc_time().strftime('%Y-%m-%d %H:%M:%S')
         
-        for i in range(3): # Try to greet 3 members
-            if not sorted_members: break
+        # 1. Member baru/berubah harus sudah ada di DB sebelum rotasi diambil dari sana
+        self.member_store.flush()
+        
+        # 2. Ambil giliran dari DB (index last_interacted_date, LIMIT k); ulangi bila ada kandidat yang ternyata sudah keluar
+        for _ in range(MEMBER_VERIFY_FACTOR):
+            needed = 3 - len(members_to_greet)
+            if needed <= 0: break
+            claimed = self._claim_rotation_members(needed, now_utc)
+            if claimed is None:
+                # DB tidak tersedia: rotasi dari member store
+                oldest = datetime.min.replace(tzinfo=timezone.utc)
+                candidates = sorted(
+                    (m for m in self.member_store.all() if m[5] not in INACTIVE_MEMBER_STATUSES),
+                    key=lambda m: m[3] or oldest
+                )
+                members_to_greet = self._pick_active_members(group_id, candidates, 3)
+                self.member_store.update_many({'user_id': user_id, 'last_interacted_date': now_utc} for user_id, _ in members_to_greet)
+                break
+            if not claimed: break
             
-            member_data = sorted_members.pop(0) 
-            user_id, username, joined_date, last_interacted_date, last_thanked_month = member_data
-
-            try:
-                # 3. Check membership in group (skip jika sudah tidak jadi member)
-                chat_member = self.bot.get_chat_member(group_id, user_id)
-                if chat_member.status in ['member', 'administrator', 'creator']:
-                    members_to_greet.append((user_id, username))
-                    
-                    # Tandai sebagai sudah disapa di DB
-                    self._update_member_info(user_id, last_interacted_date=now_ts_str)
-                else:
-                    logger.info(f"Member {user_id} is no longer active. Skipping.")
-            except telebot.apihelper.ApiTelegramException as e:
-                if "user not found in chat" in str(e):
-                    logger.info(f"Member {user_id} left the group. Skipping.")
-                else:
-                    logger.error(f"Error checking membership for {user_id}: {e}")
-            except Exception as e:
-                logger.error(f"Error checking membership for {user_id}: {e}")
+            # 3. Samakan member store dengan hasil klaim, lalu verifikasi seperlunya
+            self.member_store.update_many({'user_id': user_id, 'last_interacted_date': now_utc} for user_id, _, _ in claimed)
+            members_to_greet += self._pick_active_members(group_id, [(user_id, username, None, None, 0, status) for user_id, username, status in claimed], needed)
 
         # 4. Kirim sapaan ke 3 member yang valid
         if members_to_greet:
@@ -951,8 +1467,8 @@ class BotLogic:
             
             final_message = "\n\n---\n\n".join(message_parts)
             try:
-                self.bot.send_message(group_id, final_message, parse_mode="Markdown")
-                logger.info(f"Sent random daily greeting to {len(members_to_greet)} members.")
+                self.outbound.send_message(group_id, final_message, parse_mode="Markdown", priority=LOW, coalesce=True)
+                logger.info(f"Queued random daily greeting to {len(members_to_greet)} members.")
             except Exception as e:
                 logger.error(f"Failed to send daily greeting: {e}", exc_info=True)
                 
@@ -961,38 +1477,43 @@ class BotLogic:
         group_id = Config.GROUP_CHAT_ID()
         if not group_id: return
         
-        now = self._get_current_utc_time()
-        now_date = now.date()
+        now_date = self._get_current_utc_time().date()
         
-        members_to_thank = []
-        for user_id, username, joined_date_str, _, last_thanked_month in self._get_all_active_members():
-            if not joined_date_str: continue
-            
-            # Hitung selisih bulan
-            joined_date = datetime.strptime(joined_date_str.split()[0], '%Y-%m-%d').date()
-            month_diff = (now_date.year - joined_date.year) * 12 + now_date.month - joined_date.month
-            
-            # Check if: (1) It's been 1 month or more, AND (2) Today is their join date,
-            # AND (3) They haven't been thanked for this membership month yet.
-            if month_diff > 0 and now_date.day == joined_date.day and month_diff > last_thanked_month:
-                members_to_thank.append((user_id, username, month_diff))
+        # Member baru harus sudah ada di DB; pencocokan + penandaan dilakukan dalam satu UPDATE
+        self.member_store.flush()
+        members_to_thank = self._claim_anniversaries(now_date)
+        claimed = members_to_thank is not None
+        if not claimed:
+            # DB tidak tersedia: hitung dari member store
+            days = anniversary_days(now_date)
+            members_to_thank = []
+            for user_id, username, joined_at, _, last_thanked_month, status in self.member_store.all():
+                if not joined_at or status in INACTIVE_MEMBER_STATUSES: continue
+                joined_date = joined_at.astimezone(timezone.utc).date()
+                month_diff = (now_date.year - joined_date.year) * 12 + now_date.month - joined_date.month
+                if joined_date.day in days and month_diff > 0 and month_diff > last_thanked_month:
+                    members_to_thank.append((user_id, username, month_diff, last_thanked_month))
 
         if members_to_thank:
             message_parts = []
-            for user_id, username, months in members_to_thank:
+            for user_id, username, months, _ in members_to_thank:
                 mention = f"[{username or 'Fren'}](tg://user?id={user_id})"
                 thanks_message = random.choice(self.responses.get("MEMBERSHIP_ANNIVERSARY", [])).format(mention=mention, months=months)
                 message_parts.append(thanks_message)
-                
-                # Update DB: Mark as thanked for this month
-                self._update_member_info(user_id, last_thanked_month=months)
+
+            def on_sent(future):
+                if future.exception() is None:
+                    # Baru ditandai di member store setelah pesan benar-benar terkirim
+                    self.member_store.update_many({'user_id': user_id, 'last_thanked_month': months} for user_id, _, months, _ in members_to_thank)
+                    return
+                logger.error(f"Failed to send membership anniversary greetings: {future.exception()}")
+                if claimed:
+                    # Lepas klaim di DB supaya member ini dicoba lagi pada run berikutnya
+                    self._release_anniversaries(members_to_thank)
 
             final_message = "\n\n---\n\n".join(message_parts)
-            try:
-                self.bot.send_message(group_id, final_message, parse_mode="Markdown")
-                logger.info(f"Sent membership anniversary greetings for {len(members_to_thank)} members.")
-            except Exception as e:
-                logger.error(f"Failed to send membership anniversary greetings: {e}")
+            self.outbound.send_message(group_id, final_message, parse_mode="Markdown", priority=LOW, coalesce=True).add_done_callback(on_sent)
+            logger.info(f"Queued membership anniversary greetings for {len(members_to_thank)} members.")
                 
     def ask_for_birthdays(self):
         """Task 3: Asks for birthdays weekly."""
@@ -1001,8 +1522,8 @@ class BotLogic:
         
         message = random.choice(self.responses.get("BIRTHDAY_ASK", []))
         try:
-            self.bot.send_message(group_id, message, parse_mode="Markdown")
-            logger.info("Sent weekly birthday question.")
+            self.outbound.send_message(group_id, message, parse_mode="Markdown", priority=LOW, coalesce=True)
+            logger.info("Queued weekly birthday question.")
         except Exception as e:
             logger.error(f"Failed to send birthday question: {e}")
 
@@ -1011,21 +1532,12 @@ class BotLogic:
         group_id = Config.GROUP_CHAT_ID()
         if not group_id: return
         
-        # Get all valid members in the group to tag
-        all_members = self._get_all_active_members()
-        
-        # Filter for active members
-        valid_members = []
-        for user_id, username, _, _, _ in all_members:
-             try:
-                chat_member = self.bot.get_chat_member(group_id, user_id)
-                if chat_member.status in ['member', 'administrator', 'creator']:
-                    valid_members.append((user_id, username))
-             except:
-                continue
+        # Kandidat dipilih acak lebih dulu, lalu diverifikasi seperlunya (bukan get_chat_member untuk semua member)
+        eligible = [m for m in self.member_store.all() if m[5] not in INACTIVE_MEMBER_STATUSES]
+        candidates = random.sample(eligible, min(len(eligible), 5 * MEMBER_VERIFY_FACTOR))
 
         # Take 5 random tags (limited for API compliance/spam reduction)
-        tags_to_use = random.sample(valid_members, min(5, len(valid_members)))
+        tags_to_use = self._pick_active_members(group_id, candidates, 5)
         tags_list = [f"[{username or 'Fren'}](tg://user?id={user_id})" for user_id, username in tags_to_use]
         tags_string = " ".join(tags_list) if tags_list else "Frens"
 
@@ -1034,8 +1546,8 @@ class BotLogic:
         final_message = f"🚨 **ATTENTION NPEPE ARMY** 🚨\n\n{message_template.format(tags=tags_string)}"
 
         try:
-            self.bot.send_message(group_id, final_message, parse_mode="Markdown")
-            logger.info("Sent scheduled health reminder.")
+            self.outbound.send_message(group_id, final_message, parse_mode="Markdown", priority=LOW, coalesce=True)
+            logger.info("Queued scheduled health reminder.")
         except Exception as e:
             logger.error(f"Failed to send health reminder: {e}", exc_info=True)
             
@@ -1059,36 +1571,65 @@ class BotLogic:
             "COLLABORATION_RESPONSE": ("Produce 20 enthusiastic responses for a meme coin bot when someone asks about collaboration or marketing. Focus on community effort (raids, memes) over paid promotion. Use slang.", 15),
         }
         
-        for category, (prompt, min_count) in categories_to_renew.items():
+        # Semua kategori paralel (dibatasi AI_RENEWAL_CONCURRENCY); tiap kategori di-retry dan dipublikasikan sendiri
+        started = time.monotonic()
+        results = {}
+        with ThreadPoolExecutor(max_workers=Config.AI_RENEWAL_CONCURRENCY(), thread_name_prefix="ai-renewal") as pool:
+            futures = {pool.submit(self._renew_category, category, prompt, min_count): category for category, (prompt, min_count) in categories_to_renew.items()}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        elapsed = time.monotonic() - started
+        self.last_renewal = {
+            "finished_at": self._get_current_utc_time().isoformat(),
+            "duration_s": round(elapsed, 1),
+            "categories": results,
+        }
+        updated = sum(1 for result in results.values() if result["version"] is not None)
+        logger.info(f"AI response renewal finished: {updated}/{len(results)} categories updated in {elapsed:.1f}s.")
+
+    @staticmethod
+    def _parse_renewal_lines(category, text):
+        """Splits an AI reply into template lines, keeping only those usable for the category."""
+        lines = [line.strip() for line in re.split(r'\n|\d+\.', text or "") if line.strip() and len(line) > 5]
+        required = RENEWAL_PLACEHOLDERS.get(category)
+        if not required:
+            return list(dict.fromkeys(lines))
+        valid = []
+        for line in lines:
+            if not all(f"{{{name}}}" in line for name in required):
+                continue
             try:
-                logger.info(f"Requesting AI update for category: {category}...")
-                completion = self.groq_client.chat.completions.create(
-                    messages=[{"role": "system", "content": prompt}],
-                    model="llama3-8b-8192", temperature=1.0, max_tokens=2000
-                )
-                text = completion.choices[0].message.content
-                new_lines = [line.strip() for line in re.split(r'\n|\d+\.', text) if line.strip() and len(line) > 5]
-                
-                # Filter for required placeholders
-                placeholder_map = {
-                    "GREET_NEW_MEMBERS_DELAYED": '{name}', 
-                    "DAILY_GREETING": '{mention}', 
-                    "MEMBERSHIP_ANNIVERSARY": '{mention}', 
-                    "BIRTHDAY_GREETING": '{name}', 
-                    "HEALTH_REMINDER": '{tags}'
-                }
-                
-                placeholder = placeholder_map.get(category)
-                if placeholder:
-                    new_lines = [line for line in new_lines if placeholder in line]
-                    
-                if category == "MEMBERSHIP_ANNIVERSARY":
-                    new_lines = [line for line in new_lines if '{months}' in line]
+                # Kurung kurawal liar atau placeholder asing akan gagal saat dikirim, buang sekarang
+                line.format(**RENEWAL_SAMPLE_VALUES)
+            except (KeyError, IndexError, ValueError):
+                continue
+            valid.append(line)
+        return list(dict.fromkeys(valid))
 
+    def _renew_category(self, category, prompt, min_count):
+        """Generates, validates and publishes one category, retrying with backoff. Never raises."""
+        attempts = Config.AI_RENEWAL_RETRIES() + 1
+        started = time.monotonic()
+        for attempt in range(1, attempts + 1):
+            try:
+                logger.info(f"Requesting AI update for category: {category} (attempt {attempt}/{attempts})...")
+                with GROQ_LATENCY.time("renewal"):
+                    completion = self.groq_client.chat.completions.create(
+                        messages=[{"role": "system", "content": prompt}],
+                        model="llama3-8b-8192", temperature=1.0, max_tokens=2000,
+                        timeout=Config.AI_RENEWAL_TIMEOUT()
+                    )
+                record_groq_usage("renewal", completion.usage)
+                new_lines = self._parse_renewal_lines(category, completion.choices[0].message.content)
                 if len(new_lines) >= min_count:
-                    self.responses[category] = new_lines
-                    logger.info(f" ✅  Category '{category}' successfully updated by AI with {len(new_lines)} new entries.")
-                else:
-                    logger.warning(f" ⚠️  AI update for '{category}' only produced {len(new_lines)} lines (needed {min_count}); update skipped.")
+                    version = self.responses.publish(category, new_lines, source="ai")
+                    logger.info(f" ✅  Category '{category}' successfully updated by AI with {len(new_lines)} new entries (version {version}).")
+                    return {"version": version, "lines": len(new_lines), "attempts": attempt, "duration_s": round(time.monotonic() - started, 1)}
+                logger.warning(f" ⚠️  AI update for '{category}' only produced {len(new_lines)} valid lines (needed {min_count}).")
             except Exception as e:
-                logger.error(f" ❌  Failed to update category '{category}' with AI: {e}", exc_info=True)
+                logger.warning(f" ⚠️  AI update for '{category}' failed on attempt {attempt}/{attempts}: {e}")
+            if attempt < attempts:
+                # Backoff eksponensial dengan jitter supaya kategori yang gagal tidak menembak bersamaan
+                time.sleep(min(60.0, Config.AI_RENEWAL_BACKOFF() * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+        logger.error(f" ❌  Failed to update category '{category}' with AI after {attempts} attempts; keeping current version.")
+        return {"version": None, "lines": 0, "attempts": attempts, "duration_s": round(time.monotonic() - started, 1)}
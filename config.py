@@ -38,3 +38,179 @@ class Config:
     
     @staticmethod
     def TWITTER_URL(): return os.environ.get("TWITTER_URL", "https://x.com/NPEPE_Verse")
+
+    # --- Connection pool Postgres ---
+    @staticmethod
+    def DB_POOL_MIN_SIZE(): return int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+
+    @staticmethod
+    def DB_POOL_MAX_SIZE(): return int(os.environ.get("DB_POOL_MAX_SIZE", 5))
+
+    @staticmethod
+    def DB_POOL_TIMEOUT(): return float(os.environ.get("DB_POOL_TIMEOUT", 10))
+
+    @staticmethod
+    def DB_POOL_HEALTH_CHECK_INTERVAL(): return float(os.environ.get("DB_POOL_HEALTH_CHECK_INTERVAL", 30))
+
+    # --- Member store (write-behind) ---
+    @staticmethod
+    def MEMBER_FLUSH_INTERVAL(): return float(os.environ.get("MEMBER_FLUSH_INTERVAL", 30))
+
+    # --- Scheduler in-process ---
+    @staticmethod
+    def SCHEDULER_ENABLED(): return os.environ.get("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def SCHEDULER_WORKERS(): return int(os.environ.get("SCHEDULER_WORKERS", 2))
+
+    # --- Sapaan member baru (tertunda) ---
+    @staticmethod
+    def GREETING_DELAY(): return float(os.environ.get("GREETING_DELAY", 300))
+
+    @staticmethod
+    def GREETING_COALESCE_WINDOW(): return float(os.environ.get("GREETING_COALESCE_WINDOW", 30))
+
+    @staticmethod
+    def GREETING_BATCH_MAX_NAMES(): return int(os.environ.get("GREETING_BATCH_MAX_NAMES", 20))
+
+    # --- Pool worker jawaban AI ---
+    @staticmethod
+    def AI_WORKERS(): return int(os.environ.get("AI_WORKERS", 4))
+
+    @staticmethod
+    def AI_QUEUE_SIZE(): return int(os.environ.get("AI_QUEUE_SIZE", 20))
+
+    # --- Streaming jawaban AI ---
+    @staticmethod
+    def AI_STREAMING(): return os.environ.get("AI_STREAMING", "true").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def AI_STREAM_EDIT_INTERVAL(): return float(os.environ.get("AI_STREAM_EDIT_INTERVAL", 1.0))
+
+    @staticmethod
+    def AI_STREAM_GROUP_EDIT_INTERVAL(): return float(os.environ.get("AI_STREAM_GROUP_EDIT_INTERVAL", 3.0))
+
+    @staticmethod
+    def AI_STREAM_MIN_CHARS(): return int(os.environ.get("AI_STREAM_MIN_CHARS", 20))
+
+    # --- Pembaruan respons AI (mingguan) ---
+    @staticmethod
+    def AI_RENEWAL_CONCURRENCY(): return int(os.environ.get("AI_RENEWAL_CONCURRENCY", 4))
+
+    @staticmethod
+    def AI_RENEWAL_RETRIES(): return int(os.environ.get("AI_RENEWAL_RETRIES", 2))
+
+    @staticmethod
+    def AI_RENEWAL_BACKOFF(): return float(os.environ.get("AI_RENEWAL_BACKOFF", 5))
+
+    @staticmethod
+    def AI_RENEWAL_TIMEOUT(): return float(os.environ.get("AI_RENEWAL_TIMEOUT", 60))
+
+    # --- Cache jawaban AI ---
+    @staticmethod
+    def AI_CACHE_TTL(): return float(os.environ.get("AI_CACHE_TTL", 3600))
+
+    @staticmethod
+    def AI_CACHE_MAX_ENTRIES(): return int(os.environ.get("AI_CACHE_MAX_ENTRIES", 500))
+
+    @staticmethod
+    def AI_CACHE_MAX_BYTES(): return int(os.environ.get("AI_CACHE_MAX_BYTES", 1_000_000))
+
+    @staticmethod
+    def AI_CACHE_DROP_STOPWORDS(): return os.environ.get("AI_CACHE_DROP_STOPWORDS", "true").lower() in ("1", "true", "yes")
+
+    # --- Ingestion webhook ---
+    @staticmethod
+    def WEBHOOK_ASYNC(): return os.environ.get("WEBHOOK_ASYNC", "true").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def WEBHOOK_WORKERS(): return int(os.environ.get("WEBHOOK_WORKERS", 4))
+
+    @staticmethod
+    def WEBHOOK_QUEUE_SIZE(): return int(os.environ.get("WEBHOOK_QUEUE_SIZE", 1000))
+
+    @staticmethod
+    def WEBHOOK_SECRET_TOKEN(): return os.environ.get("WEBHOOK_SECRET_TOKEN")
+
+    @staticmethod
+    def WEBHOOK_ALLOWED_UPDATES(): return [u.strip() for u in os.environ.get("WEBHOOK_ALLOWED_UPDATES", "message,callback_query,chat_member,my_chat_member").split(",") if u.strip()]
+
+    # --- Perekam update (untuk replay / capacity planning) ---
+    @staticmethod
+    def UPDATE_RECORDER_ENABLED(): return os.environ.get("UPDATE_RECORDER_ENABLED", "false").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def UPDATE_RECORDER_PATH(): return os.environ.get("UPDATE_RECORDER_PATH", "updates.jsonl.gz")
+
+    @staticmethod
+    def UPDATE_RECORDER_SALT(): return os.environ.get("UPDATE_RECORDER_SALT")
+
+    @staticmethod
+    def UPDATE_RECORDER_MAX_BYTES(): return int(os.environ.get("UPDATE_RECORDER_MAX_BYTES", 100_000_000))
+
+    @staticmethod
+    def UPDATE_RECORDER_QUEUE_SIZE(): return int(os.environ.get("UPDATE_RECORDER_QUEUE_SIZE", 10000))
+
+    # --- Cache admin per chat ---
+    @staticmethod
+    def ADMIN_CACHE_TTL(): return float(os.environ.get("ADMIN_CACHE_TTL", 600))
+
+    @staticmethod
+    def ADMIN_CACHE_REFRESH_AHEAD(): return float(os.environ.get("ADMIN_CACHE_REFRESH_AHEAD", 0.8))
+
+    # --- Pengiriman keluar (rate limit Telegram) ---
+    @staticmethod
+    def OUTBOUND_GLOBAL_RATE(): return float(os.environ.get("OUTBOUND_GLOBAL_RATE", 30))
+
+    @staticmethod
+    def OUTBOUND_CHAT_RATE(): return float(os.environ.get("OUTBOUND_CHAT_RATE", 1))
+
+    @staticmethod
+    def OUTBOUND_GROUP_RATE_PER_MINUTE(): return float(os.environ.get("OUTBOUND_GROUP_RATE_PER_MINUTE", 20))
+
+    @staticmethod
+    def OUTBOUND_CHAT_BURST(): return int(os.environ.get("OUTBOUND_CHAT_BURST", 3))
+
+    @staticmethod
+    def OUTBOUND_WORKERS(): return int(os.environ.get("OUTBOUND_WORKERS", 4))
+
+    @staticmethod
+    def OUTBOUND_QUEUE_SIZE(): return int(os.environ.get("OUTBOUND_QUEUE_SIZE", 1000))
+
+    @staticmethod
+    def OUTBOUND_MAX_RETRIES(): return int(os.environ.get("OUTBOUND_MAX_RETRIES", 3))
+
+    # --- Koneksi HTTP keluar ---
+    @staticmethod
+    def TELEGRAM_POOL_SIZE(): return int(os.environ.get("TELEGRAM_POOL_SIZE", 8))
+
+    @staticmethod
+    def TELEGRAM_CONNECT_TIMEOUT(): return float(os.environ.get("TELEGRAM_CONNECT_TIMEOUT", 5))
+
+    @staticmethod
+    def TELEGRAM_READ_TIMEOUT(): return float(os.environ.get("TELEGRAM_READ_TIMEOUT", 30))
+
+    @staticmethod
+    def GROQ_MAX_CONNECTIONS(): return int(os.environ.get("GROQ_MAX_CONNECTIONS", 10))
+
+    @staticmethod
+    def GROQ_MAX_KEEPALIVE(): return int(os.environ.get("GROQ_MAX_KEEPALIVE", 5))
+
+    @staticmethod
+    def GROQ_KEEPALIVE_EXPIRY(): return float(os.environ.get("GROQ_KEEPALIVE_EXPIRY", 60))
+
+    @staticmethod
+    def GROQ_CONNECT_TIMEOUT(): return float(os.environ.get("GROQ_CONNECT_TIMEOUT", 5))
+
+    @staticmethod
+    def GROQ_READ_TIMEOUT(): return float(os.environ.get("GROQ_READ_TIMEOUT", 15))
+
+    @staticmethod
+    def GROQ_HTTP2(): return os.environ.get("GROQ_HTTP2", "false").lower() in ("1", "true", "yes")
+
+    # --- Korpus respons ---
+    @staticmethod
+    def RESPONSE_REFRESH_INTERVAL(): return float(os.environ.get("RESPONSE_REFRESH_INTERVAL", 300))
+
+    @staticmethod
+    def RESPONSE_KEEP_VERSIONS(): return int(os.environ.get("RESPONSE_KEEP_VERSIONS", 5))
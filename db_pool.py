@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Status transaksi psycopg2 (psycopg2.extensions.TRANSACTION_STATUS_*), diduplikasi
+# di sini supaya modul ini tetap bisa di-import tanpa psycopg2.
+TRANSACTION_STATUS_IDLE = 0
+TRANSACTION_STATUS_UNKNOWN = 4
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections (psycopg2) shared by all BotLogic persistence helpers.
+
+    - Keeps between `min_size` and `max_size` connections open; callers block when the pool is exhausted.
+    - Connections idle for longer than `health_check_interval` are pinged with `SELECT 1` on checkout
+      and transparently replaced when the ping fails (stale TCP session, server restart, failover).
+    - Connections are rolled back on return so a helper can never leak an open transaction.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=5, checkout_timeout=10.0, health_check_interval=30.0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Condition(threading.Lock())
+        self._idle = deque()  # (conn, last_used_monotonic)
+        self._size = 0        # koneksi terbuka (idle + sedang dipinjam)
+        self._closed = False
+
+        # Statistik
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._connect_errors = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+        for _ in range(self.min_size):
+            try:
+                conn = self._open()
+            except Exception as e:
+                logger.error(f"DB pool warm-up failed: {e}")
+                break
+            self._idle.append((conn, time.monotonic()))
+
+    # --- internal ---
+
+    def _open(self):
+        with self._lock:
+            self._size += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._connect_errors += 1
+                self._lock.notify()
+            raise
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._lock.notify()
+
+    def _is_healthy(self, conn, last_used):
+        if getattr(conn, "closed", 0):
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"DB pool health check failed, reconnecting: {e}")
+            return False
+
+    # --- public API ---
+
+    def getconn(self):
+        """Borrow a healthy connection, waiting up to `checkout_timeout` seconds."""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        waited = False
+        while True:
+            candidate = None
+            open_new = False
+            with self._lock:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed.")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(f"No DB connection available after {self.checkout_timeout}s (max_size={self.max_size}).")
+                    if not waited:
+                        waited = True
+                        self._waits += 1
+                    self._lock.wait(remaining)
+                if self._idle:
+                    candidate = self._idle.pop()  # LIFO: koneksi paling "hangat" dipakai duluan
+                else:
+                    open_new = True
+
+            if open_new:
+                conn = self._open()
+            else:
+                conn, last_used = candidate
+                if not self._is_healthy(conn, last_used):
+                    self._discard(conn)
+                    with self._lock:
+                        self._reconnects += 1
+                    continue
+
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._checkouts += 1
+                self._checkout_time_total += elapsed
+                self._checkout_time_max = max(self._checkout_time_max, elapsed)
+            return conn
+
+    def putconn(self, conn):
+        """Return a borrowed connection; broken or mid-transaction connections are cleaned up or dropped."""
+        if conn is None:
+            return
+        reusable = not getattr(conn, "closed", 0)
+        if reusable:
+            try:
+                status = conn.get_transaction_status() if hasattr(conn, "get_transaction_status") else TRANSACTION_STATUS_IDLE
+                if status == TRANSACTION_STATUS_UNKNOWN:
+                    reusable = False
+                elif status != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                reusable = False
+
+        with self._lock:
+            if reusable and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                self._lock.notify()
+                return
+        self._discard(conn)
+
+    def closeall(self):
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._lock.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+                "connect_errors": self._connect_errors,
+                "avg_checkout_ms": round(self._checkout_time_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "max_checkout_ms": round(self._checkout_time_max * 1000, 3),
+            }
@@ -0,0 +1,189 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PendingGreeting:
+    __slots__ = ('due_at', 'chat_id', 'user_id', 'first_name', 'attempts')
+
+    def __init__(self, due_at, chat_id, user_id, first_name):
+        self.due_at = due_at  # epoch seconds
+        self.chat_id = chat_id
+        self.user_id = user_id
+        self.first_name = first_name
+        self.attempts = 0
+
+
+class DelayedGreetingQueue:
+    """
+    One worker thread holding every pending welcome in a min-heap ordered by due time
+    (replaces one threading.Timer per new member).
+
+    When the earliest greeting is due, every greeting due within the next `coalesce_window` seconds is
+    taken as well and grouped per chat, so a join wave becomes a few batched welcomes instead of one
+    message per member. Entries are persisted through `persist`/`remove` and reloaded with `load` so a
+    restart does not drop greetings.
+
+    deliver(chat_id, [PendingGreeting, ...]) sends one batched welcome. It either raises, or returns
+    a Future (e.g. from the outbound dispatcher) whose outcome decides. Only delivered chunks are
+    removed from storage; a failed chunk is re-queued with exponential backoff (`retry_delay` doubling
+    per attempt) and dropped after `max_attempts`.
+    """
+
+    def __init__(self, deliver, persist=None, remove=None, load=None, delay=300.0, coalesce_window=30.0, max_batch=20,
+                 retry_delay=60.0, max_attempts=5):
+        self._deliver = deliver
+        self._persist = persist
+        self._remove = remove
+        self._load = load
+        self.delay = delay
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self._delivered = 0
+        self._batches = 0
+        self._retried = 0
+        self._failed = 0
+
+    def start(self):
+        if self._load:
+            try:
+                restored = list(self._load())
+            except Exception as e:
+                logger.error(f"Failed to restore pending greetings: {e}")
+                restored = []
+            with self._cond:
+                for greeting in restored:
+                    heapq.heappush(self._heap, (greeting.due_at, next(self._seq), greeting))
+            if restored:
+                logger.info(f"Restored {len(restored)} pending greeting(s).")
+        self._thread = threading.Thread(target=self._run, name="greeting-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # Antrian yang tersisa sudah tersimpan di DB dan akan dimuat ulang saat start berikutnya
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def schedule(self, chat_id, members):
+        """Queue a welcome for each (user_id, first_name) in `members`, due `delay` seconds from now."""
+        due_at = time.time() + self.delay
+        greetings = [PendingGreeting(due_at, chat_id, user_id, first_name) for user_id, first_name in members]
+        if not greetings:
+            return
+        if self._persist:
+            try:
+                self._persist(greetings)
+            except Exception as e:
+                logger.error(f"Failed to persist pending greetings: {e}")
+        with self._cond:
+            for greeting in greetings:
+                heapq.heappush(self._heap, (greeting.due_at, next(self._seq), greeting))
+            self._cond.notify()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _take_due_batch(self):
+        """Pop everything due up to (earliest due + coalesce_window). Caller holds the lock."""
+        horizon = self._heap[0][0] + self.coalesce_window
+        batch = []
+        while self._heap and self._heap[0][0] <= horizon:
+            batch.append(heapq.heappop(self._heap)[2])
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._heap:
+                        delay = self._heap[0][0] - time.time()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                if self._stopped:
+                    return
+                batch = self._take_due_batch()
+
+            by_chat = {}
+            for greeting in batch:
+                by_chat.setdefault(greeting.chat_id, []).append(greeting)
+            for chat_id, greetings in by_chat.items():
+                for i in range(0, len(greetings), self.max_batch):
+                    self._deliver_chunk(chat_id, greetings[i:i + self.max_batch])
+
+    def _deliver_chunk(self, chat_id, chunk):
+        try:
+            result = self._deliver(chat_id, chunk)
+        except Exception as e:
+            self._finish(chat_id, chunk, e)
+            return
+        if hasattr(result, 'add_done_callback'):
+            # Pengiriman asinkron (outbound dispatcher): hasil baru diketahui saat future selesai
+            result.add_done_callback(lambda future: self._finish(chat_id, chunk, future.exception()))
+        else:
+            self._finish(chat_id, chunk, None)
+
+    def _finish(self, chat_id, chunk, error):
+        if error is None:
+            with self._cond:
+                self._delivered += len(chunk)
+                self._batches += 1
+            self._forget(chunk)
+            return
+        attempts = chunk[0].attempts + 1
+        if attempts >= self.max_attempts:
+            logger.error(f"Giving up on delayed greeting batch to {chat_id} after {attempts} attempts: {error}")
+            with self._cond:
+                self._failed += len(chunk)
+            self._forget(chunk)
+            return
+        retry_in = self.retry_delay * 2 ** (attempts - 1)
+        logger.warning(f"Failed to deliver delayed greeting batch to {chat_id} ({error}); retrying in {retry_in:g}s.")
+        due_at = time.time() + retry_in
+        for greeting in chunk:
+            greeting.attempts = attempts
+            greeting.due_at = due_at
+        if self._persist:
+            try:
+                self._persist(chunk)
+            except Exception as e:
+                logger.error(f"Failed to persist pending greetings: {e}")
+        with self._cond:
+            self._retried += len(chunk)
+            for greeting in chunk:
+                heapq.heappush(self._heap, (greeting.due_at, next(self._seq), greeting))
+            self._cond.notify()
+
+    def _forget(self, chunk):
+        if self._remove:
+            try:
+                self._remove(chunk)
+            except Exception as e:
+                logger.error(f"Failed to clear delivered greetings: {e}")
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": len(self._heap),
+                "delivered": self._delivered,
+                "batches": self._batches,
+                "retried": self._retried,
+                "failed": self._failed,
+                "next_due_in_s": round(self._heap[0][0] - time.time(), 1) if self._heap else None,
+            }
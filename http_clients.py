@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from telebot import apihelper
+
+from metrics import TELEGRAM_ERRORS, TELEGRAM_LATENCY
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+try:
+    import h2  # noqa: F401  (httpx hanya mendukung HTTP/2 bila paket h2 terpasang)
+except ImportError:
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================
+#   📡   SESSION TELEGRAM (requests)
+# ==========================
+
+class TelegramSession:
+    """
+    One keep-alive requests.Session shared by every pyTelegramBotAPI call.
+
+    apihelper normally keeps a session per thread (and can recycle it via SESSION_TIME_TO_LIVE); here a
+    single session with a sized HTTPAdapter is installed as apihelper.session so all worker threads share
+    one urllib3 pool of warm TLS connections to api.telegram.org. Connect and read timeouts are set
+    separately through apihelper.CONNECT_TIMEOUT / READ_TIMEOUT. Every call goes through
+    apihelper.CUSTOM_REQUEST_SENDER so latency and error codes are recorded per Bot API method.
+    """
+
+    def __init__(self, pool_size=8, connect_timeout=5.0, read_timeout=30.0):
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, pool_block=False, max_retries=0)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    def install(self):
+        apihelper.session = self.session
+        apihelper.SESSION_TIME_TO_LIVE = None  # jangan pernah membuang koneksi yang masih hangat
+        apihelper.CONNECT_TIMEOUT = self.connect_timeout
+        apihelper.READ_TIMEOUT = self.read_timeout
+        apihelper.CUSTOM_REQUEST_SENDER = self.request
+        logger.info(f"Telegram HTTP session installed (pool={self.pool_size}, connect={self.connect_timeout}s, read={self.read_timeout}s).")
+        return self
+
+    def request(self, method, url, **kwargs):
+        api_method = url.rsplit('/', 1)[-1]  # .../bot<token>/sendMessage
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception as e:
+            TELEGRAM_ERRORS.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            TELEGRAM_LATENCY.observe(time.perf_counter() - started, api_method)
+        if response.status_code != 200:
+            TELEGRAM_ERRORS.inc(api_method, str(response.status_code))
+        return response
+
+    def stats(self):
+        # num_connections/num_requests dihitung oleh urllib3 per host pool
+        connections = requests_count = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            requests_count += pool.num_requests
+        return {
+            "pool_size": self.pool_size,
+            "host_pools": len(pools),
+            "connections_opened": connections,
+            "requests": requests_count,
+            "reuse_ratio": round(1 - connections / requests_count, 3) if requests_count else 0.0,
+        }
+
+
+# ==========================
+#   🤖   CLIENT GROQ (httpx)
+# ==========================
+
+class GroqHttpClient:
+    """
+    httpx.Client for the Groq SDK with explicit pool limits and timeouts, optional HTTP/2 (only when
+    the `h2` package is installed) and connection-reuse counters fed by httpcore trace events.
+    """
+
+    def __init__(self, max_connections=10, max_keepalive=5, keepalive_expiry=60.0, connect_timeout=5.0, read_timeout=15.0, http2=False):
+        if http2 and h2 is None:
+            logger.warning("GROQ_HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1.")
+            http2 = False
+        self.http2 = http2
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections_opened = 0
+        self._http2_responses = 0
+        self.client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive, keepalive_expiry=keepalive_expiry),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            http2=http2,
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+
+    def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections_opened += 1
+
+    def _on_request(self, request):
+        request.extensions["trace"] = self._trace
+        with self._lock:
+            self._requests += 1
+
+    def _on_response(self, response):
+        if response.extensions.get("http_version") == b"HTTP/2":
+            with self._lock:
+                self._http2_responses += 1
+
+    def close(self):
+        self.client.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "http2": self.http2,
+                "requests": self._requests,
+                "connections_opened": self._connections_opened,
+                "http2_responses": self._http2_responses,
+                "reuse_ratio": round(1 - self._connections_opened / self._requests, 3) if self._requests else 0.0,
+            }
@@ -0,0 +1,75 @@
+import re
+import threading
+
+
+class Intent:
+    __slots__ = ('name', 'handler', 'patterns', 'priority', 'chat_types', 'predicate', 'regex')
+
+    def __init__(self, name, handler, patterns=(), priority=0, chat_types=None, predicate=None):
+        self.name = name
+        self.handler = handler
+        self.patterns = tuple(p.lower() for p in patterns)
+        self.priority = priority
+        self.chat_types = frozenset(chat_types) if chat_types else None
+        self.predicate = predicate
+        self.regex = None
+        if self.patterns:
+            # Pola terpanjang dulu supaya "buy npepe" tidak kalah oleh pola yang lebih pendek
+            alternatives = "|".join(re.escape(p) for p in sorted(self.patterns, key=len, reverse=True))
+            self.regex = re.compile(f"(?<!\\w)(?:{alternatives})(?!\\w)")
+
+    def allows(self, chat_type):
+        return self.chat_types is None or chat_type in self.chat_types
+
+    def matches(self, text, lower_text):
+        if self.regex is not None:
+            return self.regex.search(lower_text) is not None
+        return self.predicate(text)
+
+
+class IntentRouter:
+    """
+    Declarative replacement for the chain of `any(kw in lower_text ...)` checks in handle_all_text.
+
+    Each keyword intent is compiled into its own alternation with word boundaries ("ca" no
+    longer matches "because" or "local"). Intents are tried from highest to lowest priority and routing
+    stops at the first match, so a lower-priority keyword can never shadow a higher-priority one and
+    lower intents are not searched at all once one matched. Intents without patterns use a
+    `predicate(text)` instead (e.g. the question heuristic), evaluated only when no higher-priority
+    intent matched. Exactly one handler runs per message, as in the original if/elif chain.
+    """
+
+    def __init__(self):
+        self._intents = []
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def add(self, name, handler, patterns=(), priority=0, chat_types=None, predicate=None):
+        if not patterns and predicate is None:
+            raise ValueError(f"Intent '{name}' needs patterns or a predicate.")
+        intent = Intent(name, handler, patterns, priority, chat_types, predicate)
+        with self._lock:
+            self._intents = sorted(self._intents + [intent], key=lambda i: -i.priority)
+            self._counts.setdefault(name, 0)
+        return intent
+
+    def match(self, text, lower_text, chat_type):
+        """The highest-priority intent matching a message, or None."""
+        for intent in self._intents:
+            if intent.allows(chat_type) and intent.matches(text, lower_text):
+                return intent
+        return None
+
+    def dispatch(self, message, text, lower_text):
+        """Run the best matching intent handler; True when one handled the message."""
+        intent = self.match(text, lower_text, message.chat.type)
+        if intent is None:
+            return False
+        intent.handler(message, text)
+        with self._lock:
+            self._counts[intent.name] += 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {"intents": [i.name for i in self._intents], "handled": dict(self._counts)}
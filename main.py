@@ -1,10 +1,17 @@
 import os
+import sys
+import signal
+import atexit
 import logging
 import time
-from flask import Flask, request, abort
+from flask import Flask, Response, request, abort, jsonify
 import telebot
 from bot_logic import BotLogic
 from config import Config
+from workers import KeyedWorkerPool, REJECTED
+from http_clients import TelegramSession
+from update_recorder import UpdateRecorder
+from metrics import CONTENT_TYPE, HANDLER_LATENCY, REGISTRY, WEBHOOK_LATENCY
 from waitress import serve
 
 logging.basicConfig(
@@ -16,47 +23,123 @@ Logger = logging.getLogger(__name__)
 App = Flask(__name__)
 Bot = None
 Bot_logic = None
+Update_pool = None
+Telegram_http = None
+Update_recorder = None
 
 # Initialize Bot
 # FIX: Using lowercase 'try'
 try: 
     # FIX: Using lowercase 'if'
     if all([Config.BOT_TOKEN(), Config.WEBHOOK_BASE_URL(), Config.DATABASE_URL()]):
+        # Satu session keep-alive untuk semua panggilan Bot API (dipasang sebelum panggilan pertama)
+        Telegram_http = TelegramSession(
+            pool_size=Config.TELEGRAM_POOL_SIZE(), connect_timeout=Config.TELEGRAM_CONNECT_TIMEOUT(), read_timeout=Config.TELEGRAM_READ_TIMEOUT()
+        ).install()
         Bot = telebot.TeleBot(Config.BOT_TOKEN(), threaded=False)
         Bot_logic = BotLogic(Bot) 
+        if Config.WEBHOOK_ASYNC():
+            # Update diproses di background, berurutan per chat; route webhook hanya validasi + enqueue
+            Update_pool = KeyedWorkerPool(workers=Config.WEBHOOK_WORKERS(), max_queue=Config.WEBHOOK_QUEUE_SIZE(), name="update-worker")
+            atexit.register(Update_pool.stop)
+        if Config.UPDATE_RECORDER_ENABLED():
+            # Update yang masuk dicatat (anonim, gzip, append-only) untuk replay beban
+            Update_recorder = UpdateRecorder(
+                Config.UPDATE_RECORDER_PATH(), salt=Config.UPDATE_RECORDER_SALT(),
+                max_bytes=Config.UPDATE_RECORDER_MAX_BYTES(), max_queue=Config.UPDATE_RECORDER_QUEUE_SIZE()
+            )
+            Update_recorder.start()
+            atexit.register(Update_recorder.stop)
     # FIX: Using lowercase 'else'
     else:
         Logger.critical("FATAL: Essential environment variables not found.")
 except Exception as e:
     Logger.critical(f"Error occurred during bot initialization: {e}", exc_info=True)
 
+def update_chat_key(update):
+    """Ordering key for an update: its chat id, so messages of one chat are handled in order."""
+    for container in (update.message, update.edited_message, update.channel_post, update.edited_channel_post,
+                      update.chat_member, update.my_chat_member, update.chat_join_request):
+        if container is not None and getattr(container, 'chat', None) is not None:
+            return container.chat.id
+    if update.callback_query is not None:
+        if update.callback_query.message is not None:
+            return update.callback_query.message.chat.id
+        return update.callback_query.from_user.id
+    return update.update_id
+
+def process_update(update):
+    with HANDLER_LATENCY.time("process_update"):
+        Bot.process_new_updates([update])
+
+# Latensi webhook (termasuk 403/503), dicatat per status HTTP
+@App.before_request
+def start_request_timer():
+    request.environ['npepe.started'] = time.perf_counter()
+
+@App.after_request
+def record_request_latency(response):
+    if request.endpoint == 'webhook':
+        WEBHOOK_LATENCY.observe(time.perf_counter() - request.environ['npepe.started'], str(response.status_code))
+    return response
+
 # Webhook for Telegram
 @App.route(f'/{Config.BOT_TOKEN()}', methods=['POST'])
 def webhook():
     if Bot_logic and request.headers.get('content-type') == 'application/json':
+        if Config.WEBHOOK_SECRET_TOKEN() and request.headers.get('X-Telegram-Bot-Api-Secret-Token') != Config.WEBHOOK_SECRET_TOKEN():
+            abort(403)
         try:
-            # FIX: Removed Bot_logic.check_and_run_schedules() here to prevent blocking Waitress
-            # and only process the incoming Telegram update.
-            
             Json_string = request.get_data().decode('utf-8')
             Update = telebot.types.Update.de_json(Json_string)
-            Bot.process_new_updates([Update])
+        except Exception as e:
+            # Update rusak tidak akan membaik kalau di-retry oleh Telegram: akui saja dan log
+            Logger.error(f"Invalid update received in webhook: {e}", exc_info=True)
+            return "OK", 200
+        if Update is None or Update.update_id is None:
+            Logger.warning("Webhook received a payload without update_id; ignoring.")
+            return "OK", 200
+        if Update_recorder:
+            Update_recorder.record(Json_string)
+        
+        if Update_pool:
+            if Update_pool.submit(update_chat_key(Update), process_update, Update) == REJECTED:
+                # Antrian penuh: minta Telegram mengirim ulang nanti
+                Logger.warning(f"Update queue full; rejecting update {Update.update_id} for redelivery.")
+                return "Busy", 503
+            return "OK", 200
+        
+        try:
+            process_update(Update)
         except Exception as e:
             Logger.error(f"Exception in webhook: {e}", exc_info=True)
         return "OK", 200
     else:
         abort(403)
 
-# New, minimal Health Check Endpoint
+# Minimal liveness probe for the Uptime Monitor.
+# Scheduled tasks run on BotLogic's in-process scheduler, so this does no work.
 @App.route('/health', methods=['GET'])
 def health_check():
-    Logger.info("Ping 'Health Check' received.")
-    if Bot_logic:
-        # Scheduled tasks are run here, triggered by the Uptime Monitor ping.
-        Bot_logic.check_and_run_schedules()
     # Returns "204 No Content"
     return "", 204
 
+# Internal counters (DB pool, queues, caches) for debugging production behavior
+@App.route('/stats', methods=['GET'])
+def stats():
+    if not Bot_logic:
+        return jsonify({}), 503
+    Stats = Bot_logic.get_runtime_stats()
+    Stats["update_pool"] = Update_pool.stats() if Update_pool else None
+    Stats["telegram_http"] = Telegram_http.stats() if Telegram_http else None
+    Stats["update_recorder"] = Update_recorder.stats() if Update_recorder else None
+    return jsonify(Stats), 200
+
+# Prometheus scrape endpoint (always on; counters live in metrics.py)
+@App.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 # Home page
 @App.route('/')
 def index():
@@ -65,13 +148,15 @@ def index():
 # Function to run the server
 if __name__ == "__main__":
     Port = int(os.environ.get("PORT", 10000))
+    # Render sends SIGTERM on redeploy: turn it into SystemExit so atexit hooks (member store flush) still run
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     if Bot and Bot_logic:
         Webhook_url = f"{Config.WEBHOOK_BASE_URL()}/{Config.BOT_TOKEN()}"
         Logger.info("Starting bot and setting webhook...")
         try:
             Bot.remove_webhook()
             time.sleep(0.5)
-            Success = Bot.set_webhook(url=Webhook_url)
+            Success = Bot.set_webhook(url=Webhook_url, secret_token=Config.WEBHOOK_SECRET_TOKEN(), allowed_updates=Config.WEBHOOK_ALLOWED_UPDATES())
             if Success:
                 Logger.info("✅ Webhook successfully set.")
             else:
@@ -0,0 +1,147 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Status keanggotaan Telegram (ChatMember.status); None = belum diketahui
+ACTIVE_MEMBER_STATUSES = ('member', 'administrator', 'creator')
+INACTIVE_MEMBER_STATUSES = ('left', 'kicked')
+
+
+class MemberRecord:
+    """One row of the `members` table kept in memory."""
+    __slots__ = ('user_id', 'username', 'joined_date', 'last_interacted_date', 'last_thanked_month', 'status')
+
+    def __init__(self, user_id, username=None, joined_date=None, last_interacted_date=None, last_thanked_month=0, status=None):
+        self.user_id = user_id
+        self.username = username
+        self.joined_date = joined_date
+        self.last_interacted_date = last_interacted_date
+        self.last_thanked_month = last_thanked_month or 0
+        self.status = status
+
+    def as_row(self):
+        return (self.user_id, self.username, self.joined_date, self.last_interacted_date, self.last_thanked_month, self.status)
+
+    def as_update(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class MemberStore:
+    """
+    Write-behind, in-process copy of the `members` table.
+
+    Records are loaded once at startup through `loader` (an iterable of rows in `members` column order).
+    Updates are applied in memory and the touched user_ids are added to a dirty set; a background
+    thread hands the dirty records to `writer` (a batch upsert returning True on success) every
+    `flush_interval` seconds, and once more on `stop()`.
+    """
+
+    def __init__(self, loader, writer, flush_interval=30.0):
+        self._loader = loader
+        self._writer = writer
+        self.flush_interval = flush_interval
+        self._records = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._flushes = 0
+        self._flush_failures = 0
+        self._rows_flushed = 0
+
+    def load(self):
+        records = {}
+        for row in self._loader():
+            record = MemberRecord(*row)
+            records[record.user_id] = record
+        with self._lock:
+            # Jangan timpa perubahan yang masuk sebelum load selesai
+            for user_id in self._dirty:
+                if user_id in self._records:
+                    records[user_id] = self._records[user_id]
+            self._records = records
+        logger.info(f"Member store loaded {len(records)} members into memory.")
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, user_id):
+        with self._lock:
+            record = self._records.get(user_id)
+            return record.as_row() if record else None
+
+    def all(self):
+        """Snapshot of every member as `(user_id, username, joined_date, last_interacted_date, last_thanked_month, status)`."""
+        with self._lock:
+            return [record.as_row() for record in self._records.values()]
+
+    def update(self, user_id, **fields):
+        """Partial update; None values keep the current value, like the SQL upsert."""
+        with self._lock:
+            self._apply(user_id, fields)
+
+    def update_many(self, updates):
+        with self._lock:
+            for update in updates:
+                self._apply(update['user_id'], update)
+
+    def _apply(self, user_id, fields):
+        record = self._records.get(user_id)
+        if record is None:
+            record = self._records[user_id] = MemberRecord(user_id)
+        for field, value in fields.items():
+            if field != 'user_id' and value is not None:
+                setattr(record, field, value)
+        self._dirty.add(user_id)
+
+    def flush(self):
+        """Persist all dirty records in one batch. Failed batches are re-queued for the next flush."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return 0
+                dirty, self._dirty = self._dirty, set()
+                updates = [self._records[user_id].as_update() for user_id in dirty if user_id in self._records]
+            ok = False
+            try:
+                ok = self._writer(updates)
+            except Exception as e:
+                logger.error(f"Member store flush failed: {e}", exc_info=True)
+            if not ok:
+                with self._lock:
+                    self._dirty |= dirty
+                    self._flush_failures += 1
+                return 0
+            with self._lock:
+                self._flushes += 1
+                self._rows_flushed += len(updates)
+            return len(updates)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="member-store-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "members": len(self._records),
+                "dirty": len(self._dirty),
+                "flushes": self._flushes,
+                "flush_failures": self._flush_failures,
+                "rows_flushed": self._rows_flushed,
+            }
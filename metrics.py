@@ -0,0 +1,165 @@
+import bisect
+import functools
+import threading
+import time
+
+# ==========================
+#   📈   METRIK (format teks Prometheus)
+# ==========================
+# Implementasi kecil tanpa dependensi: counter dan histogram dengan label tetap, cukup murah
+# (satu lock + bisect per observasi) untuk selalu aktif di produksi.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TASK_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [jumlah per bucket..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def collect(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {values[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {values[-1]}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+def timed(histogram, *labels):
+    """Decorator: records the wall time of every call in `histogram` (exceptions included)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, *labels)
+        return wrapper
+    return decorator
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Webhook & handler ---
+WEBHOOK_LATENCY = REGISTRY.register(Histogram("npepe_webhook_request_seconds", "Webhook request latency.", ("status",)))
+HANDLER_LATENCY = REGISTRY.register(Histogram("npepe_handler_seconds", "Telegram update handler latency.", ("handler",)))
+MODERATION_VERDICTS = REGISTRY.register(Counter("npepe_moderation_verdicts_total", "Moderation verdicts for group messages.", ("action", "reason")))
+
+# --- Database ---
+DB_HELPER_LATENCY = REGISTRY.register(Histogram("npepe_db_helper_seconds", "Time a DB helper holds a pooled connection, including checkout.", ("helper",)))
+
+# --- Groq ---
+GROQ_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+GROQ_LATENCY = REGISTRY.register(Histogram("npepe_groq_request_seconds", "Groq chat completion latency (full response).", ("purpose",), buckets=GROQ_BUCKETS))
+GROQ_FIRST_TOKEN = REGISTRY.register(Histogram("npepe_groq_first_token_seconds", "Time to the first streamed token of an AI answer.", buckets=GROQ_BUCKETS))
+GROQ_TOKENS = REGISTRY.register(Counter("npepe_groq_tokens_total", "Groq tokens used.", ("purpose", "kind")))
+
+# --- Telegram Bot API ---
+TELEGRAM_LATENCY = REGISTRY.register(Histogram("npepe_telegram_request_seconds", "Telegram Bot API call latency.", ("method",)))
+TELEGRAM_ERRORS = REGISTRY.register(Counter("npepe_telegram_errors_total", "Telegram Bot API calls that failed, by HTTP status or exception.", ("method", "code")))
+
+# --- Tugas terjadwal ---
+TASK_DURATION = REGISTRY.register(Histogram("npepe_scheduled_task_seconds", "Scheduled task duration.", ("task", "outcome"), buckets=TASK_BUCKETS))
+
+
+def record_groq_usage(purpose, usage):
+    """Adds prompt/completion token counts from a Groq `usage` object (may be None)."""
+    if usage is None:
+        return
+    if usage.prompt_tokens:
+        GROQ_TOKENS.inc(purpose, "prompt", amount=usage.prompt_tokens)
+    if usage.completion_tokens:
+        GROQ_TOKENS.inc(purpose, "completion", amount=usage.completion_tokens)
@@ -0,0 +1,125 @@
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+Migration = namedtuple('Migration', ['version', 'description', 'statements'])
+
+# Kunci pg_advisory_xact_lock: hanya satu instance yang menjalankan migrasi pada satu waktu
+MIGRATION_LOCK_ID = 0x6E70657065  # "npepe"
+
+# ==========================
+#   🗄️   DAFTAR MIGRASI
+# ==========================
+# Versi hanya boleh ditambah, jangan mengubah migrasi yang sudah dirilis.
+
+MIGRATIONS = (
+    Migration(1, "baseline schema", (
+        # Idempoten: database lama sudah punya tabel-tabel ini dari _ensure_db_*_exists
+        "CREATE TABLE IF NOT EXISTS schedule_log (task_name TEXT PRIMARY KEY, last_run_date TEXT)",
+        """
+        CREATE TABLE IF NOT EXISTS members (
+            user_id BIGINT PRIMARY KEY,
+            username TEXT,
+            joined_date TEXT,
+            last_interacted_date TEXT,
+            last_thanked_month INTEGER DEFAULT 0,
+            status TEXT
+        )
+        """,
+        "ALTER TABLE members ADD COLUMN IF NOT EXISTS status TEXT",
+        """
+        CREATE TABLE IF NOT EXISTS pending_greetings (
+            chat_id BIGINT,
+            user_id BIGINT,
+            first_name TEXT,
+            due_at TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (chat_id, user_id)
+        )
+        """,
+    )),
+    Migration(2, "native timestamps for member dates and rotation index", (
+        # Nilai lama ditulis sebagai '%Y-%m-%d %H:%M:%S' dalam UTC
+        """
+        ALTER TABLE members
+            ALTER COLUMN joined_date TYPE TIMESTAMPTZ USING NULLIF(joined_date, '')::timestamp AT TIME ZONE 'UTC',
+            ALTER COLUMN last_interacted_date TYPE TIMESTAMPTZ USING NULLIF(last_interacted_date, '')::timestamp AT TIME ZONE 'UTC'
+        """,
+        # last_run_date tetap TEXT: isinya kunci periode ('2024-05-01', '2024-W17', '2024-05'), bukan tanggal
+        "ALTER TABLE schedule_log ADD COLUMN IF NOT EXISTS last_run_at TIMESTAMPTZ",
+        "DROP INDEX IF EXISTS members_last_interacted_idx",
+        "CREATE INDEX members_last_interacted_idx ON members (last_interacted_date ASC NULLS FIRST)",
+    )),
+    Migration(3, "generated join_day column for the daily anniversary job", (
+        """
+        ALTER TABLE members ADD COLUMN join_day SMALLINT
+            GENERATED ALWAYS AS (EXTRACT(DAY FROM joined_date AT TIME ZONE 'UTC')::smallint) STORED
+        """,
+        "CREATE INDEX members_join_day_idx ON members (join_day)",
+        # Tugas bulanan diganti daily_anniversary_check; marker lama ('YYYY-MM') tidak berlaku lagi
+        "DELETE FROM schedule_log WHERE task_name = 'monthly_anniversary_check'",
+    )),
+    Migration(4, "versioned response corpus", (
+        """
+        CREATE TABLE response_corpus (
+            category TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            lines TEXT[] NOT NULL,
+            source TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (category, version)
+        )
+        """,
+    )),
+)
+
+
+def _current_version(cursor):
+    cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    """
+    Brings the schema up to the latest migration and returns (version_before, version_after).
+
+    When the recorded version is already current this is a single read-only query, so a normal boot
+    runs no DDL. Otherwise all pending migrations are applied in one transaction under an advisory
+    lock (DDL is transactional in Postgres), and each applied version is recorded in schema_version.
+    """
+    target = migrations[-1].version if migrations else 0
+    with conn.cursor() as cursor:
+        version = _current_version(cursor)
+    conn.commit()
+    if version >= target:
+        return version, version
+
+    before = version
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """)
+            # Instance lain mungkin sudah menyelesaikan migrasi sambil kita menunggu lock
+            version = _current_version(cursor)
+            for migration in migrations:
+                if migration.version <= version:
+                    continue
+                logger.info(f"Applying schema migration {migration.version}: {migration.description}")
+                for statement in migration.statements:
+                    cursor.execute(statement)
+                cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)", (migration.version, migration.description))
+                version = migration.version
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return before, version
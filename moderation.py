@@ -0,0 +1,216 @@
+import re
+from collections import namedtuple
+
+# kind: 'keyword' | 'link' | 'allowed_link' | 'solana' | 'evm'
+ModerationHit = namedtuple('ModerationHit', ['kind', 'value', 'start', 'end'])
+
+_URL = r'https?://[^\s]+|www\.[^\s]+'
+_BARE_DOMAIN = r'(?:[\w-]+\.)+[A-Za-z]{2,}(?:/[^\s]*)?'
+_TOKEN_PUNCTUATION = '()[]<>{},;:!?"\''
+_EVM = r'\b0x[a-fA-F0-9]{40}\b'
+_SOLANA = r'\b[1-9A-HJ-NP-Za-km-z]{32,44}\b'
+
+# Alasan penghapusan dari pemeriksaan level pesan (selain alasan dari verdict_from_hits)
+REASON_LINK_ENTITY = "URL or Text Link entity detected."
+REASON_RAW_LINK = "Raw link detected."
+REASON_FORWARDED_LINK = "Forwarded message with potential link entities."
+
+
+class MessageVerdict:
+    """
+    Result of classifying one message: what to do with it, why, and what was found.
+    `text` / `lower_text` are kept so later handlers do not recompute them. `hits` (every span, via
+    ModerationEngine.scan) is only computed when first read, so the hot path never pays for it.
+    """
+    __slots__ = ('action', 'reasons', 'text', 'lower_text', '_scan', '_hits')
+
+    ALLOW = "allow"
+    DELETE = "delete"
+
+    def __init__(self, action, reasons, text, lower_text, scan=None):
+        self.action = action
+        self.reasons = reasons
+        self.text = text
+        self.lower_text = lower_text
+        self._scan = scan
+        self._hits = None
+
+    @property
+    def should_delete(self):
+        return self.action == self.DELETE
+
+    @property
+    def reason(self):
+        return self.reasons[0] if self.reasons else None
+
+    @property
+    def hits(self):
+        if self._hits is None:
+            self._hits = self._scan(self.text) if self._scan and self.text else []
+        return self._hits
+
+    def hits_of(self, kind):
+        return [hit for hit in self.hits if hit.kind == kind]
+
+    def __repr__(self):
+        return f"MessageVerdict(action={self.action!r}, reasons={self.reasons!r})"
+
+
+class ModerationEngine:
+    """
+    Precompiled matcher for the group moderation rules.
+
+    Every pattern is compiled once and guarded by a C-level substring/length test, so plain chatter
+    costs a lowercase and a few `in` checks:
+      - keywords: substring search on the lowercased text (the original semantics). A merged regex
+        alternation was measured slower than this for a keyword list of this size in CPython.
+      - links: only scanned when the text contains http / t.me (as before), and checked against the allowlist
+        by parsed host (plus optional path prefix) instead of `domain in url`.
+      - addresses: only for texts long enough to hold one; the EVM pattern only when "0x" is present.
+
+    check() returns the verdict and stops at the first violation; scan() returns every hit.
+    """
+
+    def __init__(self, forbidden_keywords, allowed_domains, contract_address=None):
+        self.contract_address = contract_address
+        # Urutan daftar dipertahankan supaya alasan yang dilaporkan sama dengan versi lama
+        self._keywords = tuple(dict.fromkeys(k.lower() for k in forbidden_keywords))
+        self._url_re = re.compile(_URL)
+        self._bare_re = re.compile(_BARE_DOMAIN)
+        self._raw_link_re = re.compile(_URL, re.IGNORECASE)
+        self._solana_re = re.compile(_SOLANA)
+        self._evm_re = re.compile(_EVM)
+
+        # host -> daftar prefix path yang diizinkan ('' = seluruh host)
+        self._allowed = {}
+        for domain in allowed_domains:
+            host, _, path = domain.lower().partition('/')
+            self._allowed.setdefault(host, []).append(f"/{path}" if path else "")
+
+    def is_allowed_url(self, url):
+        scheme_end = url.find("://")
+        rest = url[scheme_end + 3:] if scheme_end != -1 else url
+        host, _, path = rest.lower().partition('/')
+        host = host.split('?', 1)[0].split('#', 1)[0].rsplit('@', 1)[-1].split(':', 1)[0]
+        path = '/' + path.split('?', 1)[0].split('#', 1)[0]
+        labels = host.split('.')
+        # Cocokkan host dan setiap parent domain-nya (sub.pump.fun -> pump.fun)
+        for i in range(len(labels) - 1):
+            prefixes = self._allowed.get('.'.join(labels[i:]))
+            if prefixes and any(not p or path == p or path.startswith(p + '/') for p in prefixes):
+                return True
+        return False
+
+    def _links(self, text, lowered):
+        """Yields (url, start, end, allowed) for every link in the text; nothing when the text has no link marker."""
+        # Gerbang yang sama dengan _is_spam_or_ad lama: tanpa "http"/"t.me" pesan tidak diperiksa link-nya
+        # (termasuk "www.evil.com" tanpa skema, yang dulu juga dibiarkan)
+        if "http" not in lowered and "t.me" not in lowered:
+            return
+        cursor = 0
+        # Link selalu berisi titik dan tidak berisi spasi: cukup periksa token yang mengandung "."
+        for token in text.split():
+            if '.' not in token:
+                continue
+            candidate = token.strip(_TOKEN_PUNCTUATION)
+            low = candidate.lower()
+            scheme_at = low.find('http')
+            if scheme_at == -1:
+                scheme_at = low.find('www.')
+            if scheme_at != -1 and self._url_re.match(low, scheme_at):
+                candidate = candidate[scheme_at:]
+            elif not self._bare_re.fullmatch(candidate):
+                continue
+            start = text.find(candidate, cursor)
+            cursor = start + len(candidate)
+            yield candidate, start, cursor, self.is_allowed_url(candidate)
+
+    def _solana_matches(self, text):
+        match = self._solana_re.search(text)
+        while match:
+            if match.group() != self.contract_address:
+                yield match
+            match = self._solana_re.search(text, match.end())
+
+    def classify(self, message):
+        """
+        Single moderation stage for a Telegram message: entities, caption entities, forward info and
+        text are each inspected at most once, and classification stops at the first reason in the
+        precedence of the original _is_link_present + _is_spam_or_ad sequence (entity link, raw link,
+        forwarded link, spam). The text check is the early-exit check(); spans are left to
+        verdict.hits.
+        """
+        text = message.text or message.caption or ""
+        lowered = text.lower()
+        entities = message.entities or message.caption_entities
+        if entities and any(entity.type in ('url', 'text_link') for entity in entities):
+            return MessageVerdict(MessageVerdict.DELETE, (REASON_LINK_ENTITY,), text, lowered.strip(), self.scan)
+        is_spam, spam_reason = self._check(text, lowered) if text else (False, None)
+        if is_spam:
+            if ("http" in lowered or "www." in lowered) and self._raw_link_re.search(text):
+                reason = REASON_RAW_LINK
+            elif entities and (message.forward_from_chat or message.forward_from):
+                reason = REASON_FORWARDED_LINK
+            else:
+                reason = spam_reason
+            return MessageVerdict(MessageVerdict.DELETE, (reason,), text, lowered.strip(), self.scan)
+        if entities and (message.forward_from_chat or message.forward_from):
+            return MessageVerdict(MessageVerdict.DELETE, (REASON_FORWARDED_LINK,), text, lowered.strip(), self.scan)
+        return MessageVerdict(MessageVerdict.ALLOW, (), text, lowered.strip(), self.scan)
+
+    def check(self, text):
+        """(is_spam, reason) with the same reasons and precedence as the original _is_spam_or_ad."""
+        if not text:
+            return False, None
+        return self._check(text, text.lower())
+
+    def _check(self, text, lowered):
+        for keyword in self._keywords:
+            if keyword in lowered:
+                return True, f"Forbidden Keyword: {keyword}"
+        if "http" in lowered or "t.me" in lowered:
+            for url, _, _, allowed in self._links(text, lowered):
+                if not allowed:
+                    return True, f"Unauthorized Link: {url}"
+        if len(text) >= 32:
+            for _ in self._solana_matches(text):
+                return True, "Potential Solana Contract Address"
+            if "0x" in text and self._evm_re.search(text):
+                return True, "Potential EVM Contract Address"
+        return False, None
+
+    def scan(self, text, lowered=None):
+        """Every moderation hit in `text`, ordered by position."""
+        if not text:
+            return []
+        hits = []
+        lowered = lowered if lowered is not None else text.lower()
+        for keyword in self._keywords:
+            start = lowered.find(keyword)
+            while start != -1:
+                hits.append(ModerationHit('keyword', keyword, start, start + len(keyword)))
+                start = lowered.find(keyword, start + 1)
+        for url, start, end, allowed in self._links(text, lowered):
+            hits.append(ModerationHit('allowed_link' if allowed else 'link', url, start, end))
+        if len(text) >= 32:
+            hits.extend(ModerationHit('solana', m.group(), m.start(), m.end()) for m in self._solana_matches(text))
+            if "0x" in text:
+                hits.extend(ModerationHit('evm', m.group(), m.start(), m.end()) for m in self._evm_re.finditer(text))
+        hits.sort(key=lambda hit: hit.start)
+        return hits
+
+    @staticmethod
+    def verdict_from_hits(hits):
+        """Same (is_spam, reason) as check(), derived from an existing scan() result."""
+        by_kind = {}
+        for hit in hits:
+            by_kind.setdefault(hit.kind, hit)
+        if 'keyword' in by_kind:
+            return True, f"Forbidden Keyword: {by_kind['keyword'].value}"
+        if 'link' in by_kind:
+            return True, f"Unauthorized Link: {by_kind['link'].value}"
+        if 'solana' in by_kind:
+            return True, "Potential Solana Contract Address"
+        if 'evm' in by_kind:
+            return True, "Potential EVM Contract Address"
+        return False, None
@@ -0,0 +1,314 @@
+import bisect
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Prioritas (angka kecil = lebih dulu)
+HIGH = 0    # delete_message, answer_callback_query
+NORMAL = 1  # balasan langsung ke user
+LOW = 2     # obrolan/tugas terjadwal di grup, boleh digabung
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+# Method yang dihitung terhadap limit per chat (pesan yang terlihat di chat)
+CHAT_LIMITED_METHODS = frozenset({'send_message', 'reply_to', 'edit_message_text'})
+MAX_MESSAGE_LENGTH = 4096
+COALESCE_SEPARATOR = "\n\n"
+
+
+class OutboundDropped(Exception):
+    """Set on the future of a call that was dropped (queue full, retries exhausted or shutdown)."""
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 when one is available now)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def is_full(self, now):
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class _Job:
+    __slots__ = ('priority', 'seq', 'method', 'chat_id', 'args', 'kwargs', 'coalesce', 'future', 'enqueued_at', 'not_before', 'attempts')
+
+    def __init__(self, priority, seq, method, chat_id, args, kwargs, coalesce, enqueued_at):
+        self.priority = priority
+        self.seq = seq
+        self.method = method
+        self.chat_id = chat_id
+        self.args = args
+        self.kwargs = kwargs
+        self.coalesce = coalesce
+        self.future = Future()
+        self.enqueued_at = enqueued_at
+        self.not_before = 0.0
+        self.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+def _chat_key(chat_id):
+    # GROUP_CHAT_ID dari env berupa string; samakan dengan message.chat.id (int) supaya satu bucket per chat
+    try:
+        return int(chat_id)
+    except (TypeError, ValueError):
+        return chat_id
+
+
+def _block_key(job):
+    # Panggilan tanpa chat (answer_callback_query) diblokir per method, bukan seluruh dispatcher
+    return job.chat_id if job.chat_id is not None else job.method
+
+
+def retry_after_seconds(error):
+    """retry_after from a Telegram 429 error, or None when the error is not a rate limit."""
+    if getattr(error, 'error_code', None) != 429:
+        return None
+    parameters = (getattr(error, 'result_json', None) or {}).get('parameters') or {}
+    return float(parameters.get('retry_after', 1))
+
+
+class OutboundDispatcher:
+    """
+    Single entry point for outbound Telegram calls, paced by token buckets.
+
+    Calls are queued by priority and handed to a small worker pool once both the global bucket and
+    (for visible messages) the chat's bucket have a token; at most one call per chat is in flight,
+    so messages to a chat keep their order. A 429 blocks the chat for `retry_after` seconds and
+    re-queues the call. Low-priority group messages submitted with coalesce=True are merged into a
+    pending message for the same chat while it is still queued. When the queue is full the
+    lowest-priority pending call is dropped in favour of a more important one.
+
+    Every call returns a concurrent.futures.Future with the Telegram result. `clock` (monotonic seconds)
+    drives the buckets and retry_after blocks; tests pass a controllable one.
+    """
+
+    def __init__(self, bot, global_rate=30.0, chat_rate=1.0, group_rate_per_minute=20.0, chat_burst=3,
+                 workers=4, max_queue=1000, max_retries=3, clock=time.monotonic):
+        self._bot = bot
+        self._clock = clock
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate_per_minute / 60.0
+        self.chat_burst = chat_burst
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, max(1, int(global_rate)), clock())
+        self._chat_buckets = {}
+        self._blocked_until = {}  # _block_key(job) -> monotonic
+        self._pending = []        # _Job terurut (priority, seq)
+        self._in_flight = set()   # chat_id yang sedang dikirim
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="outbound")
+        self._counters = {"sent": 0, "failed": 0, "rate_limited": 0, "retried": 0, "coalesced": 0,
+                          "dropped_queue_full": 0, "dropped_retries": 0, "dropped_shutdown": 0}
+        self._latency = {name: [0, 0.0, 0.0] for name in PRIORITY_NAMES.values()}  # count, total, max
+        self._thread = threading.Thread(target=self._run, name="outbound-dispatcher", daemon=True)
+        self._thread.start()
+
+    # --- API ---
+
+    def send_message(self, chat_id, text, priority=NORMAL, coalesce=False, **kwargs):
+        return self.submit('send_message', chat_id, (chat_id, text), kwargs, priority, coalesce and priority == LOW)
+
+    def reply_to(self, message, text, priority=NORMAL, **kwargs):
+        return self.submit('reply_to', message.chat.id, (message, text), kwargs, priority)
+
+    def edit_message_text(self, text, chat_id, message_id, priority=NORMAL, **kwargs):
+        return self.submit('edit_message_text', chat_id, (text,), dict(kwargs, chat_id=chat_id, message_id=message_id), priority)
+
+    def delete_message(self, chat_id, message_id):
+        return self.submit('delete_message', chat_id, (chat_id, message_id), {}, HIGH)
+
+    def answer_callback_query(self, callback_query_id, **kwargs):
+        return self.submit('answer_callback_query', None, (callback_query_id,), kwargs, HIGH)
+
+    def submit(self, method, chat_id, args, kwargs, priority=NORMAL, coalesce=False):
+        chat_id = _chat_key(chat_id)
+        with self._cond:
+            if self._stopping:
+                return self._failed_future(OutboundDropped("dispatcher is shutting down"))
+            if coalesce:
+                merged = self._coalesce(chat_id, args, kwargs)
+                if merged is not None:
+                    return merged
+            job = _Job(priority, next(self._seq), method, chat_id, args, kwargs, coalesce, self._clock())
+            if len(self._pending) >= self.max_queue:
+                victim = self._pending[-1]
+                if victim.priority <= priority:
+                    self._counters["dropped_queue_full"] += 1
+                    return self._failed_future(OutboundDropped("outbound queue full"))
+                self._pending.pop()
+                self._counters["dropped_queue_full"] += 1
+                victim.future.set_exception(OutboundDropped("outbound queue full"))
+            bisect.insort(self._pending, job)
+            self._cond.notify()
+            return job.future
+
+    def stop(self, timeout=5.0):
+        """Let the queue drain for up to `timeout` seconds, then drop what is left."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            while (self._pending or self._in_flight) and time.monotonic() < deadline:
+                self._cond.wait(max(0.0, deadline - time.monotonic()))
+            self._stopped = True
+            leftover, self._pending = self._pending, []
+            self._counters["dropped_shutdown"] += len(leftover)
+            self._cond.notify_all()
+        for job in leftover:
+            job.future.set_exception(OutboundDropped("dispatcher stopped"))
+        self._executor.shutdown(wait=False)
+
+    # --- internal ---
+
+    @staticmethod
+    def _failed_future(error):
+        future = Future()
+        future.set_exception(error)
+        return future
+
+    def _coalesce(self, chat_id, args, kwargs):
+        text = args[1]
+        for job in self._pending:
+            if job.coalesce and job.chat_id == chat_id and job.attempts == 0 and job.kwargs == kwargs:
+                combined = f"{job.args[1]}{COALESCE_SEPARATOR}{text}"
+                if len(combined) <= MAX_MESSAGE_LENGTH:
+                    job.args = (chat_id, combined)
+                    self._counters["coalesced"] += 1
+                    return job.future
+        return None
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            # Grup (id negatif): ~20 pesan/menit; chat pribadi: ~1 pesan/detik
+            rate = self.group_rate if not isinstance(chat_id, int) or chat_id < 0 else self.chat_rate
+            now = self._clock()
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, self.chat_burst, now)
+            if len(self._chat_buckets) > 10000:
+                for key in [k for k, b in self._chat_buckets.items() if b.is_full(now) and k not in self._in_flight]:
+                    del self._chat_buckets[key]
+                self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _next_ready(self, now):
+        """(job, None) for the first job that may be sent now, else (None, seconds to wait or None)."""
+        wait = self._global.wait_time(now)
+        if wait > 0:
+            return None, wait
+        wait = None
+        for job in self._pending:
+            if job.chat_id is not None and job.chat_id in self._in_flight:
+                continue
+            job_wait = max(job.not_before, self._blocked_until.get(_block_key(job), 0.0)) - now
+            if job_wait <= 0 and job.method in CHAT_LIMITED_METHODS:
+                job_wait = self._chat_bucket(job.chat_id).wait_time(now)
+            if job_wait <= 0:
+                return job, None
+            wait = job_wait if wait is None else min(wait, job_wait)
+        return None, wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    job, wait = self._next_ready(self._clock())
+                    if job is not None:
+                        break
+                    self._cond.wait(wait)
+                self._pending.remove(job)
+                self._global.take()
+                if job.method in CHAT_LIMITED_METHODS:
+                    self._chat_bucket(job.chat_id).take()
+                if job.chat_id is not None:
+                    self._in_flight.add(job.chat_id)
+            try:
+                self._executor.submit(self._execute, job)
+            except RuntimeError:
+                # Executor sudah dimatikan (shutdown)
+                with self._cond:
+                    self._in_flight.discard(job.chat_id)
+                job.future.set_exception(OutboundDropped("dispatcher stopped"))
+
+    def _execute(self, job):
+        try:
+            result = getattr(self._bot, job.method)(*job.args, **job.kwargs)
+        except Exception as e:
+            self._handle_failure(job, e)
+            return
+        latency = self._clock() - job.enqueued_at
+        with self._cond:
+            self._in_flight.discard(job.chat_id)
+            self._counters["sent"] += 1
+            stats = self._latency[PRIORITY_NAMES[job.priority]]
+            stats[0] += 1
+            stats[1] += latency
+            stats[2] = max(stats[2], latency)
+            self._cond.notify_all()
+        job.future.set_result(result)
+
+    def _handle_failure(self, job, error):
+        retry_after = retry_after_seconds(error)
+        with self._cond:
+            self._in_flight.discard(job.chat_id)
+            if retry_after is not None:
+                self._counters["rate_limited"] += 1
+                until = self._clock() + retry_after
+                key = _block_key(job)
+                self._blocked_until[key] = max(self._blocked_until.get(key, 0.0), until)
+                if job.attempts < self.max_retries and not self._stopped:
+                    job.attempts += 1
+                    job.not_before = until
+                    self._counters["retried"] += 1
+                    bisect.insort(self._pending, job)
+                    self._cond.notify_all()
+                    logger.warning(f"Telegram rate limit on {job.method} to {job.chat_id}; retrying in {retry_after:g}s.")
+                    return
+                self._counters["dropped_retries"] += 1
+                error = OutboundDropped(f"{job.method} to {job.chat_id} still rate limited after {job.attempts} retries")
+            else:
+                self._counters["failed"] += 1
+            self._cond.notify_all()
+        logger.warning(f"Outbound {job.method} to {job.chat_id} failed: {error}")
+        job.future.set_exception(error)
+
+    def stats(self):
+        with self._cond:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for job in self._pending:
+                depth[PRIORITY_NAMES[job.priority]] += 1
+            return {
+                "queue_depth": len(self._pending),
+                "queue_by_priority": depth,
+                "in_flight": len(self._in_flight),
+                **self._counters,
+                "latency_ms": {
+                    name: {"avg": round(total / count * 1000, 1) if count else 0.0, "max": round(peak * 1000, 1)}
+                    for name, (count, total, peak) in self._latency.items()
+                },
+            }
@@ -0,0 +1,145 @@
+import logging
+import threading
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+
+class _Snapshot:
+    __slots__ = ('version', 'lines')
+
+    def __init__(self, version, lines):
+        self.version = version
+        self.lines = lines  # tuple: tidak bisa diubah setelah dipublikasikan
+
+
+class ResponseCorpus(Mapping):
+    """
+    Response templates per category, backed by versioned rows in Postgres.
+
+    load() reads the latest stored version of every category in one go (called once at startup); the
+    built-in defaults are version 0 for categories that were never stored. Each category is kept as an
+    immutable tuple snapshot, so reads are plain dict lookups and never touch the DB. New versions
+    replace the snapshot with a single dict assignment, so a reader always sees either the old or the
+    new list, never a mix. A background thread compares local versions with the latest stored ones
+    every `refresh_interval` seconds and reloads categories another instance has published, so every
+    instance converges without calling Groq.
+
+    load_all() -> {category: (version, lines)}
+    load_latest(category) -> (version, lines) | None
+    load_versions() -> {category: latest_version}
+    save(category, lines, source) -> new version | None
+    """
+
+    def __init__(self, defaults, load_all=None, load_latest=None, load_versions=None, save=None, refresh_interval=300.0):
+        self._defaults = {category: tuple(lines) for category, lines in defaults.items()}
+        self._load_all = load_all
+        self._load_latest = load_latest
+        self._load_versions = load_versions
+        self._save = save
+        self.refresh_interval = refresh_interval
+        self._snapshots = {category: _Snapshot(0, lines) for category, lines in self._defaults.items()}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._loads = 0
+        self._swaps = 0
+        self._convergence_checks = 0
+
+    # --- Mapping ---
+
+    def __getitem__(self, category):
+        return self._snapshots[category].lines
+
+    def __iter__(self):
+        return iter(list(self._snapshots))
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def version(self, category):
+        snapshot = self._snapshots.get(category)
+        return snapshot.version if snapshot else None
+
+    def load(self):
+        """Replace the defaults with the latest stored version of every category. Returns how many were loaded."""
+        if not self._load_all:
+            return 0
+        try:
+            stored = self._load_all()
+        except Exception as e:
+            logger.error(f"Failed to load response corpus: {e}")
+            return 0
+        for category, (version, lines) in stored.items():
+            current = self._snapshots.get(category)
+            if current is None or version > current.version:
+                self._snapshots[category] = _Snapshot(version, tuple(lines))
+        self._loads += len(stored)
+        return len(stored)
+
+    def publish(self, category, lines, source="ai"):
+        """Store `lines` as the next version of `category` and swap it in. Returns the new version."""
+        lines = tuple(lines)
+        version = None
+        if self._save:
+            try:
+                version = self._save(category, list(lines), source)
+            except Exception as e:
+                logger.error(f"Failed to persist response category '{category}': {e}")
+        if version is None:
+            # Tanpa DB: tetap dipakai di instance ini saja
+            current = self._snapshots.get(category)
+            version = (current.version if current else 0) + 1
+        self._snapshots[category] = _Snapshot(version, lines)
+        self._swaps += 1
+        return version
+
+    def converge(self):
+        """Reload every loaded category whose stored version is newer than ours."""
+        if not self._load_versions:
+            return 0
+        self._convergence_checks += 1
+        try:
+            latest = self._load_versions()
+        except Exception as e:
+            logger.error(f"Response corpus convergence check failed: {e}")
+            return 0
+        reloaded = 0
+        for category, version in latest.items():
+            snapshot = self._snapshots.get(category)
+            local = snapshot.version if snapshot else 0
+            if version > local:
+                try:
+                    stored = self._load_latest(category)
+                except Exception as e:
+                    logger.error(f"Failed to reload response category '{category}': {e}")
+                    continue
+                if stored and stored[0] > local:
+                    self._snapshots[category] = _Snapshot(stored[0], tuple(stored[1]))
+                    self._swaps += 1
+                    reloaded += 1
+                    logger.info(f"Response category '{category}' updated to version {stored[0]}.")
+        return reloaded
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="response-corpus-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            self.converge()
+
+    def stats(self):
+        return {
+            "categories": {category: {"version": s.version, "lines": len(s.lines)} for category, s in list(self._snapshots.items())},
+            "loads": self._loads,
+            "swaps": self._swaps,
+            "convergence_checks": self._convergence_checks,
+        }
@@ -0,0 +1,201 @@
+import heapq
+import logging
+import threading
+import time
+from calendar import monthrange
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from metrics import TASK_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================
+#   🕒   PERHITUNGAN WAKTU JADWAL
+# ==========================
+# Spesifikasi jadwal sama dengan dict `schedules` di BotLogic:
+#   {'hour': H}                      -> harian jam H (UTC)
+#   {'hour': H, 'day_of_week': D}    -> mingguan, weekday() == D
+#   {'hour': H, 'day_of_month': N}   -> bulanan, tanggal N (di-clamp ke akhir bulan)
+
+def _month_fire(year, month, spec):
+    day = min(spec['day_of_month'], monthrange(year, month)[1])
+    return datetime(year, month, day, spec['hour'], tzinfo=timezone.utc)
+
+
+def _shift_month(year, month, delta):
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def previous_fire_time(spec, now):
+    """Most recent fire time <= now."""
+    if 'day_of_month' in spec:
+        fire = _month_fire(now.year, now.month, spec)
+        if fire > now:
+            fire = _month_fire(*_shift_month(now.year, now.month, -1), spec)
+        return fire
+    fire = now.replace(hour=spec['hour'], minute=0, second=0, microsecond=0)
+    if 'day_of_week' in spec:
+        fire -= timedelta(days=(now.weekday() - spec['day_of_week']) % 7)
+        if fire > now:
+            fire -= timedelta(days=7)
+        return fire
+    if fire > now:
+        fire -= timedelta(days=1)
+    return fire
+
+
+def next_fire_time(spec, now):
+    """First fire time strictly after now."""
+    previous = previous_fire_time(spec, now)
+    if 'day_of_month' in spec:
+        return _month_fire(*_shift_month(previous.year, previous.month, 1), spec)
+    return previous + timedelta(days=7 if 'day_of_week' in spec else 1)
+
+
+def run_marker(spec, fire_time):
+    """Period key stored in schedule_log.last_run_date (same format check_and_run_schedules uses)."""
+    if 'day_of_month' in spec:
+        return fire_time.strftime('%Y-%m')
+    if 'day_of_week' in spec:
+        return fire_time.strftime('%Y-W%U')
+    return fire_time.strftime('%Y-%m-%d')
+
+
+# ==========================
+#   ⚙️   SCHEDULER ENGINE
+# ==========================
+
+class TaskScheduler:
+    """
+    Background scheduler for the BotLogic schedules.
+
+    A single thread keeps a min-heap of (next_fire_time, name) and sleeps until the earliest one is due;
+    the task itself runs on a dedicated executor so a slow job (e.g. AI renewal) never delays the others.
+    On start, any schedule whose most recent fire time has no matching marker in schedule_log is run
+    immediately, so runs missed during downtime are caught up once. A schedule with no marker at all
+    (fresh deploy, empty schedule_log) is not caught up: its current period is recorded as done and it
+    waits for its next fire time.
+
+    `load_markers()` -> {name: marker} and `claim(name, marker)` -> bool (re-check against the DB just
+    before running) / `complete(name, marker)` (persist the marker) are provided by BotLogic.
+    """
+
+    def __init__(self, schedules, load_markers, claim, complete, max_workers=2, clock=None):
+        self.schedules = schedules
+        self._load_markers = load_markers
+        self._claim = claim
+        self._complete = complete
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scheduled-task")
+        self._heap = []
+        self._cond = threading.Condition()
+        self._running = set()
+        self._stopped = False
+        self._thread = None
+        self._task_stats = {name: {"runs": 0, "failures": 0, "skipped": 0, "last_duration_s": None, "max_duration_s": 0.0, "last_run_at": None} for name in schedules}
+
+    def start(self):
+        now = self._clock()
+        markers = self._load_markers()
+        seeded = {}
+        with self._cond:
+            for name, spec in self.schedules.items():
+                previous = previous_fire_time(spec, now)
+                if name not in markers:
+                    # Belum pernah jalan: jangan kejar semua tugas sekaligus pada deploy pertama
+                    seeded[name] = run_marker(spec, previous)
+                    heapq.heappush(self._heap, (next_fire_time(spec, now), name, None))
+                elif markers[name] != run_marker(spec, previous):
+                    # Terlewat (downtime) atau belum pernah jalan untuk periode ini: kejar sekarang
+                    logger.info(f"Scheduler: catching up missed run of '{name}' (due {previous.isoformat()}).")
+                    heapq.heappush(self._heap, (now, name, previous))
+                else:
+                    heapq.heappush(self._heap, (next_fire_time(spec, now), name, None))
+            self._cond.notify()
+        for name, marker in seeded.items():
+            self._complete(name, marker)
+        if seeded:
+            logger.info(f"Scheduler: no previous run recorded for {', '.join(seeded)}; waiting for the next fire time.")
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Scheduler started with {len(self.schedules)} schedules.")
+
+    def stop(self, wait=True):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._heap:
+                        delay = (self._heap[0][0] - self._clock()).total_seconds()
+                        if delay <= 0:
+                            break
+                        # Bangun paling lambat tiap 60 detik supaya lompatan jam (suspend/NTP) tetap terkejar
+                        self._cond.wait(min(delay, 60))
+                    else:
+                        self._cond.wait()
+                if self._stopped:
+                    return
+                fire_time, name, fire_for = heapq.heappop(self._heap)
+                spec = self.schedules[name]
+                # fire_for: waktu jadwal yang diwakili run ini (berbeda dari fire_time saat catch-up)
+                fire_for = fire_for or fire_time
+                heapq.heappush(self._heap, (next_fire_time(spec, max(fire_for, self._clock())), name, None))
+                if name in self._running:
+                    logger.warning(f"Scheduler: '{name}' is still running; skipping this occurrence.")
+                    self._task_stats[name]["skipped"] += 1
+                    continue
+                self._running.add(name)
+            self._executor.submit(self._execute, name, spec, run_marker(spec, fire_for))
+
+    def _execute(self, name, spec, marker):
+        stats = self._task_stats[name]
+        try:
+            if not self._claim(name, marker):
+                logger.info(f"Scheduler: '{name}' already ran for {marker}; skipping.")
+                with self._cond:
+                    stats["skipped"] += 1
+                return
+            logger.info(f"Running scheduled task: {name} ({marker})")
+            started = time.monotonic()
+            outcome = "ok"
+            try:
+                spec['task'](*spec.get('args', ()))
+            except Exception as e:
+                outcome = "error"
+                logger.error(f"Error running scheduled task {name}: {e}", exc_info=True)
+                return
+            finally:
+                duration = time.monotonic() - started
+                TASK_DURATION.observe(duration, name, outcome)
+                with self._cond:
+                    stats["runs"] += 1
+                    stats["failures"] += outcome == "error"
+                    stats["last_duration_s"] = round(duration, 3)
+                    stats["max_duration_s"] = round(max(stats["max_duration_s"], duration), 3)
+                    stats["last_run_at"] = self._clock().isoformat()
+                logger.info(f"Scheduled task {name} finished in {duration:.2f}s.")
+            self._complete(name, marker)
+        except Exception as e:
+            logger.error(f"Scheduler bookkeeping failed for {name}: {e}", exc_info=True)
+        finally:
+            with self._cond:
+                self._running.discard(name)
+
+    def stats(self):
+        with self._cond:
+            upcoming = sorted(self._heap)
+            return {
+                "running": sorted(self._running),
+                "next_runs": {name: fire_time.isoformat() for fire_time, name, _ in upcoming},
+                "tasks": {name: dict(stats) for name, stats in self._task_stats.items()},
+            }
@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+
+from admin_cache import AdminCache
+
+
+class FakeFetch:
+    """get_chat_administrators stand-in: counts calls, can block mid-fetch or fail."""
+
+    def __init__(self, admins=(1,)):
+        self.admins = set(admins)
+        self.calls = 0
+        self.failures = 0
+        self.gate = None
+        self.started = threading.Event()
+
+    def __call__(self, chat_id):
+        self.calls += 1
+        result = set(self.admins)
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(2)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("telegram unavailable")
+        return result
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.005)
+
+
+class AdminCacheTest(unittest.TestCase):
+    def make(self, fetch, **kwargs):
+        cache = AdminCache(fetch, **kwargs)
+        self.addCleanup(cache.stop)
+        cache.warm(-100)
+        wait_until(lambda: cache.stats()["refreshes"] + cache.stats()["refresh_failures"] >= 1)
+        return cache
+
+    def test_join_burst_does_not_refetch_admins(self):
+        fetch = FakeFetch()
+        cache = self.make(fetch)
+        for user_id in range(1000, 1500):
+            cache.apply_member_update(-100, user_id, 'left', 'member')
+            cache.apply_member_update(-100, user_id, 'member', 'restricted')
+        time.sleep(0.05)
+        self.assertEqual(fetch.calls, 1)
+        self.assertEqual(cache.stats()["invalidations"], 0)
+        self.assertFalse(cache.is_admin(-100, 1000))
+        self.assertTrue(cache.is_admin(-100, 1))
+
+    def test_promotion_during_fetch_is_merged_into_the_result(self):
+        fetch = FakeFetch()
+        cache = self.make(fetch)
+        fetch.gate = threading.Event()
+        fetch.started.clear()
+        cache.invalidate(-100)
+        fetch.started.wait(2)
+        # Fetch sedang berjalan dengan daftar lama; promosi/demosi datang di tengahnya
+        cache.apply_member_update(-100, 2, 'member', 'administrator')
+        cache.apply_member_update(-100, 1, 'administrator', 'member')
+        self.assertTrue(cache.is_admin(-100, 2))
+        fetch.gate.set()
+        wait_until(lambda: cache.stats()["refreshes"] >= 2)
+        self.assertTrue(cache.is_admin(-100, 2))
+        self.assertFalse(cache.is_admin(-100, 1))
+
+    def test_invalidate_keeps_serving_the_stale_set(self):
+        fetch = FakeFetch()
+        cache = self.make(fetch)
+        fetch.gate = threading.Event()
+        cache.invalidate(-100)
+        self.assertTrue(cache.is_admin(-100, 1))
+        fetch.gate.set()
+
+    def test_failed_startup_warm_is_retried(self):
+        fetch = FakeFetch()
+        fetch.failures = 2
+        cache = self.make(fetch, retry_after=0.01)
+        wait_until(lambda: cache.stats()["refreshes"] == 1)
+        self.assertEqual(fetch.calls, 3)
+        self.assertTrue(cache.is_admin(-100, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
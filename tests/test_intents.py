@@ -0,0 +1,47 @@
+import unittest
+from types import SimpleNamespace
+
+from intents import IntentRouter
+
+
+def message(chat_type="supergroup"):
+    return SimpleNamespace(chat=SimpleNamespace(type=chat_type))
+
+
+class IntentRouterTest(unittest.TestCase):
+    def setUp(self):
+        self.handled = []
+        self.router = IntentRouter()
+
+    def add(self, name, patterns=(), priority=0, **kwargs):
+        self.router.add(name, lambda message, text: self.handled.append(name), patterns, priority, **kwargs)
+
+    def route(self, text, chat_type="supergroup"):
+        self.handled.clear()
+        handled = self.router.dispatch(message(chat_type), text, text.lower())
+        return self.handled if handled else None
+
+    def test_overlapping_lower_priority_keyword_does_not_shadow_higher_one(self):
+        self.add("low", ["where to buy"], priority=10)
+        self.add("high", ["buy npepe"], priority=50)
+        self.assertEqual(self.route("where to buy npepe?"), ["high"])
+
+    def test_keywords_match_whole_words_only(self):
+        self.add("contract_address", ["ca"], priority=60)
+        self.assertIsNone(self.route("because local"))
+        self.assertEqual(self.route("what is the CA?"), ["contract_address"])
+
+    def test_exactly_one_handler_runs_and_predicates_come_last(self):
+        asked = []
+        self.add("question", priority=10, predicate=lambda text: asked.append(text) or True)
+        self.add("collaboration", ["collab"], priority=20)
+        self.add("birthday", ["my birthday"], priority=30, chat_types=("group", "supergroup"))
+        self.assertEqual(self.route("my birthday, collab?"), ["birthday"])
+        self.assertEqual(asked, [])
+        self.assertEqual(self.route("my birthday, collab?", chat_type="private"), ["collaboration"])
+        self.assertEqual(self.route("anyone here?"), ["question"])
+        self.assertEqual(self.router.stats()["handled"], {"question": 1, "collaboration": 1, "birthday": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
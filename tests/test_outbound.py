@@ -0,0 +1,220 @@
+import threading
+import time
+import unittest
+
+from outbound import LOW, NORMAL, MAX_MESSAGE_LENGTH, OutboundDispatcher, OutboundDropped
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimited(Exception):
+    """Shaped like telebot's ApiTelegramException for a 429."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too Many Requests: retry after {retry_after}")
+        self.error_code = 429
+        self.result_json = {"parameters": {"retry_after": retry_after}}
+
+
+class FakeBot:
+    """Records calls; `fail` maps a method to a list of exceptions raised by its next calls."""
+
+    def __init__(self, call_delay=0.0):
+        self.call_delay = call_delay
+        self.calls = []
+        self.fail = {}
+        self.in_flight = {}
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _call(self, method, chat_id, *args):
+        with self._lock:
+            self.calls.append((method, chat_id) + args)
+            self.in_flight[chat_id] = self.in_flight.get(chat_id, 0) + 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight[chat_id])
+            errors = self.fail.get(method)
+            error = errors.pop(0) if errors else None
+        try:
+            if self.call_delay:
+                time.sleep(self.call_delay)
+            if error:
+                raise error
+            return (method, chat_id) + args
+        finally:
+            with self._lock:
+                self.in_flight[chat_id] -= 1
+
+    def send_message(self, chat_id, text, **kwargs):
+        return self._call('send_message', chat_id, text)
+
+    def edit_message_text(self, text, chat_id=None, message_id=None, **kwargs):
+        return self._call('edit_message_text', chat_id, text)
+
+    def delete_message(self, chat_id, message_id):
+        return self._call('delete_message', chat_id, message_id)
+
+    def answer_callback_query(self, callback_query_id, **kwargs):
+        return self._call('answer_callback_query', None, callback_query_id)
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.005)
+
+
+class OutboundDispatcherTest(unittest.TestCase):
+    def make(self, bot=None, **kwargs):
+        self.clock = FakeClock()
+        self.bot = bot or FakeBot()
+        options = dict(global_rate=1000.0, chat_rate=1000.0, group_rate_per_minute=60000.0, chat_burst=1000, clock=self.clock)
+        options.update(kwargs)
+        dispatcher = OutboundDispatcher(self.bot, **options)
+        self.addCleanup(dispatcher.stop, 1.0)
+        return dispatcher
+
+    def advance(self, dispatcher, seconds):
+        self.clock.now += seconds
+        # Bangunkan thread dispatcher supaya menghitung ulang dengan jam yang baru
+        with dispatcher._cond:
+            dispatcher._cond.notify_all()
+
+    def drain(self, dispatcher, futures, step=1.0, limit=100):
+        """Advance the clock step by step until every future is done (buckets refill one token at a time)."""
+        for _ in range(limit):
+            if all(future.done() for future in futures):
+                return
+            self.advance(dispatcher, step)
+            time.sleep(0.01)
+        raise AssertionError("outbound queue did not drain")
+
+    def test_messages_to_one_chat_keep_order_and_never_overlap(self):
+        dispatcher = self.make(FakeBot(call_delay=0.002), workers=4)
+        futures = [dispatcher.send_message(-100, f"m{i}") for i in range(20)]
+        futures += [dispatcher.send_message(42, f"p{i}") for i in range(5)]
+        for future in futures:
+            future.result(timeout=2)
+        group = [call[2] for call in self.bot.calls if call[1] == -100]
+        self.assertEqual(group, [f"m{i}" for i in range(20)])
+        self.assertEqual(self.bot.max_in_flight, 1)
+
+    def test_string_and_int_chat_ids_share_one_chat(self):
+        dispatcher = self.make(FakeBot(call_delay=0.002))
+        futures = [dispatcher.send_message("-100" if i % 2 else -100, f"m{i}") for i in range(10)]
+        for future in futures:
+            future.result(timeout=2)
+        self.assertEqual([call[2] for call in self.bot.calls], [f"m{i}" for i in range(10)])
+
+    def test_full_queue_drops_lowest_priority_victim(self):
+        # Bucket global (kapasitas 1) habis oleh panggilan pertama dan jam tidak bergerak: sisanya tetap antre
+        dispatcher = self.make(global_rate=1.0, max_queue=3)
+        dispatcher.send_message(1, "first").result(timeout=2)
+        low_old = dispatcher.send_message(-100, "low old", priority=LOW)
+        normal = dispatcher.send_message(-100, "normal", priority=NORMAL)
+        low_new = dispatcher.send_message(-100, "low new", priority=LOW)
+
+        high = dispatcher.delete_message(-100, 7)
+        self.assertIsInstance(low_new.exception(timeout=1), OutboundDropped)
+        self.assertFalse(low_old.done())
+
+        # Antrian penuh berisi panggilan yang sama penting atau lebih: yang baru ditolak
+        rejected = dispatcher.send_message(-100, "another low", priority=LOW)
+        self.assertIsInstance(rejected.exception(timeout=1), OutboundDropped)
+        self.assertEqual(dispatcher.stats()["dropped_queue_full"], 2)
+        self.assertEqual(dispatcher.stats()["queue_by_priority"], {"high": 1, "normal": 1, "low": 1})
+
+        self.drain(dispatcher, (high, normal, low_old))
+        self.assertEqual([call[0] for call in self.bot.calls[1:]], ['delete_message', 'send_message', 'send_message'])
+        self.assertEqual([call[2] for call in self.bot.calls[2:]], ["normal", "low old"])
+
+    def test_rate_limited_call_is_requeued_after_retry_after(self):
+        dispatcher = self.make()
+        self.bot.fail['send_message'] = [RateLimited(5)]
+        blocked = dispatcher.send_message(-100, "hello")
+        wait_until(lambda: dispatcher.stats()["retried"] == 1)
+        later = dispatcher.send_message(-100, "after")
+        other_chat = dispatcher.send_message(-200, "elsewhere")
+        other_chat.result(timeout=2)
+
+        time.sleep(0.05)
+        self.assertFalse(blocked.done())
+        self.assertFalse(later.done())
+
+        self.advance(dispatcher, 5)
+        blocked.result(timeout=2)
+        later.result(timeout=2)
+        sends = [call[2] for call in self.bot.calls if call[1] == -100]
+        self.assertEqual(sends, ["hello", "hello", "after"])
+        self.assertEqual(dispatcher.stats()["rate_limited"], 1)
+
+    def test_retries_are_bounded(self):
+        dispatcher = self.make(max_retries=2)
+        self.bot.fail['send_message'] = [RateLimited(1) for _ in range(3)]
+        future = dispatcher.send_message(-100, "hello")
+        for attempt in range(1, 3):
+            wait_until(lambda: dispatcher.stats()["retried"] == attempt)
+            self.advance(dispatcher, 1)
+        self.assertIsInstance(future.exception(timeout=2), OutboundDropped)
+        self.assertEqual(dispatcher.stats()["dropped_retries"], 1)
+        self.assertEqual(len(self.bot.calls), 3)
+
+    def test_rate_limited_callback_answer_does_not_block_chats(self):
+        dispatcher = self.make()
+        self.bot.fail['answer_callback_query'] = [RateLimited(30)]
+        answer = dispatcher.answer_callback_query("cb-1")
+        wait_until(lambda: dispatcher.stats()["retried"] == 1)
+        dispatcher.send_message(-100, "still flowing").result(timeout=2)
+        self.assertFalse(answer.done())
+        self.advance(dispatcher, 30)
+        answer.result(timeout=2)
+
+    def test_low_priority_messages_coalesce_while_queued(self):
+        dispatcher = self.make(chat_burst=1)
+        dispatcher.send_message(-100, "sent now", priority=LOW, coalesce=True).result(timeout=2)
+        # Bucket chat kosong dan jam berhenti: pesan berikutnya menunggu dan boleh digabung
+        first = dispatcher.send_message(-100, "a", priority=LOW, coalesce=True)
+        second = dispatcher.send_message(-100, "b", priority=LOW, coalesce=True)
+        self.assertIs(first, second)
+        markdown = dispatcher.send_message(-100, "c", priority=LOW, coalesce=True, parse_mode="Markdown")
+        normal = dispatcher.send_message(-100, "d", priority=NORMAL, coalesce=True)
+        too_long = dispatcher.send_message(-100, "x" * (MAX_MESSAGE_LENGTH - 1), priority=LOW, coalesce=True)
+        other_chat = dispatcher.send_message(-200, "e", priority=LOW, coalesce=True)
+        self.assertEqual(len({id(f) for f in (first, markdown, normal, too_long)}), 4)
+        self.assertEqual(dispatcher.stats()["coalesced"], 1)
+        other_chat.result(timeout=2)
+
+        self.drain(dispatcher, (first, markdown, normal, too_long))
+        texts = [call[2] for call in self.bot.calls if call[1] == -100]
+        self.assertEqual(texts[:4], ["sent now", "d", "a\n\nb", "c"])
+        self.assertEqual(len(texts), 5)
+
+    def test_coalesced_message_is_not_merged_after_a_retry(self):
+        dispatcher = self.make()
+        self.bot.fail['send_message'] = [RateLimited(5)]
+        retried = dispatcher.send_message(-100, "a", priority=LOW, coalesce=True)
+        wait_until(lambda: dispatcher.stats()["retried"] == 1)
+        fresh = dispatcher.send_message(-100, "b", priority=LOW, coalesce=True)
+        self.assertIsNot(retried, fresh)
+        self.advance(dispatcher, 5)
+        fresh.result(timeout=2)
+        self.assertEqual([call[2] for call in self.bot.calls], ["a", "a", "b"])
+
+    def test_stop_drops_pending_calls(self):
+        dispatcher = self.make(global_rate=1.0)
+        dispatcher.send_message(1, "first").result(timeout=2)
+        pending = dispatcher.send_message(1, "never sent")
+        dispatcher.stop(timeout=0.05)
+        self.assertIsInstance(pending.exception(timeout=1), OutboundDropped)
+        self.assertIsInstance(dispatcher.send_message(1, "late").exception(timeout=1), OutboundDropped)
+
+
+if __name__ == "__main__":
+    unittest.main()
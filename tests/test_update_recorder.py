@@ -0,0 +1,69 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from update_recorder import UpdateRecorder, read_update_log
+
+
+def message_update(update_id, text, contact=None):
+    message = {
+        "message_id": update_id,
+        "from": {"id": 123456789, "is_bot": False, "first_name": "Alice", "last_name": "Liddell", "username": "alice_w"},
+        "chat": {"id": -1001234567890, "type": "supergroup", "title": "NPEPE Verse"},
+        "date": 1700000000,
+        "text": text,
+    }
+    if contact:
+        message["contact"] = contact
+    return {"update_id": update_id, "message": message}
+
+
+class UpdateRecorderTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "updates.jsonl.gz")
+
+    def test_round_trip_is_anonymized_and_stable(self):
+        recorder = UpdateRecorder(self.path, salt="test-salt", batch_size=2)
+        contact = {"phone_number": "+15550100", "first_name": "Bob", "last_name": "Builder", "user_id": 987654321,
+                   "vcard": "BEGIN:VCARD\nFN:Bob Builder\nTEL:+15550100\nEND:VCARD"}
+        recorder.record(json.dumps(message_update(1, "gm @alice_w, where to buy?")))
+        recorder.record("{not json")
+        recorder.record(json.dumps(message_update(2, "my number", contact=contact)))
+        recorder.record(json.dumps(message_update(3, "hello")))
+        recorder.stop()
+
+        records = list(read_update_log(self.path))
+        self.assertEqual([update["update_id"] for _, update in records], [1, 2, 3])
+        self.assertEqual(recorder.stats()["recorded"], 3)
+        self.assertEqual(recorder.stats()["invalid"], 1)
+
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            raw = f.read()
+        for secret in ("Alice", "Liddell", "alice_w", "NPEPE Verse", "Bob", "Builder", "+15550100", "VCARD", "123456789", "987654321"):
+            self.assertNotIn(secret, raw)
+
+        first, second, third = (update["message"] for _, update in records)
+        self.assertEqual(first["from"], third["from"])
+        self.assertGreater(first["from"]["id"], 0)
+        self.assertTrue(str(first["chat"]["id"]).startswith("-100"))
+        self.assertEqual(len(first["text"]), len("gm @alice_w, where to buy?"))
+        self.assertTrue(first["text"].endswith(", where to buy?"))
+        self.assertEqual(set(second["contact"]), {"first_name", "last_name", "user_id"})
+        self.assertNotEqual(second["contact"]["user_id"], first["from"]["id"])
+
+    def test_truncated_final_batch_is_ignored(self):
+        recorder = UpdateRecorder(self.path, salt="test-salt")
+        recorder.record(json.dumps(message_update(1, "hello")))
+        recorder.stop()
+        with open(self.path, "ab") as f:
+            member = gzip.compress(b'{"t":1,"update":{"update_id":2}}\n')
+            f.write(member[:len(member) // 2])
+        self.assertEqual([update["update_id"] for _, update in read_update_log(self.path)], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Field identitas yang diganti pseudonim pada objek User/Chat/Contact
+_NAME_FIELDS = ('first_name', 'last_name', 'username', 'title', 'bio')
+_MENTION_RE = re.compile(r'@\w{5,32}')
+# Dibuang seluruhnya: nomor telepon dan vCard kontak (berisi nama dan nomor)
+_DROPPED_FIELDS = ('phone_number', 'vcard')
+# Supergroup/channel: -100xxxxxxxxxx; awalan dipertahankan supaya tipe chat tetap terbaca dari id
+_SUPERGROUP_BASE = 1_000_000_000_000
+
+
+class Anonymizer:
+    """
+    Replaces identities in a Telegram update with stable pseudonyms (keyed HMAC of the original value).
+
+    User and chat ids keep their sign and the -100 supergroup prefix, names/usernames/titles of users,
+    chats and shared contacts become opaque tokens, @mentions in text are replaced with a token of the
+    same length (entity offsets stay valid) and phone numbers / vCards are dropped. Message text is otherwise kept, because moderation and intent
+    routing depend on it. The same salt always maps an id to the same pseudonym.
+    """
+
+    def __init__(self, salt):
+        self._key = salt.encode() if isinstance(salt, str) else salt
+
+    def _digest(self, value):
+        return hmac.new(self._key, str(value).encode(), hashlib.sha256).digest()
+
+    def pseudonym_id(self, value):
+        if not isinstance(value, int) or isinstance(value, bool):
+            return value
+        number = int.from_bytes(self._digest(value)[:6], 'big')
+        if value <= -_SUPERGROUP_BASE:
+            return -(_SUPERGROUP_BASE + number % 10_000_000_000)
+        if value < 0:
+            return -(1 + number % 999_999_999)
+        return 1 + number % 9_999_999_999
+
+    def pseudonym_name(self, value, length=None):
+        token = self._digest(value).hex()
+        return token[:length] if length else f"u{token[:10]}"
+
+    def _mention(self, match):
+        return "@" + self.pseudonym_name(match.group().lower(), len(match.group()) - 1)
+
+    def anonymize(self, node):
+        if isinstance(node, list):
+            return [self.anonymize(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        is_identity = 'id' in node and ('first_name' in node or 'type' in node or 'is_bot' in node)
+        # Contact (dan objek lain yang merujuk user lewat user_id) juga membawa nama asli
+        has_names = is_identity or 'user_id' in node
+        result = {}
+        for key, value in node.items():
+            if key in _DROPPED_FIELDS:
+                continue
+            if is_identity and key == 'id' or key in ('user_id', 'chat_id', 'sender_chat_id'):
+                result[key] = self.pseudonym_id(value)
+            elif has_names and key in _NAME_FIELDS and isinstance(value, str):
+                result[key] = self.pseudonym_name(value)
+            elif key in ('text', 'caption') and isinstance(value, str):
+                result[key] = _MENTION_RE.sub(self._mention, value)
+            else:
+                result[key] = self.anonymize(value)
+        return result
+
+
+class UpdateRecorder:
+    """
+    Append-only, gzip-compressed log of incoming updates for capacity planning and replay.
+
+    record() only puts the raw JSON on a bounded queue (dropped when full, never blocks the webhook).
+    A background thread anonymizes batches and appends them to `path` as JSON lines
+    `{"t": unix_time, "update": {...}}`. Every batch is written as a separate gzip member, so the file
+    stays readable after a crash. When the file passes `max_bytes` it is renamed with a timestamp
+    suffix and a new file is started.
+    """
+
+    def __init__(self, path, salt=None, max_bytes=100_000_000, max_queue=10000, flush_interval=2.0, batch_size=500):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        if not salt:
+            # Tanpa salt tetap: pseudonim hanya konsisten dalam satu proses
+            salt = os.urandom(16)
+        self._anonymizer = Anonymizer(salt)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._recorded = 0
+        self._dropped = 0
+        self._invalid = 0
+        self._bytes_written = 0
+        self._rotations = 0
+
+    def record(self, json_string):
+        try:
+            self._queue.put_nowait((time.time(), json_string))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="update-recorder", daemon=True)
+        self._thread.start()
+        logger.info(f"Recording anonymized updates to {self.path}.")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        batch = self._drain()
+        while batch:
+            self._write_batch(batch)
+            batch = self._drain()
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            batch = self._drain()
+            while batch:
+                self._write_batch(batch)
+                batch = self._drain() if len(batch) >= self.batch_size else []
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
+        lines = []
+        invalid = 0
+        for received_at, json_string in batch:
+            try:
+                update = self._anonymizer.anonymize(json.loads(json_string))
+            except ValueError:
+                invalid += 1
+                continue
+            lines.append(json.dumps({"t": round(received_at, 3), "update": update}, ensure_ascii=False, separators=(",", ":")))
+        if not lines:
+            with self._lock:
+                self._invalid += invalid
+            return
+        try:
+            self._rotate_if_needed()
+            data = ("\n".join(lines) + "\n").encode()
+            with open(self.path, "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as compressed:
+                    compressed.write(data)
+                written = raw.tell()
+        except OSError as e:
+            logger.error(f"Failed to write update log {self.path}: {e}")
+            with self._lock:
+                self._dropped += len(lines)
+                self._invalid += invalid
+            return
+        with self._lock:
+            self._recorded += len(lines)
+            self._invalid += invalid
+            self._bytes_written = written
+
+    def _rotate_if_needed(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size >= self.max_bytes:
+            rotated = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}"
+            os.replace(self.path, rotated)
+            with self._lock:
+                self._rotations += 1
+            logger.info(f"Update log rotated to {rotated}.")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self.path,
+                "queued": self._queue.qsize(),
+                "recorded": self._recorded,
+                "dropped": self._dropped,
+                "invalid": self._invalid,
+                "file_bytes": self._bytes_written,
+                "rotations": self._rotations,
+            }
+
+
+def read_update_log(path):
+    """Yields (unix_time, update) from a recorder log; a truncated final gzip member is ignored."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["t"], record["update"]
+        except (EOFError, gzip.BadGzipFile) as e:
+            logger.warning(f"Update log {path} ends with an incomplete batch: {e}")
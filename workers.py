@@ -0,0 +1,178 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Hasil BoundedExecutor.submit()
+ACCEPTED = "accepted"
+DUPLICATE = "duplicate"
+REJECTED = "rejected"
+
+
+class BoundedExecutor:
+    """
+    Fixed pool of worker threads behind a bounded queue.
+
+    submit() never blocks: when the queue is full the job is rejected so the caller can shed load
+    (e.g. answer with a canned reply). Jobs submitted with a `key` that is already queued or running
+    are collapsed into the in-flight one.
+    """
+
+    def __init__(self, max_workers=4, max_queue=20, name="worker"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._inflight = set()
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._deduplicated = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._threads = [threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True) for i in range(max_workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args, key=None):
+        with self._lock:
+            if key is not None and key in self._inflight:
+                self._deduplicated += 1
+                return DUPLICATE
+            try:
+                self._queue.put_nowait((time.monotonic(), key, fn, args))
+            except queue.Full:
+                self._rejected += 1
+                return REJECTED
+            if key is not None:
+                self._inflight.add(key)
+            self._submitted += 1
+            return ACCEPTED
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            enqueued_at, key, fn, args = item
+            waited = time.monotonic() - enqueued_at
+            with self._lock:
+                self._active += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error(f"Unhandled error in worker job {getattr(fn, '__name__', fn)}: {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    self._inflight.discard(key)
+
+    def stop(self):
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break  # thread daemon akan mati bersama proses
+
+    def stats(self):
+        with self._lock:
+            started = self._completed + self._active
+            return {
+                "workers": self.max_workers,
+                "active": self._active,
+                "queue_length": self._queue.qsize(),
+                "queue_capacity": self.max_queue,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "deduplicated": self._deduplicated,
+                "avg_wait_ms": round(self._wait_total / started * 1000, 1) if started else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 1),
+            }
+
+
+class KeyedWorkerPool:
+    """
+    Worker pool that preserves submission order per key.
+
+    Each key is hashed to one shard (a bounded queue drained by a single thread), so jobs for the same
+    key (e.g. a chat id) run strictly in order while different keys run in parallel. submit() never
+    blocks; a full shard rejects the job so the caller can push back (e.g. HTTP 503 to Telegram).
+    """
+
+    def __init__(self, workers=4, max_queue=1000, name="keyed-worker"):
+        self.workers = workers
+        self._shards = [queue.Queue(maxsize=max(1, max_queue // workers)) for _ in range(workers)]
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._processed = 0
+        self._rejected = 0
+        self._errors = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._threads = [threading.Thread(target=self._worker, args=(shard,), name=f"{name}-{i}", daemon=True) for i, shard in enumerate(self._shards)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key, fn, *args):
+        shard = self._shards[hash(key) % self.workers]
+        try:
+            shard.put_nowait((time.monotonic(), fn, args))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            return REJECTED
+        with self._lock:
+            self._submitted += 1
+        return ACCEPTED
+
+    def _worker(self, shard):
+        while True:
+            item = shard.get()
+            if item is None:
+                return
+            enqueued_at, fn, args = item
+            failed = False
+            try:
+                fn(*args)
+            except Exception as e:
+                failed = True
+                logger.error(f"Unhandled error in keyed worker job {getattr(fn, '__name__', fn)}: {e}", exc_info=True)
+            latency = time.monotonic() - enqueued_at
+            with self._lock:
+                self._processed += 1
+                self._errors += failed
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+
+    def stop(self, timeout=10.0):
+        """Let queued jobs drain (up to `timeout` seconds), then stop the workers."""
+        deadline = time.monotonic() + timeout
+        for shard in self._shards:
+            try:
+                shard.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                pass
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+
+    def stats(self):
+        depths = [shard.qsize() for shard in self._shards]
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": sum(depths),
+                "max_shard_depth": max(depths),
+                "submitted": self._submitted,
+                "processed": self._processed,
+                "rejected": self._rejected,
+                "errors": self._errors,
+                "avg_latency_ms": round(self._latency_total / self._processed * 1000, 1) if self._processed else 0.0,
+                "max_latency_ms": round(self._latency_max * 1000, 1),
+            }